@@ -1,9 +1,5 @@
 import os
 from typing import Optional, List, Dict, Any
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 
 import base64
 
@@ -31,6 +27,12 @@ class GmailClient:
         Authenticate with Gmail using OAuth 2.0.
         Uses a local server flow for initial authentication and saves the token.
         """
+        # Google client libraries are imported on first use; they are slow to import.
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         creds = None
         
         if os.path.exists(self.token_path):
@@ -1,11 +1,6 @@
 import os
 import io
 from typing import Optional, List
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 
 class GoogleDriveClient:
     """
@@ -31,6 +26,12 @@ class GoogleDriveClient:
         Authenticate with Google Drive using OAuth 2.0.
         Uses a local server flow for initial authentication and saves the token.
         """
+        # Google client libraries are imported on first use; they are slow to import.
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         creds = None
         
         if os.path.exists(self.token_path):
@@ -73,6 +74,8 @@ class GoogleDriveClient:
         Returns:
             str: The path to the downloaded file.
         """
+        from googleapiclient.http import MediaIoBaseDownload
+
         if not self.service:
             self.authenticate()
             
@@ -10,6 +10,9 @@ Typical usage (agent context)::
     # Attach a PDF to an existing draft
     info = attach_file(client, draft_id, Path("report.pdf"))
 
+    # Attach several (large) files in parallel; files over 3 MB use upload sessions
+    infos = attach_files(client, draft_id, [Path("export.xlsx"), Path("notes.pdf")])
+
     # Download all attachments from a received message
     paths = download_attachments(client, message_id, Path("tmp/downloads"))
 """
@@ -17,10 +20,15 @@ Typical usage (agent context)::
 from __future__ import annotations
 
 import base64
+import hashlib
+import json
 import mimetypes
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Sequence
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from agent_tools.graph.client import GraphAPIClient
 
@@ -28,14 +36,32 @@ from agent_tools.graph.client import GraphAPIClient
 from agent_tools.graph.inline_images import AttachmentInfo, list_attachments  # noqa: F401
 
 
+# Graph accepts files up to 3 MB inline (base64) in a single POST; larger
+# ones must go through an upload session.
+SMALL_ATTACHMENT_MAX_BYTES = 3 * 1024 * 1024
+# Upload-session ranges must be multiples of 320 KiB and at most 4 MB each.
+UPLOAD_CHUNK_BYTES = 10 * 320 * 1024
+# Downloads are streamed to disk in blocks of this size.
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+_ATTACHMENT_SELECT = "id,name,contentType,size,isInline,lastModifiedDateTime"
+# Per-directory record of downloaded attachments, keyed by attachment id
+# (file name, Graph size, bytes, SHA-256).
+_MANIFEST_NAME = ".attachments.json"
+# Whole-file attempts when a streamed body is cut short.
+_DOWNLOAD_ATTEMPTS = 3
+
+
 @dataclass(frozen=True)
 class DownloadedAttachment:
     """Result of downloading a single attachment."""
 
     name: str
     path: Path
-    size: int
+    size: int  # bytes on disk
     content_type: str
+    sha256: str = ""
+    skipped: bool = False  # already present and intact; not downloaded again
 
 
 def attach_file(
@@ -49,8 +75,9 @@ def attach_file(
 ) -> AttachmentInfo:
     """Attach a local file to a Graph message (draft).
 
-    Uses the small-file upload path (< 3 MB base64-encoded).  For larger files
-    Graph requires the upload-session API which is not yet implemented here.
+    Files up to ``SMALL_ATTACHMENT_MAX_BYTES`` are sent base64-encoded in one
+    POST; larger files are streamed from disk through an upload session (see
+    :func:`upload_large_attachment`).
 
     Args:
         client: Authenticated GraphAPIClient.
@@ -84,6 +111,9 @@ def attach_file(
         if not content_type:
             content_type = "application/octet-stream"
 
+    if file_path.stat().st_size > SMALL_ATTACHMENT_MAX_BYTES:
+        return upload_large_attachment(client, message_id, file_path, content_type=content_type, timeout_s=timeout_s)
+
     payload: Dict[str, Any] = {
         "@odata.type": "#microsoft.graph.fileAttachment",
         "name": file_path.name,
@@ -106,21 +136,317 @@ def attach_file(
     )
 
 
+def _next_offset(ranges: Any) -> Optional[int]:
+    """Start of the first range in an upload session's ``nextExpectedRanges`` (None when complete)."""
+    if not isinstance(ranges, list) or not ranges:
+        return None
+    return int(str(ranges[0]).split("-", 1)[0])
+
+
+def _attachment_id_from_location(location: str) -> str:
+    match = re.search(r"[Aa]ttachments\('([^']+)'\)", location or "")
+    return match.group(1) if match else ""
+
+
+def upload_large_attachment(
+    client: GraphAPIClient,
+    message_id: str,
+    file_path: Path,
+    *,
+    content_type: Optional[str] = None,
+    chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+    max_resumes: int = 5,
+    timeout_s: int = 90,
+) -> AttachmentInfo:
+    """Attach a large file through a Graph upload session.
+
+    The file is read from disk one range (``chunk_bytes``) at a time, so
+    memory use does not grow with file size. When a range upload fails, the
+    session is asked which bytes it still expects and the upload resumes
+    from there (up to ``max_resumes`` times).
+
+    Raises:
+        FileNotFoundError: If *file_path* does not exist.
+        RuntimeError: If the session cannot be created or the upload keeps failing.
+    """
+    file_path = Path(file_path).expanduser().resolve()
+    size = file_path.stat().st_size
+    if content_type is None:
+        content_type = mimetypes.guess_type(str(file_path))[0] or "application/octet-stream"
+    # Ranges must be multiples of 320 KiB (except the last one).
+    chunk_bytes = max(320 * 1024, int(chunk_bytes) // (320 * 1024) * (320 * 1024))
+
+    session = client.post(
+        f"me/messages/{message_id}/attachments/createUploadSession",
+        json={
+            "AttachmentItem": {
+                "attachmentType": "file",
+                "name": file_path.name,
+                "size": size,
+                "contentType": content_type,
+                "isInline": False,
+            }
+        },
+        timeout=timeout_s,
+    )
+    upload_url = str(session.get("uploadUrl") or "")
+    if not upload_url:
+        raise RuntimeError(f"Graph did not return an upload session for {file_path.name}: {session}")
+
+    offset = _next_offset(session.get("nextExpectedRanges"))
+    offset = 0 if offset is None else offset
+    resumes = 0
+    location = ""
+    with file_path.open("rb") as fh:
+        while offset is not None and offset < size:
+            fh.seek(offset)
+            chunk = fh.read(min(chunk_bytes, size - offset))
+            end = offset + len(chunk) - 1
+            try:
+                # The upload URL is pre-authorized and rejects a bearer token.
+                resp = client.send(
+                    "PUT",
+                    upload_url,
+                    authenticate=False,
+                    data=chunk,
+                    headers={
+                        "Content-Type": "application/octet-stream",
+                        "Content-Range": f"bytes {offset}-{end}/{size}",
+                    },
+                    timeout=timeout_s,
+                )
+            except RuntimeError:
+                if resumes >= max_resumes:
+                    raise
+                resumes += 1
+                status = client.send("GET", upload_url, authenticate=False, timeout=timeout_s)
+                offset = _next_offset((status.json() if status.content else {}).get("nextExpectedRanges"))
+                continue
+
+            if resp.status_code == 201:
+                location = str(resp.headers.get("Location") or "")
+                break
+            body = resp.json() if resp.content else {}
+            next_offset = _next_offset(body.get("nextExpectedRanges"))
+            offset = end + 1 if next_offset is None else next_offset
+
+    attachment_id = _attachment_id_from_location(location)
+    if not attachment_id:
+        matches = [a for a in list_attachments(client, message_id) if a.name == file_path.name]
+        attachment_id = matches[-1].id if matches else ""
+    return AttachmentInfo(id=attachment_id, name=file_path.name, is_inline=False, content_id="")
+
+
+def attach_files(
+    client: GraphAPIClient,
+    message_id: str,
+    file_paths: Sequence[Path],
+    *,
+    skip_if_exists: bool = True,
+    max_workers: int = 4,
+    timeout_s: int = 90,
+) -> List[AttachmentInfo]:
+    """Attach several files to one message in parallel (results in input order).
+
+    Existing attachments are listed once for all files. Each file uses
+    :func:`attach_file` (upload sessions for large files); ``max_workers``
+    uploads run at a time, within the client's per-mailbox concurrency limit.
+
+    Raises:
+        FileNotFoundError: If any file does not exist (checked before uploading).
+    """
+    paths = [Path(p).expanduser().resolve() for p in file_paths]
+    for p in paths:
+        if not p.exists():
+            raise FileNotFoundError(str(p))
+
+    existing = {a.name: a for a in list_attachments(client, message_id)} if skip_if_exists else {}
+
+    def attach_one(p: Path) -> AttachmentInfo:
+        if p.name in existing:
+            return existing[p.name]
+        return attach_file(client, message_id, p, skip_if_exists=False, timeout_s=timeout_s)
+
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(paths)))) as pool:
+        return list(pool.map(attach_one, paths))
+
+
+def _attachment_metadata(client: GraphAPIClient, path: str, *, timeout_s: int) -> Dict[str, Any]:
+    # Only the base attachment properties: never pull contentBytes just to list.
+    return client.get(path, params={"$select": _ATTACHMENT_SELECT}, timeout=timeout_s)
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(out_dir: Path) -> Dict[str, Dict[str, Any]]:
+    path = out_dir / _MANIFEST_NAME
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    manifest: Dict[str, Dict[str, Any]] = {}
+    for key, entry in data.items():
+        if not isinstance(entry, dict) or not entry.get("attachment_id"):
+            continue
+        if "file" not in entry:
+            entry = {**entry, "file": key}  # older manifests were keyed by file name
+        manifest[str(entry["attachment_id"])] = entry
+    return manifest
+
+
+def _assign_filenames(metas: Sequence[Dict[str, Any]], manifest: Dict[str, Dict[str, Any]]) -> List[str]:
+    """A distinct file name per attachment, stable across reruns.
+
+    Attachments already in the manifest keep their file; new ones take the
+    attachment name, or ``name (2).ext`` ... when another attachment (forwarded
+    mail often repeats names) already owns it.
+    """
+    ids = {str(m.get("id") or "") for m in metas}
+    taken = {str(e.get("file") or "").lower() for aid, e in manifest.items() if aid not in ids}
+    names: List[str] = [""] * len(metas)
+    for i, meta in enumerate(metas):
+        known = str((manifest.get(str(meta.get("id") or "")) or {}).get("file") or "")
+        if known and known.lower() not in taken:
+            names[i] = known
+            taken.add(known.lower())
+    for i, meta in enumerate(metas):
+        if names[i]:
+            continue
+        base = Path(str(meta.get("name") or "attachment").strip()).name or "attachment"
+        candidate, n = base, 1
+        while candidate.lower() in taken or candidate == _MANIFEST_NAME:
+            n += 1
+            candidate = f"{Path(base).stem} ({n}){Path(base).suffix}"
+        names[i] = candidate
+        taken.add(candidate.lower())
+    return names
+
+
+def _save_manifest(out_dir: Path, manifest: Dict[str, Dict[str, Any]]) -> None:
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=out_dir, delete=False) as tf:
+        json.dump(manifest, tf, indent=2, sort_keys=True)
+        temp_path = Path(tf.name)
+    temp_path.replace(out_dir / _MANIFEST_NAME)
+
+
+def _download_one(
+    client: GraphAPIClient,
+    message_id: str,
+    meta: Dict[str, Any],
+    out_dir: Path,
+    name: str,
+    *,
+    manifest: Dict[str, Dict[str, Any]],
+    skip_existing: bool,
+    timeout_s: int,
+) -> Tuple[DownloadedAttachment, Dict[str, Any]]:
+    """Stream one attachment's ``$value`` to ``out_dir/name``; returns the result and its manifest entry."""
+    attachment_id = str(meta.get("id") or "")
+    content_type = str(meta.get("contentType") or "application/octet-stream").strip()
+    dest = out_dir / name
+
+    # Graph's ``size`` includes item overhead, so it cannot be compared with the
+    # file on disk; the manifest records what was actually written last time.
+    entry = manifest.get(attachment_id) or {}
+    if (
+        skip_existing
+        and dest.exists()
+        and entry.get("file") == name
+        and entry.get("graph_size") == meta.get("size")
+        and entry.get("bytes") == dest.stat().st_size
+        and entry.get("sha256") == _sha256_file(dest)
+    ):
+        downloaded = DownloadedAttachment(
+            name=name,
+            path=dest,
+            size=int(entry["bytes"]),
+            content_type=content_type,
+            sha256=str(entry["sha256"]),
+            skipped=True,
+        )
+        return downloaded, entry
+
+    part = dest.with_name(dest.name + ".part")
+    for attempt in range(1, _DOWNLOAD_ATTEMPTS + 1):
+        resp = client.send(
+            "GET",
+            f"me/messages/{message_id}/attachments/{attachment_id}/$value",
+            stream=True,
+            headers={"Accept": "*/*", "Accept-Encoding": "identity"},
+            timeout=timeout_s,
+        )
+        expected = int(resp.headers.get("Content-Length") or -1)
+        digest = hashlib.sha256()
+        written = 0
+        error: Optional[str] = None
+        try:
+            with part.open("wb") as fh:
+                for block in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    fh.write(block)
+                    digest.update(block)
+                    written += len(block)
+        except Exception as e:  # connection dropped mid-body
+            error = str(e)
+        finally:
+            resp.close()
+        if error is None and expected >= 0 and written != expected:
+            error = f"{written} of {expected} bytes"
+        if error is None:
+            break
+        part.unlink(missing_ok=True)
+        if attempt == _DOWNLOAD_ATTEMPTS:
+            raise RuntimeError(f"Attachment {name} download incomplete after {attempt} attempts: {error}")
+    part.replace(dest)
+
+    entry = {
+        "attachment_id": attachment_id,
+        "file": name,
+        "graph_size": meta.get("size"),
+        "bytes": written,
+        "sha256": digest.hexdigest(),
+    }
+    downloaded = DownloadedAttachment(
+        name=name,
+        path=dest,
+        size=written,
+        content_type=content_type,
+        sha256=entry["sha256"],
+    )
+    return downloaded, entry
+
+
 def download_attachment(
     client: GraphAPIClient,
     message_id: str,
     attachment_id: str,
     out_dir: Path,
     *,
+    skip_existing: bool = True,
     timeout_s: int = 90,
 ) -> DownloadedAttachment:
     """Download a single attachment by ID.
 
+    The raw ``$value`` is streamed to disk in chunks (never held in memory as
+    base64), checked against ``Content-Length`` and hashed. A file already
+    downloaded by an earlier run (same attachment, size and SHA-256 as
+    recorded in ``out_dir/.attachments.json``) is not fetched again.
+
     Args:
         client: Authenticated GraphAPIClient.
         message_id: The Graph message ID.
         attachment_id: The attachment ID to download.
         out_dir: Directory to write the file into.  Created if absent.
+        skip_existing: If True, skip files that are already present and intact.
         timeout_s: HTTP request timeout in seconds.
 
     Returns:
@@ -129,25 +455,16 @@ def download_attachment(
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    resp = client.get(
-        f"me/messages/{message_id}/attachments/{attachment_id}",
-        timeout=timeout_s,
-    )
-
-    name = str(resp.get("name") or "attachment").strip()
-    content_bytes_b64 = resp.get("contentBytes") or ""
-    content_type = str(resp.get("contentType") or "application/octet-stream").strip()
-    size = int(resp.get("size") or 0)
-
-    dest = out_dir / name
-    dest.write_bytes(base64.b64decode(content_bytes_b64))
-
-    return DownloadedAttachment(
-        name=name,
-        path=dest,
-        size=size,
-        content_type=content_type,
+    meta = _attachment_metadata(client, f"me/messages/{message_id}/attachments/{attachment_id}", timeout_s=timeout_s)
+    manifest = _load_manifest(out_dir)
+    (name,) = _assign_filenames([meta], manifest)
+    downloaded, entry = _download_one(
+        client, message_id, meta, out_dir, name, manifest=manifest, skip_existing=skip_existing, timeout_s=timeout_s
     )
+    if not downloaded.skipped:
+        manifest[attachment_id] = entry
+        _save_manifest(out_dir, manifest)
+    return downloaded
 
 
 def download_attachments(
@@ -157,12 +474,18 @@ def download_attachments(
     *,
     filter_fn: Optional[Callable[[AttachmentInfo], bool]] = None,
     include_inline: bool = False,
+    skip_existing: bool = True,
+    max_workers: int = 4,
     timeout_s: int = 90,
 ) -> List[DownloadedAttachment]:
     """Download all (or filtered) attachments from a message.
 
-    This makes one call to list attachments, then one call per attachment to
-    fetch content bytes.
+    This makes one call to list attachment metadata, then streams each
+    attachment's ``$value`` to disk (see :func:`download_attachment`), with
+    ``max_workers`` downloads running concurrently. Reference (cloud link)
+    attachments have no content and are skipped. Attachments that share a
+    name (common in forwarded mail) are saved as ``name (2).ext`` and so on;
+    the manifest remembers which file belongs to which attachment id.
 
     Args:
         client: Authenticated GraphAPIClient.
@@ -171,32 +494,65 @@ def download_attachments(
         filter_fn: Optional predicate on AttachmentInfo.  Only matching
             attachments are downloaded.
         include_inline: If False (default), skip inline (CID) attachments.
+        skip_existing: If True, skip files already downloaded intact.
+        max_workers: Concurrent downloads.
         timeout_s: HTTP request timeout per individual download.
 
     Returns:
-        List of DownloadedAttachment for each file written to disk.
+        List of DownloadedAttachment for each file on disk (``skipped`` marks
+        files that were already present).
     """
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    all_attachments = list_attachments(client, message_id)
+    listing = _attachment_metadata(client, f"me/messages/{message_id}/attachments", timeout_s=timeout_s)
 
-    results: List[DownloadedAttachment] = []
-    for att in all_attachments:
+    wanted: List[Dict[str, Any]] = []
+    for meta in listing.get("value") or []:
+        if not isinstance(meta, dict) or not meta.get("id"):
+            continue
+        if str(meta.get("@odata.type") or "").endswith("referenceAttachment"):
+            continue
+        att = AttachmentInfo(
+            id=str(meta["id"]).strip(),
+            name=str(meta.get("name") or "").strip(),
+            is_inline=bool(meta.get("isInline")),
+            content_id="",
+        )
         if not include_inline and att.is_inline:
             continue
         if filter_fn is not None and not filter_fn(att):
             continue
-        if not att.id:
-            continue
-
-        dl = download_attachment(
-            client,
-            message_id,
-            att.id,
-            out_dir,
-            timeout_s=timeout_s,
-        )
-        results.append(dl)
+        wanted.append(meta)
+    if not wanted:
+        return []
 
+    manifest = _load_manifest(out_dir)
+    # Names are fixed before any download starts, so no two workers share a file.
+    names = _assign_filenames(wanted, manifest)
+    results: List[DownloadedAttachment] = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(wanted)))) as pool:
+            futures = [
+                pool.submit(
+                    _download_one,
+                    client,
+                    message_id,
+                    meta,
+                    out_dir,
+                    name,
+                    manifest=manifest,
+                    skip_existing=skip_existing,
+                    timeout_s=timeout_s,
+                )
+                for meta, name in zip(wanted, names)
+            ]
+            for future in futures:
+                downloaded, entry = future.result()
+                manifest[entry["attachment_id"]] = entry
+                results.append(downloaded)
+    finally:
+        # Record whatever finished, so a rerun after a failure skips it.
+        if any(not r.skipped for r in results):
+            _save_manifest(out_dir, manifest)
     return results
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import contextlib
 import json
+import os
+import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional
-
-from msal import PublicClientApplication, SerializableTokenCache
+from typing import Any, Iterator, Optional
 
 from agent_tools.graph.env import GraphEnv
 
+# Treat access tokens as stale this long before their ``exp`` claim.
+REFRESH_MARGIN_S = 300.0
+
 
 def _jwt_claims_without_verify(access_token: str) -> dict[str, Any]:
     """Best-effort decode of JWT payload for diagnostics (no signature verification)."""
@@ -31,17 +37,107 @@ def _jwt_claims_without_verify(access_token: str) -> dict[str, Any]:
 class TokenResult:
     access_token: str
     scp: Optional[str]
+    expires_at: Optional[float] = None  # epoch seconds, from the ``exp`` claim
+
+    def expires_in_s(self) -> float:
+        """Seconds until expiry (infinite when the token carries no ``exp`` claim)."""
+
+        return float("inf") if self.expires_at is None else self.expires_at - time.time()
+
+
+def _token_result(access_token: str) -> TokenResult:
+    claims = _jwt_claims_without_verify(access_token)
+    exp = claims.get("exp")
+    return TokenResult(
+        access_token=access_token,
+        scp=claims.get("scp"),
+        expires_at=float(exp) if isinstance(exp, (int, float)) else None,
+    )
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on ``<path>.lock`` (shared by every process using the cache)."""
+
+    lock_path = path.with_name(path.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10s; keep waiting for the other writer.
+                    continue
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _load_cache_json(text: str) -> dict[str, Any]:
+    try:
+        data = json.loads(text) if text.strip() else {}
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _merge_cache_json(on_disk: str, ours: str, base: str = "") -> str:
+    """Three-way merge of serialized MSAL caches, entry by entry.
+
+    ``base`` is the cache as last read from or written to disk. Entries we
+    changed or added win, entries we deleted since ``base`` (e.g. a refresh
+    token MSAL dropped as invalid) stay deleted, and everything else on disk
+    (other processes' writes) is kept.
+    """
+
+    merged = _load_cache_json(on_disk)
+    before = _load_cache_json(base)
+    for section, entries in json.loads(ours).items():
+        if isinstance(entries, dict) and isinstance(merged.get(section), dict):
+            old = before.get(section)
+            for key in old if isinstance(old, dict) else ():
+                if key not in entries:
+                    merged[section].pop(key, None)
+            merged[section].update(entries)
+        else:
+            merged[section] = entries
+    return json.dumps(merged, indent=4)
 
 
 class GraphAuthenticator:
     def __init__(self, *, repo_root: Path, env: GraphEnv):
+        # msal is heavy to import; only pay for it once a token is actually needed.
+        from msal import PublicClientApplication, SerializableTokenCache
+
         self._repo_root = repo_root
         self._env = env
+        self._lock = threading.RLock()
+        # Access tokens already handed out, per scope set, so repeated calls skip MSAL.
+        self._tokens: dict[tuple[str, ...], TokenResult] = {}
 
         self._cache_path = self._resolve_cache_path(env.token_cache_file)
         self._cache = SerializableTokenCache()
+        # The cache file as last read or written, to tell our deletions apart
+        # from entries another process added since.
+        self._cache_base = ""
         if self._cache_path.exists():
-            self._cache.deserialize(self._cache_path.read_text(encoding="utf-8"))
+            self._cache_base = self._cache_path.read_text(encoding="utf-8")
+            self._cache.deserialize(self._cache_base)
 
         self._app = PublicClientApplication(
             client_id=env.client_id,
@@ -54,32 +150,95 @@ class GraphAuthenticator:
         return p if p.is_absolute() else (self._repo_root / p)
 
     def _save_cache(self) -> None:
-        if self._cache.has_state_changed:
-            self._cache_path.write_text(self._cache.serialize(), encoding="utf-8")
-
-    def acquire_access_token(self, *, scopes: list[str], timeout_s: int = 600) -> TokenResult:
-        """Acquire token silently if possible, else via interactive loopback."""
-
+        """Write the MSAL cache atomically under a file lock.
+
+        Parallel runs (e.g. one per worktree) share the cache file: entries
+        another process wrote since we loaded it are merged in rather than
+        overwritten, and readers never see a half-written file. Callers
+        hold ``self._lock``.
+        """
+
+        if not self._cache.has_state_changed:
+            return
+        path = self._cache_path
+        with _file_lock(path):
+            on_disk = path.read_text(encoding="utf-8") if path.exists() else ""
+            content = _merge_cache_json(on_disk, self._cache.serialize(), self._cache_base)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, delete=False) as tf:
+                tf.write(content)
+                temp_path = Path(tf.name)
+            temp_path.replace(path)
+            self._cache_base = content
+
+    def _acquire_silent(self, scopes: list[str], *, force_refresh: bool) -> Optional[TokenResult]:
         accounts = self._app.get_accounts()
-        if accounts:
-            result = self._app.acquire_token_silent(scopes, account=accounts[0])
-            token = self._extract_token(result)
-            if token:
-                claims = _jwt_claims_without_verify(token)
-                return TokenResult(access_token=token, scp=claims.get("scp"))
-
-        result = self._app.acquire_token_interactive(
-            scopes=scopes,
-            prompt="select_account",
-            timeout=timeout_s,
-        )
+        if not accounts:
+            return None
+        result = self._app.acquire_token_silent(scopes, account=accounts[0], force_refresh=force_refresh)
         token = self._extract_token(result)
         if not token:
-            raise RuntimeError(f"Failed to obtain Graph access token: {result}")
-
-        self._save_cache()
-        claims = _jwt_claims_without_verify(token)
-        return TokenResult(access_token=token, scp=claims.get("scp"))
+            return None
+        return _token_result(token)
+
+    def acquire_access_token(
+        self, *, scopes: list[str], timeout_s: int = 600, force_refresh: bool = False
+    ) -> TokenResult:
+        """Acquire token silently if possible, else via interactive loopback.
+
+        Tokens are reused in memory until ``REFRESH_MARGIN_S`` before their
+        ``exp`` claim; ``force_refresh`` skips both that and MSAL's own cache
+        (e.g. after a 401).
+        """
+
+        key = tuple(sorted(scopes))
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and not force_refresh and cached.expires_in_s() > REFRESH_MARGIN_S:
+                return cached
+
+            token_result = self._acquire_silent(scopes, force_refresh=force_refresh)
+            if token_result is not None:
+                # A silent refresh can rotate the refresh token; persist it.
+                self._save_cache()
+            else:
+                result = self._app.acquire_token_interactive(
+                    scopes=scopes,
+                    prompt="select_account",
+                    timeout=timeout_s,
+                )
+                token = self._extract_token(result)
+                if not token:
+                    raise RuntimeError(f"Failed to obtain Graph access token: {result}")
+
+                self._save_cache()
+                token_result = _token_result(token)
+
+            self._tokens[key] = token_result
+            return token_result
+
+    def refresh_access_token(self, *, scopes: list[str]) -> Optional[TokenResult]:
+        """Redeem the refresh token for a new access token without user interaction.
+
+        Returns ``None`` when that is not possible (no cached account, refresh
+        token expired); callers keep their current token and fall back to
+        ``acquire_access_token`` once it actually expires.
+        """
+
+        # The network round trip runs outside ``self._lock`` (MSAL's cache has
+        # its own lock), so requests needing the current token are not held up.
+        try:
+            token_result = self._acquire_silent(scopes, force_refresh=True)
+        except Exception:
+            return None
+        if token_result is None:
+            return None
+        key = tuple(sorted(scopes))
+        with self._lock:
+            self._save_cache()
+            current = self._tokens.get(key)
+            if current is None or current.expires_in_s() < token_result.expires_in_s():
+                self._tokens[key] = token_result
+        return token_result
 
     @staticmethod
     def _extract_token(result: Any) -> Optional[str]:
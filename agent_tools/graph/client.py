@@ -1,11 +1,26 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+import json
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
 
-import requests
+from agent_tools.graph.throttling import (
+    IDEMPOTENT_METHODS,
+    MAILBOX_CONCURRENCY,
+    RETRIABLE_STATUS,
+    can_retry,
+    mailbox_governor,
+    mailbox_key,
+    retry_after_s,
+    retry_delay_s,
+)
 
-from agent_tools.graph.auth import GraphAuthenticator
+if TYPE_CHECKING:
+    from agent_tools.graph.auth import GraphAuthenticator, TokenResult
+    from agent_tools.llm.concurrency import Outcome
 
 
 @dataclass
@@ -13,21 +28,321 @@ class GraphClientConfig:
     base_url: str
     scopes: list[str]
     planner_timezone: Optional[str] = None
+    # Keep-alive connections kept per host; raise for threaded callers.
+    pool_size: int = 10
+    # Ask Graph for gzip-compressed responses (decoded transparently).
+    compress: bool = True
+    # Retries for 429/502/503/504 and connection errors (Retry-After honoured).
+    max_retries: int = 6
+    backoff_base_s: float = 1.0
+    max_backoff_s: float = 60.0
+    # In-flight requests per mailbox across all clients/threads in the process.
+    mailbox_concurrency: int = MAILBOX_CONCURRENCY
+
+
+@dataclass(frozen=True)
+class GraphTransfer:
+    """Size and timing of one Graph HTTP exchange."""
+
+    method: str
+    path: str
+    status_code: int
+    bytes_sent: int
+    bytes_received: int  # response body on the wire (compressed when gzip was negotiated)
+    bytes_decoded: int  # response body after decompression
+    elapsed_s: float
+
+
+@dataclass
+class GraphTransferStats:
+    """Running totals over every request made by a ``GraphAPIClient``."""
+
+    requests: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    bytes_decoded: int = 0
+    elapsed_s: float = 0.0
+    throttled: int = 0  # 429/502/503/504 responses (including $batch items)
+    retries: int = 0  # requests re-sent after throttling or a connection error
+    throttle_wait_s: float = 0.0  # time spent backing off or paused by the mailbox governor
+
+    def add(self, t: GraphTransfer) -> None:
+        self.requests += 1
+        self.bytes_sent += t.bytes_sent
+        self.bytes_received += t.bytes_received
+        self.bytes_decoded += t.bytes_decoded
+        self.elapsed_s += t.elapsed_s
+
+    def describe(self) -> str:
+        ratio = f" ({self.bytes_decoded / self.bytes_received:.1f}x gzip)" if self.bytes_received else ""
+        throttling = (
+            f", {self.throttled} throttled / {self.retries} retried ({self.throttle_wait_s:.1f}s waiting)"
+            if self.throttled or self.retries
+            else ""
+        )
+        return (
+            f"{self.requests} Graph requests, {self.bytes_received / 1024:.0f} KiB received"
+            f"{ratio}, {self.bytes_sent / 1024:.0f} KiB sent, {self.elapsed_s:.1f}s in requests{throttling}"
+        )
+
+
+# Graph JSON batching accepts at most 20 requests per $batch POST, and at most
+# 4 MB of JSON in total.
+MAX_BATCH_REQUESTS = 20
+MAX_BATCH_BYTES = 4 * 1000 * 1000
+
+# Refresh inline (blocking) when the access token has less than this left.
+_MIN_TOKEN_TTL_S = 60.0
+# Wait between background refresh attempts when one fails.
+_REFRESH_RETRY_S = 30.0
+
+
+def _not_sent(error: Exception, connect_timeout: type) -> bool:
+    """True when the connection failed before any request bytes were sent."""
+
+    if isinstance(error, connect_timeout):
+        return True
+    from urllib3.exceptions import NewConnectionError
+
+    # Covers NameResolutionError (a DNS failure), its subclass in urllib3 2.x.
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+@dataclass(frozen=True)
+class GraphBatchRequest:
+    """One request inside a ``$batch`` POST.
+
+    ``path`` is relative to the API version root (``me/messages/{id}``).
+    ``id`` defaults to the request's position; ``depends_on`` lists ids of earlier
+    requests in the same ``batch()`` call that must complete successfully first.
+    """
+
+    method: str
+    path: str
+    json: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None
+    headers: Optional[Dict[str, str]] = None
+    id: str = ""
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class GraphBatchResponse:
+    request: GraphBatchRequest
+    id: str
+    status: int
+    body: Dict[str, Any]
+    headers: Dict[str, str]
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def error_message(self) -> str:
+        err = self.body.get("error") if isinstance(self.body, dict) else None
+        if isinstance(err, dict):
+            return f"{err.get('code') or ''}: {err.get('message') or ''}".strip(": ")
+        return ""
+
+    def raise_for_status(self) -> "GraphBatchResponse":
+        if not self.ok:
+            raise RuntimeError(
+                f"Graph {self.request.method} {self.request.path} failed (batch item {self.id}): "
+                f"{self.status} {self.error_message or self.body}"
+            )
+        return self
+
+
+def chain_requests(
+    requests: Sequence[GraphBatchRequest], *, width: int = MAILBOX_CONCURRENCY
+) -> List[GraphBatchRequest]:
+    """Let at most ``width`` of ``requests`` run at once inside a ``$batch``.
+
+    Each request is made to depend on the one ``width`` places before it
+    (ids are numbered by position where missing), so writes to one mailbox stay
+    under Graph's concurrency limit. A failed request fails the rest of its
+    chain with 424.
+    """
+
+    numbered = [r if r.id else replace(r, id=str(i)) for i, r in enumerate(requests, start=1)]
+    return [
+        replace(r, depends_on=(*r.depends_on, numbered[i - width].id)) if i >= width else r
+        for i, r in enumerate(numbered)
+    ]
+
+
+def _batch_item(r: GraphBatchRequest) -> Dict[str, Any]:
+    url = "/" + r.path.lstrip("/")
+    if r.params:
+        url += ("&" if "?" in url else "?") + urlencode(r.params)
+    item: Dict[str, Any] = {"id": r.id, "method": r.method.upper(), "url": url}
+    headers = dict(r.headers or {})
+    if r.json is not None:
+        item["body"] = r.json
+        headers.setdefault("Content-Type", "application/json")
+    if headers:
+        item["headers"] = headers
+    if r.depends_on:
+        item["dependsOn"] = list(r.depends_on)
+    return item
+
+
+def _batch_groups(requests: Sequence[GraphBatchRequest]) -> List[List[GraphBatchRequest]]:
+    """Split requests, in order, into $batch calls within the count and size limits.
+
+    A dependsOn chain that crosses calls is fine: ``batch`` settles the
+    dependencies answered by an earlier call. An item too large to share a
+    call goes alone.
+    """
+
+    seen: set[str] = set()
+    for r in requests:
+        if r.id in seen:
+            raise ValueError("Graph batch request ids must be unique")
+        for dep in r.depends_on:
+            if dep not in seen:
+                raise ValueError(f"Graph batch request {r.id} depends on {dep}, which is not an earlier request")
+        seen.add(r.id)
+
+    # Slack for the {"requests": [...]} envelope.
+    budget = MAX_BATCH_BYTES - 1024
+    groups: List[List[GraphBatchRequest]] = []
+    size = 0
+    for r in requests:
+        n = len(json.dumps(_batch_item(r))) + 2
+        if not groups or len(groups[-1]) >= MAX_BATCH_REQUESTS or size + n > budget:
+            groups.append([])
+            size = 0
+        groups[-1].append(r)
+        size += n
+    return groups
 
 
 class GraphAPIClient:
     def __init__(self, *, authenticator: GraphAuthenticator, config: GraphClientConfig):
+        # Deferred so CLIs can parse arguments without importing requests.
+        import requests
+        from requests.adapters import HTTPAdapter
+
         self._authenticator = authenticator
         self._config = config
-        self._token: Optional[str] = None
+        self._token: Optional[TokenResult] = None
+        self._token_lock = threading.Lock()
+        self._token_rejected = False
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_not_before = 0.0
 
-    def _headers(self) -> Dict[str, str]:
-        if not self._token:
-            token_result = self._authenticator.acquire_access_token(scopes=self._config.scopes)
-            self._token = token_result.access_token
+        # One pooled keep-alive session per client: paging through thousands of
+        # messages reuses TLS connections instead of reconnecting per call.
+        self._session = requests.Session()
+        pool_size = max(1, int(config.pool_size))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers["Accept-Encoding"] = "gzip, deflate" if config.compress else "identity"
+
+        self._stats_lock = threading.Lock()
+        self._stats = GraphTransferStats()
+        self._last_transfer: Optional[GraphTransfer] = None
 
+    @property
+    def stats(self) -> GraphTransferStats:
+        """Snapshot of request/byte totals since creation (or ``reset_stats``)."""
+
+        with self._stats_lock:
+            return replace(self._stats)
+
+    @property
+    def last_transfer(self) -> Optional[GraphTransfer]:
+        return self._last_transfer
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = GraphTransferStats()
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _record_transfer(self, method: str, path: str, resp: Any, elapsed_s: float, *, streamed: bool = False) -> None:
+        body = resp.request.body if resp.request is not None else None
+        # A streamed body has not been read yet; count what the server announced.
+        decoded = int(resp.headers.get("Content-Length") or 0) if streamed else len(resp.content or b"")
+        try:
+            # urllib3 counts bytes pulled off the socket, i.e. before gzip decoding.
+            received = int(resp.raw.tell())
+        except Exception:
+            received = 0
+        if received <= 0:
+            received = int(resp.headers.get("Content-Length") or decoded)
+
+        transfer = GraphTransfer(
+            method=method,
+            path=path.split("?", 1)[0],
+            status_code=int(resp.status_code),
+            bytes_sent=len(body) if body else 0,
+            bytes_received=received,
+            bytes_decoded=decoded,
+            elapsed_s=elapsed_s,
+        )
+        with self._stats_lock:
+            self._stats.add(transfer)
+            self._last_transfer = transfer
+
+    def _record_throttle(self, *, throttled: int = 0, retries: int = 0, wait_s: float = 0.0) -> None:
+        with self._stats_lock:
+            self._stats.throttled += throttled
+            self._stats.retries += retries
+            self._stats.throttle_wait_s += wait_s
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        return retry_delay_s(
+            attempt, retry_after, base_s=self._config.backoff_base_s, max_s=self._config.max_backoff_s
+        )
+
+    def _access_token(self) -> str:
+        """Current access token, refreshed before it expires.
+
+        Inside the last ``REFRESH_MARGIN_S`` of its lifetime the token is still
+        used while a background thread redeems the refresh token, so requests
+        do not stall on (or fail with a 401 from) an expiring token. Only an
+        (almost) expired or rejected token is refreshed inline.
+        """
+
+        from agent_tools.graph.auth import REFRESH_MARGIN_S
+
+        with self._token_lock:
+            token = self._token
+            if token is None or self._token_rejected or token.expires_in_s() <= _MIN_TOKEN_TTL_S:
+                self._token = self._authenticator.acquire_access_token(
+                    scopes=self._config.scopes, force_refresh=token is not None
+                )
+                self._token_rejected = False
+            elif token.expires_in_s() <= REFRESH_MARGIN_S:
+                self._start_background_refresh()
+            return self._token.access_token
+
+    def _start_background_refresh(self) -> None:
+        # Called with _token_lock held.
+        now = time.monotonic()
+        if now < self._refresh_not_before or (self._refresh_thread and self._refresh_thread.is_alive()):
+            return
+        self._refresh_not_before = now + _REFRESH_RETRY_S
+        self._refresh_thread = threading.Thread(target=self._refresh_token, name="graph-token-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_token(self) -> None:
+        refreshed = self._authenticator.refresh_access_token(scopes=self._config.scopes)
+        if refreshed is None:
+            return
+        with self._token_lock:
+            if not self._token_rejected:
+                self._token = refreshed
+
+    def _headers(self) -> Dict[str, str]:
         headers = {
-            "Authorization": f"Bearer {self._token}",
+            "Authorization": f"Bearer {self._access_token()}",
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
@@ -39,6 +354,30 @@ class GraphAPIClient:
         return headers
 
     def request(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        """Send one Graph request and return the decoded JSON body (see ``send``)."""
+
+        resp = self.send(method, path, **kwargs)
+        return resp.json() if resp.content else {}
+
+    def send(self, method: str, path: str, *, authenticate: bool = True, stream: bool = False, **kwargs: Any) -> Any:
+        """Send one Graph request and return the ``requests.Response``.
+
+        Throttling (429) and transient 502/503/504 responses or connection
+        errors are retried up to ``max_retries`` times, waiting for
+        ``Retry-After`` when given and jittered exponential backoff otherwise.
+        POST/PATCH are only retried when they were not processed (429/503 with
+        ``Retry-After``, or no connection was made); see ``can_retry``.
+        Requests to the same mailbox share a ``MailboxGovernor``. Other
+        statuses >= 400 and failed requests raise ``RuntimeError``.
+
+        Use it directly for non-JSON bodies: ``stream=True`` for downloads
+        (``$value``), and ``authenticate=False`` for pre-authorized URLs such as
+        upload-session ``uploadUrl``s, which reject an ``Authorization`` header.
+        """
+
+        from requests.exceptions import ConnectionError as RequestsConnectionError
+        from requests.exceptions import ConnectTimeout, RequestException, Timeout
+
         if path.startswith("http://") or path.startswith("https://"):
             url = path
         else:
@@ -46,22 +385,81 @@ class GraphAPIClient:
 
         extra_headers = kwargs.pop("headers", None)
         timeout_s = kwargs.pop("timeout", 30)
+        governor = mailbox_governor(
+            mailbox_key(path, self._config.base_url), max_concurrency=self._config.mailbox_concurrency
+        )
+        # Pre-authorized URLs carry their token in the query string; keep it out of errors.
+        label = path if authenticate else path.split("?", 1)[0]
 
-        for attempt in (1, 2):
-            headers = self._headers()
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        token_refreshed = False
+        while True:
+            headers = self._headers() if authenticate else {}
             if isinstance(extra_headers, dict):
                 headers.update({str(k): str(v) for k, v in extra_headers.items()})
 
-            resp = requests.request(method, url, headers=headers, timeout=timeout_s, **kwargs)
-            if resp.status_code == 401 and attempt == 1:
-                # Retry once with a fresh token.
-                self._token = None
+            paused_s = governor.acquire()
+            if paused_s:
+                self._record_throttle(wait_s=paused_s)
+            started = time.monotonic()
+            # Exactly one release per acquire, however the request ends.
+            outcome: Outcome = "error"
+            failure: Optional[Exception] = None
+            try:
+                resp = self._session.request(method, url, headers=headers, timeout=timeout_s, stream=stream, **kwargs)
+                status = resp.status_code
+                if status == 429:
+                    outcome = "throttled"
+                elif status in RETRIABLE_STATUS:
+                    outcome = "overloaded"
+                else:
+                    outcome = "ok" if status < 400 else "error"
+            except (RequestsConnectionError, Timeout) as e:
+                outcome = "timeout"
+                failure = e
+            except RequestException as e:
+                raise RuntimeError(f"Graph {method} {label} failed: {e}") from e
+            finally:
+                elapsed_s = time.monotonic() - started
+                governor.release(outcome, elapsed_s)
+
+            if failure is not None:
+                if attempt >= self._config.max_retries or not (idempotent or _not_sent(failure, ConnectTimeout)):
+                    raise RuntimeError(
+                        f"Graph {method} {label} failed after {attempt + 1} attempts: {failure}"
+                    ) from failure
+                delay = self._retry_delay(attempt, None)
+                self._record_throttle(retries=1, wait_s=delay)
+                time.sleep(delay)
+                attempt += 1
                 continue
-            if resp.status_code >= 400:
-                raise RuntimeError(f"Graph {method} {path} failed: {resp.status_code} {resp.text}")
-            return resp.json() if resp.content else {}
 
-        return {}
+            self._record_transfer(method, path, resp, elapsed_s, streamed=stream and status < 400)
+
+            if status == 401 and authenticate and not token_refreshed:
+                # Retry once with a fresh token.
+                with self._token_lock:
+                    self._token_rejected = True
+                token_refreshed = True
+                resp.close()
+                continue
+            if status in RETRIABLE_STATUS:
+                self._record_throttle(throttled=1)
+                retry_after = retry_after_s(resp.headers)
+                if attempt < self._config.max_retries and can_retry(method, status, retry_after):
+                    delay = self._retry_delay(attempt, retry_after)
+                    if retry_after is not None:
+                        # Hold every request to this mailbox, not just this one.
+                        governor.pause(delay)
+                    self._record_throttle(retries=1, wait_s=delay)
+                    resp.close()
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+            if status >= 400:
+                raise RuntimeError(f"Graph {method} {label} failed: {status} {resp.text}")
+            return resp
 
     def get(
         self,
@@ -90,6 +488,108 @@ class GraphAPIClient:
     ) -> Dict[str, Any]:
         return self.request("PATCH", path, json=json, headers=headers, **kwargs)
 
+    def delete(self, path: str, **kwargs: Any) -> Dict[str, Any]:
+        return self.request("DELETE", path, **kwargs)
+
+    def batch(
+        self,
+        requests: Sequence[GraphBatchRequest],
+        *,
+        raise_on_error: bool = False,
+        timeout: int = 90,
+    ) -> List[GraphBatchResponse]:
+        """Send requests as JSON ``$batch`` POSTs and return responses in input order.
+
+        POSTs carry up to 20 requests and 4 MB of JSON; ``dependsOn`` chains
+        that do not fit are split over consecutive POSTs. Items without an
+        explicit ``id`` are numbered by position. Per-item failures come back
+        as responses with ``ok == False`` (a failed dependency yields 424)
+        unless ``raise_on_error`` is set. Items throttled inside a batch
+        (429/502/503/504) are re-sent, with anything that failed only because
+        they did, up to ``max_retries`` times.
+        """
+
+        numbered = [r if r.id else replace(r, id=str(i)) for i, r in enumerate(requests, start=1)]
+        by_id: Dict[str, GraphBatchResponse] = {}
+
+        for group in _batch_groups(numbered):
+            # Dependencies answered by an earlier POST are already settled.
+            ready: List[GraphBatchRequest] = []
+            for r in group:
+                settled = [d for d in r.depends_on if d in by_id]
+                if any(not by_id[d].ok for d in settled):
+                    by_id[r.id] = GraphBatchResponse(
+                        request=r, id=r.id, status=424, body={"error": {"code": "failedDependency"}}, headers={}
+                    )
+                elif settled:
+                    ready.append(replace(r, depends_on=tuple(d for d in r.depends_on if d not in by_id)))
+                else:
+                    ready.append(r)
+            if ready:
+                self._send_batch_group(ready, by_id, timeout=timeout)
+
+        results: List[GraphBatchResponse] = []
+        for r in numbered:
+            result = by_id.get(r.id) or GraphBatchResponse(
+                request=r, id=r.id, status=0, body={"error": {"code": "missingResponse"}}, headers={}
+            )
+            if raise_on_error:
+                result.raise_for_status()
+            results.append(result)
+        return results
+
+    def _send_batch_group(
+        self, group: List[GraphBatchRequest], by_id: Dict[str, GraphBatchResponse], *, timeout: int
+    ) -> None:
+        pending = list(group)
+        for attempt in range(self._config.max_retries + 1):
+            payload = [_batch_item(r) for r in pending]
+            resp = self.post("$batch", json={"requests": payload}, timeout=timeout)
+            sent = {r.id: r for r in pending}
+            for item in resp.get("responses") or []:
+                rid = str(item.get("id") or "")
+                if rid not in sent:
+                    continue
+                body = item.get("body")
+                by_id[rid] = GraphBatchResponse(
+                    request=sent[rid],
+                    id=rid,
+                    status=int(item.get("status") or 0),
+                    body=body if isinstance(body, dict) else ({"value": body} if body is not None else {}),
+                    headers={str(k): str(v) for k, v in (item.get("headers") or {}).items()},
+                )
+
+            # Throttled items (and items that failed only because a throttled
+            # dependency did) are re-sent on their own after the longest Retry-After.
+            # POST/PATCH items only when Graph did not process them (can_retry).
+            throttled = {
+                r.id
+                for r in pending
+                if r.id in by_id and can_retry(r.method, by_id[r.id].status, retry_after_s(by_id[r.id].headers))
+            }
+            if not throttled:
+                return
+            self._record_throttle(throttled=len(throttled))
+            retry = set(throttled)
+            changed = True
+            while changed:
+                changed = False
+                for r in pending:
+                    failed_dependency = r.id in by_id and by_id[r.id].status == 424
+                    if r.id not in retry and failed_dependency and retry & set(r.depends_on):
+                        retry.add(r.id)
+                        changed = True
+            if attempt >= self._config.max_retries:
+                return
+
+            waits = [retry_after_s(by_id[i].headers) for i in throttled]
+            delay = self._retry_delay(attempt, max((w for w in waits if w is not None), default=None))
+            self._record_throttle(retries=len(retry), wait_s=delay)
+            time.sleep(delay)
+            pending = [
+                replace(r, depends_on=tuple(d for d in r.depends_on if d in retry)) for r in pending if r.id in retry
+            ]
+
     # Convenience wrappers for common resources
 
     def me(self) -> Dict[str, Any]:
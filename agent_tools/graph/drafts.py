@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import html
+import queue
 import re
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from agent_tools.graph.client import GraphAPIClient
+from agent_tools.graph.client import GraphAPIClient, GraphBatchRequest
 
 
 def strip_markdown_to_text(text: str) -> str:
@@ -85,6 +87,88 @@ def _emails_from_recipients(recipients: Any) -> List[Tuple[str, str]]:
     return out
 
 
+# Pages buffered ahead by callers that read whole collections.
+DEFAULT_PREFETCH_PAGES = 2
+
+_PAGES_DONE = object()
+
+
+def _fetch_pages(
+    client: GraphAPIClient,
+    path: str,
+    params: Optional[Dict[str, Any]],
+    headers: Optional[Dict[str, str]],
+    timeout_s: int,
+) -> Iterator[Dict[str, Any]]:
+    next_url: Optional[str] = path
+    next_params = params
+
+    while next_url:
+        resp = client.get(next_url, params=next_params, headers=headers, timeout=timeout_s)
+        if not isinstance(resp, dict):
+            return
+        yield resp
+
+        next_link = resp.get("@odata.nextLink")
+        next_url = str(next_link) if next_link else None
+        next_params = None
+
+
+def iter_graph_pages(
+    client: GraphAPIClient,
+    path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout_s: int = 90,
+    prefetch: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Yield each response page of a Graph collection, following ``@odata.nextLink``.
+
+    With ``prefetch`` > 0 a background thread requests page N+1 while the
+    caller is still working on page N, holding at most ``prefetch`` pages in
+    a bounded buffer. Errors are re-raised in the caller; closing the
+    iterator early stops the fetcher after its in-flight request.
+    """
+
+    if prefetch <= 0:
+        yield from _fetch_pages(client, path, params, headers, timeout_s)
+        return
+
+    buffer: queue.Queue = queue.Queue(maxsize=int(prefetch))
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for page in _fetch_pages(client, path, params, headers, timeout_s):
+                if not put(page):
+                    return
+            put(_PAGES_DONE)
+        except BaseException as e:  # surfaced to the consumer
+            put(e)
+
+    threading.Thread(target=produce, name="graph-page-prefetch", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _PAGES_DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
 def iter_graph_paged(
     client: GraphAPIClient,
     path: str,
@@ -92,21 +176,34 @@ def iter_graph_paged(
     params: Dict[str, Any],
     headers: Optional[Dict[str, str]] = None,
     timeout_s: int = 90,
+    prefetch: int = 0,
 ) -> Iterable[Dict[str, Any]]:
-    next_url: Optional[str] = path
-    next_params: Optional[Dict[str, Any]] = params
+    """Yield the items of a paged Graph collection (see ``iter_graph_pages`` for ``prefetch``)."""
 
-    while next_url:
-        resp = client.get(next_url, params=next_params, headers=headers, timeout=timeout_s)
-        items = resp.get("value") if isinstance(resp, dict) else None
-        if isinstance(items, list):
-            for it in items:
-                if isinstance(it, dict):
-                    yield it
+    pages = iter_graph_pages(client, path, params=params, headers=headers, timeout_s=timeout_s, prefetch=prefetch)
+    try:
+        for resp in pages:
+            items = resp.get("value")
+            if isinstance(items, list):
+                for it in items:
+                    if isinstance(it, dict):
+                        yield it
+    finally:
+        pages.close()
 
-        next_link = resp.get("@odata.nextLink") if isinstance(resp, dict) else None
-        next_url = str(next_link) if next_link else None
-        next_params = None
+
+def _draft_body(client: GraphAPIClient, created: Dict[str, Any], draft_id: str, *, timeout_s: int) -> str:
+    """Body HTML of a draft just returned by createReply/createReplyAll.
+
+    Those calls return the new message, so the extra GET is only needed when
+    the response carries no body.
+    """
+
+    body = created.get("body") if isinstance(created, dict) else None
+    if isinstance(body, dict) and isinstance(body.get("content"), str):
+        return body["content"]
+    current_draft = client.get(f"me/messages/{draft_id}", params={"$select": "body"}, timeout=timeout_s)
+    return (current_draft.get("body") or {}).get("content", "")
 
 
 def _norm(s: str) -> str:
@@ -140,6 +237,7 @@ def resolve_email_candidates_from_mailbox(
             "$select": "from,toRecipients,ccRecipients",
         },
         headers=headers,
+        prefetch=DEFAULT_PREFETCH_PAGES,
     ):
         f = (msg.get("from") or {}).get("emailAddress") if isinstance(msg.get("from"), dict) else None
         if isinstance(f, dict):
@@ -217,9 +315,8 @@ def create_reply_draft(
     if not draft_id:
         raise RuntimeError("Graph createReply returned no draft id")
 
-    # 2. Get current body (the history)
-    current_draft = client.get(f"me/messages/{draft_id}", timeout=timeout_s)
-    current_body = (current_draft.get("body") or {}).get("content", "")
+    # 2. Current body (the history), from the createReply response when present
+    current_body = _draft_body(client, reply_resp, draft_id, timeout_s=timeout_s)
 
     # 3. Combine new content + history
     # Standard Outlook HTML separator
@@ -288,9 +385,8 @@ def create_reply_all_draft(
         patch_payload: Dict[str, Any] = {}
 
         if body:
-            # Get existing body (quoted history) so we can prepend new content.
-            current_draft = client.get(f"me/messages/{draft_id}", timeout=timeout_s)
-            current_body = (current_draft.get("body") or {}).get("content", "")
+            # Existing body (quoted history) so we can prepend new content.
+            current_body = _draft_body(client, reply_resp, draft_id, timeout_s=timeout_s)
 
             separator = "<br><div class='BodyFragment'><hr></div>" if "div" in current_body else "<br><hr>"
             if content_type.upper() == "TEXT":
@@ -442,23 +538,26 @@ def verify_draft(
     Returns:
         DraftVerifyResult with metadata and per-phrase pass/fail.
     """
-    msg = client.get(
-        f"me/messages/{draft_id}",
-        params={"$select": "id,subject,body,toRecipients,ccRecipients"},
+    # Message and attachment list in one $batch round trip.
+    msg_resp, att_resp_item = client.batch(
+        [
+            GraphBatchRequest(
+                "GET", f"me/messages/{draft_id}", params={"$select": "id,subject,body,toRecipients,ccRecipients"}
+            ),
+            GraphBatchRequest(
+                "GET", f"me/messages/{draft_id}/attachments", params={"$top": 200, "$select": "name,size,contentType"}
+            ),
+        ],
+        raise_on_error=True,
         timeout=timeout_s,
     )
+    msg = msg_resp.body
+    att_resp = att_resp_item.body
 
     subject = str(msg.get("subject") or "").strip()
     body_html = ((msg.get("body") or {}).get("content") or "")
     to_addrs = [addr for _, addr in _emails_from_recipients(msg.get("toRecipients"))]
     cc_addrs = [addr for _, addr in _emails_from_recipients(msg.get("ccRecipients"))]
-
-    # Fetch attachments.
-    att_resp = client.get(
-        f"me/messages/{draft_id}/attachments",
-        params={"$top": 200, "$select": "name,size,contentType"},
-        timeout=timeout_s,
-    )
     att_names: List[str] = []
     if isinstance(att_resp, dict) and isinstance(att_resp.get("value"), list):
         att_names = [str(a.get("name") or "") for a in att_resp["value"] if isinstance(a, dict)]
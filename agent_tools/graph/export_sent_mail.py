@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import re
 from datetime import datetime
-from html import unescape
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
@@ -14,7 +14,9 @@ except Exception:  # pragma: no cover
 
 from agent_tools.graph.auth import GraphAuthenticator
 from agent_tools.graph.client import GraphAPIClient, GraphClientConfig
+from agent_tools.graph.drafts import DEFAULT_PREFETCH_PAGES, iter_graph_pages
 from agent_tools.graph.env import load_graph_env
+from agent_tools.graph.html_text import html_to_text
 
 
 def _repo_root() -> Path:
@@ -27,26 +29,6 @@ def _safe_filename(s: str) -> str:
     return s.strip("_") or "export"
 
 
-def _html_to_text(html: str) -> str:
-    if not html:
-        return ""
-
-    text = html
-    # Normalize common line break tags to newlines first.
-    text = re.sub(r"<\s*br\s*/?>", "\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"</\s*p\s*>", "\n\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"</\s*div\s*>", "\n", text, flags=re.IGNORECASE)
-
-    # Drop remaining tags.
-    text = re.sub(r"<[^>]+>", "", text)
-    text = unescape(text)
-
-    # Clean up whitespace.
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
-
-
 def _format_dt(sent_iso: str, tz_name: str) -> str:
     if not sent_iso:
         return ""
@@ -115,63 +97,57 @@ def _iter_sent_messages_to(
     # https://graph.microsoft.com/v1.0/me/mailFolders/SentItems/messages
     path = "me/mailFolders/SentItems/messages"
 
+    # Pages are prefetched in the background while earlier ones are consumed.
+    search_mode = False
+    pages = iter_graph_pages(client, path, params=params, prefetch=DEFAULT_PREFETCH_PAGES)
+    try:
+        first = next(pages, None)
+    except RuntimeError as e:
+        # Fall back once from invalid filter to $search.
+        msg = str(e)
+        if "ErrorInvalidUrlQueryFilter" not in msg and "invalid nodes" not in msg:
+            raise
+        # $search requires ConsistencyLevel header; results are sorted locally.
+        search_mode = True
+        params = {
+            "$search": f'"recipients:{email}"',
+            "$top": int(page_size),
+            "$select": select_fields,
+        }
+        pages = iter_graph_pages(
+            client,
+            path,
+            params=params,
+            headers={"ConsistencyLevel": "eventual"},
+            prefetch=DEFAULT_PREFETCH_PAGES,
+        )
+        first = next(pages, None)
+
     count = 0
     buffered: List[Dict[str, Any]] = []
-
-    def _flush_buffered() -> Iterable[Dict[str, Any]]:
-        nonlocal buffered
-        buffered.sort(key=lambda m: str(m.get("sentDateTime") or ""))
-        for m in buffered:
-            yield m
-        buffered = []
-    while True:
-        try:
-            data = client.get(path, params=params)
-        except RuntimeError as e:
-            # Fall back once from invalid filter to $search.
-            msg = str(e)
-            if "ErrorInvalidUrlQueryFilter" in msg or "invalid nodes" in msg:
-                # $search requires ConsistencyLevel header.
-                params = {
-                    "$search": f'"recipients:{email}"',
-                    "$top": int(page_size),
-                    "$select": select_fields,
-                }
-                data = client.get(
-                    "me/mailFolders/SentItems/messages",
-                    params=params,
-                    headers={"ConsistencyLevel": "eventual"},
-                )
-                # For $search results, we sort locally later.
-                path = "me/mailFolders/SentItems/messages"
-            else:
-                raise
-        items = data.get("value", []) if isinstance(data, dict) else []
-        if not isinstance(items, list):
-            break
-
-        for msg in items:
-            if isinstance(msg, dict):
-                # If we're in $search mode (no $orderby), buffer for local sort.
-                if params and "$search" in params:
-                    buffered.append(msg)
-                else:
-                    yield msg
-                count += 1
-                if count >= max_messages:
-                    if buffered:
-                        yield from _flush_buffered()
-                    return
-
-        next_link = data.get("@odata.nextLink") if isinstance(data, dict) else None
-        if not isinstance(next_link, str) or not next_link:
-            if buffered:
-                yield from _flush_buffered()
-            return
-
-        # Next link already has query string; clear params.
-        path = next_link
-        params = None
+    try:
+        for data in itertools.chain([first] if first is not None else [], pages):
+            items = data.get("value", [])
+            if not isinstance(items, list):
+                break
+
+            for msg in items:
+                if isinstance(msg, dict):
+                    # If we're in $search mode (no $orderby), buffer for local sort.
+                    if search_mode:
+                        buffered.append(msg)
+                    else:
+                        yield msg
+                    count += 1
+                    if count >= max_messages:
+                        break
+            if count >= max_messages:
+                break
+    finally:
+        pages.close()
+
+    buffered.sort(key=lambda m: str(m.get("sentDateTime") or ""))
+    yield from buffered
 
 
 def export_compiled_sent_mail(
@@ -181,6 +157,7 @@ def export_compiled_sent_mail(
     include_cc: bool,
     display_timezone: str,
     max_messages: int,
+    trim_quoted: bool = False,
 ) -> Path:
     repo_root = _repo_root()
     env = load_graph_env(repo_root)
@@ -237,7 +214,7 @@ def export_compiled_sent_mail(
         body_preview = msg.get("bodyPreview") if isinstance(msg.get("bodyPreview"), str) else ""
 
         if body_type.lower() == "html":
-            body_text = _html_to_text(body_content)
+            body_text = html_to_text(body_content, trim_quoted=trim_quoted)
         else:
             body_text = (body_content or "").strip()
 
@@ -290,6 +267,11 @@ def main() -> int:
         default=500,
         help="Maximum number of messages to export (default: 500)",
     )
+    parser.add_argument(
+        "--trim-quoted",
+        action="store_true",
+        help="Drop quoted reply history (Outlook/Gmail/Apple reply blocks) from each message body.",
+    )
     args = parser.parse_args()
 
     out_path = export_compiled_sent_mail(
@@ -298,6 +280,7 @@ def main() -> int:
         include_cc=bool(args.include_cc),
         display_timezone=str(args.display_timezone),
         max_messages=int(args.max),
+        trim_quoted=bool(args.trim_quoted),
     )
 
     print(f"Wrote compiled export: {out_path}")
@@ -0,0 +1,402 @@
+"""HTML-to-text conversion for Microsoft Graph message bodies.
+
+One converter shared by mail search, thread export, sent-mail export and the
+mail mirror. ``HtmlTextConverter`` is an incremental parser: ``feed`` takes
+the body in chunks and walks it once with a single compiled tokenizer, so
+run time is linear in the input, including malformed bodies with stray ``<``
+(the old ``<[^>]+>`` pipeline rescanned to the end of the body for each one).
+
+Beyond line breaks and entities it handles:
+
+- ``<style>``, ``<script>``, ``<head>`` and comments (including Outlook
+  conditional comments) are dropped;
+- lists become ``- item`` / ``1. item`` lines, indented per nesting level;
+- data tables (rows with 2+ cells) become ``cell | cell`` lines, while layout
+  tables (newsletters, signatures) are flattened to paragraphs;
+- ``<blockquote>`` text is prefixed with ``> `` per nesting level;
+- ``<pre>`` text keeps its line breaks and indentation;
+- with ``trim_quoted=True`` conversion stops at the quoted reply history
+  (Outlook ``divRplyFwdMsg`` / header border, Gmail ``gmail_quote``, Apple
+  ``blockquote type=cite``, ``-----Original Message-----``), and the rest of
+  the body is never parsed.
+"""
+
+from __future__ import annotations
+
+import re
+from html import unescape
+from typing import Callable, Dict, List, Optional
+
+# One pass over the body: comments (an unclosed one runs to the end, so it is
+# scanned once), tags (bounded by the next "<", so stray "<" characters cannot
+# cause rescans), doctype/processing instructions, then text (a lone "<" is
+# text). Groups: (close, name, attrs, text).
+_TOKEN = re.compile(
+    r"<!--.*?(?:-->|\Z)"
+    r"|<(/?)([a-zA-Z][a-zA-Z0-9:]*)([^<>]*)>"
+    r"|<[!?/][^<>]*>"
+    r"|(<|[^<]+)",
+    re.S,
+)
+
+_SKIP_TAGS = frozenset({"style", "script", "head", "title", "noscript", "template", "xml"})
+_BLOCK_TAGS = frozenset(
+    {
+        "p", "div", "section", "article", "header", "footer", "main", "aside", "nav",
+        "h1", "h2", "h3", "h4", "h5", "h6", "pre", "address", "center", "form", "fieldset",
+        "dl", "dt", "dd", "figure", "figcaption", "caption",
+    }
+)  # fmt: skip
+_PARAGRAPH_TAGS = frozenset({"p", "h1", "h2", "h3", "h4", "h5", "h6", "pre"})
+
+_QUOTE_TAGS = frozenset({"div", "blockquote", "hr"})
+_QUOTE_ATTR_MARKERS = ("divrplyfwdmsg", "appendonsend", "gmail_quote", "yahoo_quoted", "moz-cite-prefix")
+_OUTLOOK_HEADER_BORDER = re.compile(r"border-top:\s*solid\s+#(?:e1e1e1|b5c4df)")
+_ORIGINAL_MESSAGE = re.compile(r"^\s*-{2,}\s*Original Message\s*-{2,}", re.I)
+_ATTRIBUTION = re.compile(r"^On\b.{4,300}\bwrote:\s*$", re.I | re.S)
+
+# Feed in slices of this size so trimming can stop early on long threads.
+_FEED_CHARS = 64 * 1024
+
+
+class _Table:
+    __slots__ = ("rows", "nested", "cell", "outer")
+
+    def __init__(self, outer: List[str]) -> None:
+        self.rows: List[List[str]] = []
+        self.nested = False
+        self.cell: Optional[List[str]] = None  # output of the open cell
+        self.outer = outer  # output the table renders into
+
+
+def _is_quote_start(tag: str, attrs: str) -> bool:
+    lowered = attrs.lower()
+    if any(m in lowered for m in _QUOTE_ATTR_MARKERS):
+        return True
+    if tag == "blockquote":
+        return "cite" in lowered
+    if tag == "hr":
+        return "stopspelling" in lowered
+    return _OUTLOOK_HEADER_BORDER.search(lowered) is not None
+
+
+class HtmlTextConverter:
+    """Incremental HTML → plain text converter (``feed`` chunks, then ``close``)."""
+
+    def __init__(self, *, trim_quoted: bool = False):
+        self.trim_quoted = trim_quoted
+        self.trimmed = False  # quoted history found; further input is ignored
+        self._carry = ""
+        self._skip: Optional[str] = None
+        self._pre = 0
+        self._quote_depth = 0
+        self._lists: List[List] = []  # [ordered, counter]
+        self._tables: List[_Table] = []
+        self._doc: List[str] = []
+        self._out = self._doc  # the document, or the open table cell
+        self._breaks = 0
+        self._space = False
+        self._marker = ""
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def _break(self, n: int = 1) -> None:
+        if n > self._breaks:
+            self._breaks = n
+        self._space = False
+
+    def _write(self, text: str) -> None:
+        out = self._out
+        if out:
+            if self._breaks:
+                out.append("\n" * self._breaks + "> " * self._quote_depth)
+            elif self._space:
+                out.append(" ")
+        elif self._quote_depth:
+            out.append("> " * self._quote_depth)
+        if self._marker:
+            out.append(self._marker)
+            self._marker = ""
+        out.append(text)
+        self._breaks = 0
+        self._space = False
+
+    def _text(self, raw: str) -> None:
+        if "&" in raw:
+            raw = unescape(raw)
+        if "\xa0" in raw:
+            raw = raw.replace("\xa0", " ")
+        if self._pre:
+            for i, line in enumerate(raw.replace("\r\n", "\n").split("\n")):
+                if i:
+                    self._break(1)
+                if line:
+                    self._write(line)
+            return
+        words = raw.split()
+        if not words:
+            if raw:
+                self._space = True
+            return
+        if self.trim_quoted and words[0].startswith("--") and _ORIGINAL_MESSAGE.match(raw):
+            self.trimmed = True
+            return
+        if raw[0].isspace():
+            self._space = True
+        self._write(words[0] if len(words) == 1 else " ".join(words))
+        if raw[-1].isspace():
+            self._space = True
+
+    # ------------------------------------------------------------------
+    # Start tags
+    # ------------------------------------------------------------------
+
+    def _start_skip(self, tag: str, attrs: str) -> None:
+        if not attrs.endswith("/"):
+            self._skip = tag
+
+    def _start_block(self, tag: str, attrs: str) -> None:
+        self._break(2 if tag in _PARAGRAPH_TAGS else 1)
+        if tag == "pre":
+            self._pre += 1
+
+    def _start_br(self, tag: str, attrs: str) -> None:
+        if self._out or self._breaks:
+            self._breaks += 1
+        self._space = False
+
+    def _start_list(self, tag: str, attrs: str) -> None:
+        self._break(1)
+        self._lists.append([tag == "ol", 0])
+
+    def _start_li(self, tag: str, attrs: str) -> None:
+        self._break(1)
+        if not self._lists:
+            self._marker = "- "
+            return
+        current = self._lists[-1]
+        current[1] += 1
+        indent = "  " * (len(self._lists) - 1)
+        self._marker = indent + (f"{current[1]}. " if current[0] else "- ")
+
+    def _start_blockquote(self, tag: str, attrs: str) -> None:
+        self._break(2)
+        self._quote_depth += 1
+
+    def _start_hr(self, tag: str, attrs: str) -> None:
+        self._break(2)
+        self._write("---")
+        self._break(2)
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+
+    def _start_table(self, tag: str, attrs: str) -> None:
+        if self._tables and self._tables[-1].cell is None:
+            self._start_cell(tag, attrs)  # table directly inside a row: give it a cell
+        self._tables.append(_Table(self._out))
+
+    def _start_tr(self, tag: str, attrs: str) -> None:
+        if self._tables:
+            self._end_cell(tag)
+            self._tables[-1].rows.append([])
+
+    def _start_cell(self, tag: str, attrs: str) -> None:
+        if not self._tables:
+            return
+        self._end_cell(tag)
+        table = self._tables[-1]
+        if not table.rows:
+            table.rows.append([])
+        table.cell = self._out = []
+        self._breaks = 0
+        self._space = False
+
+    def _end_cell(self, tag: str) -> None:
+        if not self._tables:
+            return
+        table = self._tables[-1]
+        if table.cell is not None:
+            table.rows[-1].append("".join(table.cell).strip())
+            table.cell = None
+            self._out = table.outer
+            self._breaks = 0
+            self._space = False
+
+    def _end_table(self, tag: str) -> None:
+        if not self._tables:
+            return
+        self._end_cell(tag)
+        table = self._tables.pop()
+        if self._tables:
+            self._tables[-1].nested = True
+        rows = [r for r in table.rows if any(r)]
+        self._break(2)
+        if not table.nested and any(sum(1 for c in r if c) >= 2 for r in rows):
+            # Data table: one line per row.
+            for row in rows:
+                self._write(" | ".join(" ".join(c.split()) for c in row))
+                self._break(1)
+        else:
+            # Layout table: cells become paragraphs.
+            for row in rows:
+                for cell in row:
+                    if not cell:
+                        continue
+                    for i, line in enumerate(cell.split("\n")):
+                        if not line.strip():
+                            self._break(2)
+                            continue
+                        if i:
+                            self._break(1)
+                        self._write(line.rstrip())
+                    self._break(2)
+        self._break(2)
+
+    # ------------------------------------------------------------------
+    # End tags
+    # ------------------------------------------------------------------
+
+    def _end_block(self, tag: str) -> None:
+        if tag == "pre" and self._pre:
+            self._pre -= 1
+        self._break(2 if tag in _PARAGRAPH_TAGS else 1)
+
+    def _end_list(self, tag: str) -> None:
+        if self._lists:
+            self._lists.pop()
+        self._break(1)
+
+    def _end_li(self, tag: str) -> None:
+        self._break(1)
+
+    def _end_blockquote(self, tag: str) -> None:
+        self._quote_depth = max(0, self._quote_depth - 1)
+        self._break(2)
+
+    # ------------------------------------------------------------------
+    # Feeding
+    # ------------------------------------------------------------------
+
+    def _consume(self, data: str) -> None:
+        starts, ends = _START_HANDLERS, _END_HANDLERS
+        for match in _TOKEN.finditer(data):
+            close, name, attrs, text = match.groups()
+            if text:
+                if self._skip is None:
+                    self._text(text)
+                    if self.trimmed:
+                        return
+                continue
+            if not name:
+                continue  # comment, doctype, processing instruction
+            tag = name.lower()
+            if self._skip is not None:
+                if close and tag == self._skip:
+                    self._skip = None
+                continue
+            if close:
+                end = ends.get(tag)
+                if end is not None:
+                    end(self, tag)
+                continue
+            start = starts.get(tag)
+            if start is None:
+                continue
+            if self.trim_quoted and attrs and tag in _QUOTE_TAGS and _is_quote_start(tag, attrs):
+                self.trimmed = True
+                return
+            start(self, tag, attrs.strip())
+
+    def feed(self, data: str) -> None:
+        if self.trimmed or not data:
+            return
+        buf = self._carry + data
+        end = len(buf)
+        # Hold back an unterminated tag, comment or entity for the next chunk.
+        lt = buf.rfind("<")
+        if lt != -1 and buf.find(">", lt) == -1:
+            end = lt
+        comment = buf.rfind("<!--")
+        if comment != -1 and buf.find("-->", comment) == -1:
+            end = min(end, comment)
+        amp = buf.rfind("&", 0, end)
+        if amp != -1 and end - amp < 12 and ";" not in buf[amp:end]:
+            end = amp
+        if len(buf) - end > 1024 * 1024:
+            end = len(buf)  # not a real tag; treat as text
+        self._carry = buf[end:]
+        self._consume(buf[:end])
+
+    def close(self) -> str:
+        """Flush remaining input and return the text."""
+
+        if self._carry and not self.trimmed:
+            carry, self._carry = self._carry, ""
+            self._consume(carry)
+        while self._tables:
+            self._end_table("table")
+
+        lines: List[str] = []
+        blank = False
+        for line in "".join(self._doc).split("\n"):
+            line = line.rstrip()
+            if not line or line.strip() == ">":
+                blank = bool(lines)
+                continue
+            if blank:
+                lines.append("")
+                blank = False
+            lines.append(line)
+        if self.trimmed and lines and _ATTRIBUTION.match(lines[-1]):
+            lines.pop()
+            if lines and not lines[-1]:
+                lines.pop()
+        return "\n".join(lines)
+
+
+_START_HANDLERS: Dict[str, Callable[[HtmlTextConverter, str, str], None]] = {
+    **{t: HtmlTextConverter._start_block for t in _BLOCK_TAGS},
+    **{t: HtmlTextConverter._start_skip for t in _SKIP_TAGS},
+    "br": HtmlTextConverter._start_br,
+    "ul": HtmlTextConverter._start_list,
+    "ol": HtmlTextConverter._start_list,
+    "li": HtmlTextConverter._start_li,
+    "blockquote": HtmlTextConverter._start_blockquote,
+    "hr": HtmlTextConverter._start_hr,
+    "table": HtmlTextConverter._start_table,
+    "tr": HtmlTextConverter._start_tr,
+    "td": HtmlTextConverter._start_cell,
+    "th": HtmlTextConverter._start_cell,
+}
+_END_HANDLERS: Dict[str, Callable[[HtmlTextConverter, str], None]] = {
+    **{t: HtmlTextConverter._end_block for t in _BLOCK_TAGS},
+    "ul": HtmlTextConverter._end_list,
+    "ol": HtmlTextConverter._end_list,
+    "li": HtmlTextConverter._end_li,
+    "blockquote": HtmlTextConverter._end_blockquote,
+    "table": HtmlTextConverter._end_table,
+    "tr": HtmlTextConverter._end_cell,
+    "td": HtmlTextConverter._end_cell,
+    "th": HtmlTextConverter._end_cell,
+}
+
+
+def html_to_text(html_str: str, *, trim_quoted: bool = False) -> str:
+    """Convert an HTML mail body to plain text (see module docstring).
+
+    With ``trim_quoted`` only the new part of a reply is returned: parsing
+    stops at the quoted history instead of converting the whole thread.
+    """
+    if not html_str:
+        return ""
+
+    converter = HtmlTextConverter(trim_quoted=trim_quoted)
+    for start in range(0, len(html_str), _FEED_CHARS):
+        converter.feed(html_str[start : start + _FEED_CHARS])
+        if converter.trimmed:
+            break
+    return converter.close()
@@ -6,7 +6,13 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from agent_tools.graph.client import GraphAPIClient
+from agent_tools.graph.client import (
+    MAX_BATCH_BYTES,
+    MAX_BATCH_REQUESTS,
+    GraphAPIClient,
+    GraphBatchRequest,
+    chain_requests,
+)
 
 
 @dataclass(frozen=True)
@@ -42,7 +48,7 @@ def delete_attachment(client: GraphAPIClient, draft_id: str, attachment_id: str)
     client.request("DELETE", f"me/messages/{draft_id}/attachments/{attachment_id}")
 
 
-def add_inline_attachment(client: GraphAPIClient, draft_id: str, *, cid: str, path: Path) -> None:
+def _inline_attachment_payload(cid: str, path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(str(path))
 
@@ -50,7 +56,7 @@ def add_inline_attachment(client: GraphAPIClient, draft_id: str, *, cid: str, pa
     if not content_type:
         content_type = "application/octet-stream"
 
-    payload: Dict[str, Any] = {
+    return {
         "@odata.type": "#microsoft.graph.fileAttachment",
         "name": path.name,
         "contentType": content_type,
@@ -59,7 +65,24 @@ def add_inline_attachment(client: GraphAPIClient, draft_id: str, *, cid: str, pa
         "contentBytes": base64.b64encode(path.read_bytes()).decode("ascii"),
     }
 
-    client.post(f"me/messages/{draft_id}/attachments", json=payload)
+
+def _batch_chunks(cid_to_path: Sequence[Tuple[str, Path]]) -> List[List[Tuple[str, Path]]]:
+    # Split by the base64 size of the files, so only one $batch worth of
+    # images is encoded at a time. An image too large to share goes alone.
+    chunks: List[List[Tuple[str, Path]]] = []
+    size = 0
+    for cid, path in cid_to_path:
+        encoded = 4 * ((path.stat().st_size + 2) // 3) + 512
+        if not chunks or len(chunks[-1]) >= MAX_BATCH_REQUESTS or size + encoded > MAX_BATCH_BYTES:
+            chunks.append([])
+            size = 0
+        chunks[-1].append((cid, path))
+        size += encoded
+    return chunks
+
+
+def add_inline_attachment(client: GraphAPIClient, draft_id: str, *, cid: str, path: Path) -> None:
+    client.post(f"me/messages/{draft_id}/attachments", json=_inline_attachment_payload(cid, path))
 
 
 def replace_inline_attachments(
@@ -76,11 +99,19 @@ def replace_inline_attachments(
     - Adds new inline attachments with the same CIDs.
 
     Returns a summary dict suitable for writing to an exports JSON artifact.
+
+    Deletes and adds each go out as JSON ``$batch`` calls, chained so at most
+    four run against the mailbox at once; all deletes finish before any add
+    is sent. Images are base64-encoded one batch (about 4 MB) at a time.
+    Raises ``RuntimeError`` on the first failed item.
     """
 
     wanted_cids = {cid for cid, _ in cid_to_path}
+    for _, path in cid_to_path:
+        if not path.exists():
+            raise FileNotFoundError(str(path))
 
-    deleted: List[Dict[str, str]] = []
+    to_delete: List[AttachmentInfo] = []
     for a in list_attachments(client, draft_id):
         if not a.id or not a.is_inline:
             continue
@@ -90,13 +121,19 @@ def replace_inline_attachments(
             should_delete = any((a.name or "").startswith(pref) for pref in delete_if_name_prefixes)
 
         if should_delete:
-            delete_attachment(client, draft_id, a.id)
-            deleted.append({"id": a.id, "name": a.name, "contentId": a.content_id})
-
-    added: List[Dict[str, str]] = []
-    for cid, path in cid_to_path:
-        add_inline_attachment(client, draft_id, cid=cid, path=path)
-        added.append({"contentId": cid, "name": path.name})
+            to_delete.append(a)
+
+    client.batch(
+        chain_requests([GraphBatchRequest("DELETE", f"me/messages/{draft_id}/attachments/{a.id}") for a in to_delete]),
+        raise_on_error=True,
+    )
+    deleted = [{"id": a.id, "name": a.name, "contentId": a.content_id} for a in to_delete]
+
+    url = f"me/messages/{draft_id}/attachments"
+    for chunk in _batch_chunks(cid_to_path):
+        adds = [GraphBatchRequest("POST", url, json=_inline_attachment_payload(cid, path)) for cid, path in chunk]
+        client.batch(chain_requests(adds), raise_on_error=True)
+    added = [{"contentId": cid, "name": path.name} for cid, path in cid_to_path]
 
     return {"deleted": deleted, "added": added}
 
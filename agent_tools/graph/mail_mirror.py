@@ -0,0 +1,408 @@
+"""Local SQLite mirror of the mailbox for instant repeated searches.
+
+``search_messages`` and friends go to Graph ``$search`` on every call: slow,
+eventually consistent and capped by ``max_messages``. ``MailMirror`` keeps a
+copy of selected folders in SQLite, synced incrementally with Graph delta
+queries (one delta link per folder), and answers searches from an FTS5 index
+over subject, sender, recipients and body text in milliseconds.
+
+Typical usage::
+
+    python -m agent_tools.graph.mail_mirror sync --folder Inbox --folder SentItems
+    python -m agent_tools.graph.mail_mirror search '"from:sender@example.com"'
+
+    from agent_tools.graph.mail_mirror import MailMirror
+    from agent_tools.graph.mail_search import search_messages
+
+    mirror = MailMirror()
+    mirror.sync(client)  # incremental after the first run
+    msgs = search_messages(client, query='"Q4 Review"', mirror=mirror)
+
+Queries use the same style as ``$search``: quoted phrases, ``AND`` / ``OR`` /
+``NOT`` and ``from:`` / ``to:`` / ``cc:`` / ``subject:`` / ``body:`` prefixes.
+Only synced folders are searched; run ``sync`` before relying on the mirror.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from agent_tools.graph.client import GraphAPIClient
+from agent_tools.graph.drafts import _emails_from_recipients
+from agent_tools.graph.html_text import html_to_text
+
+DEFAULT_DB_PATH = Path("tmp/mail_mirror.sqlite3")
+DEFAULT_FOLDERS = ("Inbox", "SentItems")
+
+MIRROR_SELECT = (
+    "id,subject,from,sender,toRecipients,ccRecipients,"
+    "sentDateTime,receivedDateTime,conversationId,parentFolderId,"
+    "hasAttachments,bodyPreview,body,internetMessageId"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    conversation_id TEXT,
+    received TEXT,
+    has_attachments INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (conversation_id);
+CREATE INDEX IF NOT EXISTS messages_folder_received ON messages (folder, received);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    subject, sender, recipients, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS folders (
+    folder TEXT PRIMARY KEY,
+    delta_link TEXT,
+    next_link TEXT,
+    synced_at TEXT
+);
+"""
+
+# $search property prefixes -> FTS5 columns.
+_PROPERTY_COLUMNS = {
+    "from": "sender",
+    "sender": "sender",
+    "to": "recipients",
+    "cc": "recipients",
+    "bcc": "recipients",
+    "recipients": "recipients",
+    "participants": "{sender recipients}",
+    "subject": "subject",
+    "body": "body",
+}
+_OPERATORS = {"AND", "OR", "NOT"}
+_QUERY_TOKEN = re.compile(r'(?:(\w+):)?"([^"]*)"|(\S+)')
+
+
+def fts_query(query: str) -> str:
+    """Translate a ``$search``-style query into an FTS5 ``MATCH`` expression.
+
+    Every term becomes a quoted FTS5 phrase, so punctuation (hyphens, ``@``,
+    ``&``) never breaks the query syntax the way it does in KQL.
+    """
+
+    parts: List[str] = []
+    for m in _QUERY_TOKEN.finditer(query or ""):
+        prop, quoted, bare = m.group(1), m.group(2), m.group(3)
+        if bare is not None and bare.upper() in _OPERATORS:
+            if parts and parts[-1] not in _OPERATORS:
+                parts.append(bare.upper())
+            continue
+        text = quoted if quoted is not None else bare
+        if prop is None:
+            inner = re.match(r"(\w+):(.+)", text)
+            if inner and inner.group(1).lower() in _PROPERTY_COLUMNS:
+                prop, text = inner.group(1), inner.group(2)
+        text = text.strip()
+        if not text:
+            continue
+        phrase = '"' + text.replace('"', '""') + '"'
+        column = _PROPERTY_COLUMNS.get(prop.lower()) if prop else None
+        if prop and column is None:
+            phrase = '"' + f"{prop}:{text}".replace('"', '""') + '"'
+        parts.append(f"{column} : {phrase}" if column else phrase)
+
+    while parts and parts[-1] in _OPERATORS:
+        parts.pop()
+    if not parts:
+        raise ValueError(f"Empty mail mirror query: {query!r}")
+    return " ".join(parts)
+
+
+def _participants(recipients: Any) -> str:
+    pairs = dict.fromkeys(_emails_from_recipients(recipients))
+    return " ".join(f"{name} {addr}".strip() for name, addr in pairs)
+
+
+@dataclass(frozen=True)
+class FolderSyncResult:
+    folder: str
+    updated: int  # messages added or changed
+    removed: int
+    full: bool  # True when this was an initial (or restarted) full sync
+    requests: int
+    elapsed_s: float
+
+
+class MailMirror:
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        # WAL lets searches run while a sync is writing.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _upsert(self, folder: str, msg: Dict[str, Any]) -> None:
+        body = msg.get("body") if isinstance(msg.get("body"), dict) else {}
+        content = str(body.get("content") or "")
+        body_text = html_to_text(content) if str(body.get("contentType") or "html").lower() == "html" else content
+        sender = _participants([msg.get("from"), msg.get("sender")])
+        recipients = " ".join(
+            _participants(msg.get(k)) for k in ("toRecipients", "ccRecipients", "bccRecipients")
+        )
+        row = (
+            folder,
+            msg.get("conversationId"),
+            str(msg.get("receivedDateTime") or msg.get("sentDateTime") or ""),
+            1 if msg.get("hasAttachments") else 0,
+            json.dumps(msg, ensure_ascii=False),
+        )
+
+        existing = self._conn.execute("SELECT rowid FROM messages WHERE id = ?", (msg["id"],)).fetchone()
+        if existing:
+            rowid = existing[0]
+            self._conn.execute(
+                "UPDATE messages SET folder = ?, conversation_id = ?, received = ?, has_attachments = ?, data = ?"
+                " WHERE rowid = ?",
+                (*row, rowid),
+            )
+            self._conn.execute("DELETE FROM messages_fts WHERE rowid = ?", (rowid,))
+        else:
+            cur = self._conn.execute(
+                "INSERT INTO messages (folder, conversation_id, received, has_attachments, data, id)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (*row, msg["id"]),
+            )
+            rowid = cur.lastrowid
+        self._conn.execute(
+            "INSERT INTO messages_fts (rowid, subject, sender, recipients, body) VALUES (?, ?, ?, ?, ?)",
+            (rowid, str(msg.get("subject") or ""), sender, recipients, body_text),
+        )
+
+    def _remove(self, message_id: str) -> bool:
+        existing = self._conn.execute("SELECT rowid FROM messages WHERE id = ?", (message_id,)).fetchone()
+        if not existing:
+            return False
+        self._conn.execute("DELETE FROM messages_fts WHERE rowid = ?", (existing[0],))
+        self._conn.execute("DELETE FROM messages WHERE rowid = ?", (existing[0],))
+        return True
+
+    def _reset_folder(self, folder: str) -> None:
+        with self._conn:
+            ids = [r[0] for r in self._conn.execute("SELECT id FROM messages WHERE folder = ?", (folder,))]
+            for message_id in ids:
+                self._remove(message_id)
+            self._conn.execute("DELETE FROM folders WHERE folder = ?", (folder,))
+
+    def sync_folder(
+        self,
+        client: GraphAPIClient,
+        folder: str,
+        *,
+        page_size: int = 50,
+        timeout_s: int = 90,
+    ) -> FolderSyncResult:
+        """Apply Graph delta changes for ``folder`` (well-known name or folder id).
+
+        The first run pages through the whole folder; later runs fetch only
+        changes since the stored delta link. Progress is committed per page,
+        so an interrupted sync resumes from its last ``nextLink``. An expired
+        delta token (410 Gone) restarts the folder with a full sync.
+        """
+
+        started = time.monotonic()
+        state = self._conn.execute("SELECT delta_link, next_link FROM folders WHERE folder = ?", (folder,)).fetchone()
+        delta_link, next_link = state if state else (None, None)
+        full = not delta_link
+        url: Optional[str] = next_link or delta_link or f"me/mailFolders/{folder}/messages/delta"
+        params: Optional[Dict[str, Any]] = None if (next_link or delta_link) else {"$select": MIRROR_SELECT}
+        headers = {"Prefer": f"odata.maxpagesize={int(page_size)}"}
+        updated = removed = requests = 0
+
+        while url:
+            try:
+                resp = client.get(url, params=params, headers=headers, timeout=timeout_s)
+            except RuntimeError as e:
+                if "failed: 410" not in str(e) or not (next_link or delta_link):
+                    raise
+                # Delta token expired: drop the folder and start over.
+                self._reset_folder(folder)
+                next_link = delta_link = None
+                full = True
+                url, params = f"me/mailFolders/{folder}/messages/delta", {"$select": MIRROR_SELECT}
+                continue
+            requests += 1
+
+            new_next = resp.get("@odata.nextLink")
+            new_delta = resp.get("@odata.deltaLink")
+            with self._conn:
+                for item in resp.get("value") or []:
+                    if not isinstance(item, dict) or not item.get("id"):
+                        continue
+                    if "@removed" in item:
+                        removed += 1 if self._remove(str(item["id"])) else 0
+                    else:
+                        self._upsert(folder, item)
+                        updated += 1
+                self._conn.execute(
+                    "INSERT INTO folders (folder, delta_link, next_link, synced_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(folder) DO UPDATE SET delta_link = COALESCE(excluded.delta_link, delta_link),"
+                    " next_link = excluded.next_link, synced_at = excluded.synced_at",
+                    (
+                        folder,
+                        new_delta,
+                        new_next,
+                        datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    ),
+                )
+            url, params = (str(new_next) if new_next else None), None
+
+        return FolderSyncResult(
+            folder=folder,
+            updated=updated,
+            removed=removed,
+            full=full,
+            requests=requests,
+            elapsed_s=time.monotonic() - started,
+        )
+
+    def sync(
+        self,
+        client: GraphAPIClient,
+        *,
+        folders: Sequence[str] = DEFAULT_FOLDERS,
+        page_size: int = 50,
+        timeout_s: int = 90,
+    ) -> List[FolderSyncResult]:
+        return [self.sync_folder(client, f, page_size=page_size, timeout_s=timeout_s) for f in folders]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def synced_folders(self) -> List[Dict[str, Any]]:
+        """Folders with a completed sync: name, message count and last sync time."""
+
+        rows = self._conn.execute(
+            "SELECT f.folder, f.synced_at, (SELECT COUNT(*) FROM messages m WHERE m.folder = f.folder)"
+            " FROM folders f WHERE f.delta_link IS NOT NULL ORDER BY f.folder"
+        ).fetchall()
+        return [{"folder": r[0], "synced_at": r[1], "messages": r[2]} for r in rows]
+
+    def _require_synced(self, folder: Optional[str]) -> None:
+        names = {f["folder"].lower() for f in self.synced_folders()}
+        if (folder and folder.lower() not in names) or not names:
+            target = folder or DEFAULT_FOLDERS[0]
+            raise RuntimeError(
+                f"Mail mirror {self.db_path} has not synced {folder or 'any folder'}; run "
+                f"`python -m agent_tools.graph.mail_mirror sync --folder {target}` first"
+            )
+
+    def search(
+        self,
+        query: str,
+        *,
+        folder: Optional[str] = None,
+        limit: int = 500,
+        has_attachments: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """Messages matching ``query``, newest first, as Graph message dicts."""
+
+        self._require_synced(folder)
+        sql = (
+            "SELECT m.data FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid"
+            " WHERE messages_fts MATCH ?"
+        )
+        args: List[Any] = [fts_query(query)]
+        if folder:
+            sql += " AND m.folder = ? COLLATE NOCASE"
+            args.append(folder)
+        if has_attachments is not None:
+            sql += " AND m.has_attachments = ?"
+            args.append(1 if has_attachments else 0)
+        sql += " ORDER BY m.received DESC LIMIT ?"
+        args.append(int(limit))
+        return [json.loads(r[0]) for r in self._conn.execute(sql, args)]
+
+    def conversation(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Every mirrored message in a conversation, oldest first."""
+
+        rows = self._conn.execute(
+            "SELECT data FROM messages WHERE conversation_id = ? ORDER BY received", (conversation_id,)
+        )
+        return [json.loads(r[0]) for r in rows]
+
+
+def _print_results(results: Iterable[FolderSyncResult]) -> None:
+    for r in results:
+        kind = "full" if r.full else "incremental"
+        print(
+            f"{r.folder}: {kind} sync, {r.updated} updated, {r.removed} removed "
+            f"({r.requests} requests, {r.elapsed_s:.1f}s)"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local SQLite/FTS5 mirror of mail folders, synced via Graph delta")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help=f"Mirror database (default: {DEFAULT_DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sync = sub.add_parser("sync", help="Fetch changes since the last sync (full sync on first run)")
+    p_sync.add_argument(
+        "--folder",
+        action="append",
+        help=f"Folder to mirror (well-known name or id, repeatable). Default: {', '.join(DEFAULT_FOLDERS)}",
+    )
+    p_sync.add_argument("--page-size", type=int, default=50, help="Messages per delta page (default: 50)")
+
+    p_search = sub.add_parser("search", help="Search the mirror ($search-style query)")
+    p_search.add_argument("query")
+    p_search.add_argument("--folder", help="Only this folder")
+    p_search.add_argument("--limit", type=int, default=20, help="Max results (default: 20)")
+
+    sub.add_parser("status", help="Show synced folders")
+
+    args = parser.parse_args(argv)
+    mirror = MailMirror(Path(args.db))
+
+    if args.command == "sync":
+        from agent_tools.graph.auth import GraphAuthenticator
+        from agent_tools.graph.client import GraphClientConfig
+        from agent_tools.graph.env import load_graph_env
+
+        repo_root = Path(__file__).resolve().parents[2]
+        env = load_graph_env(repo_root)
+        client = GraphAPIClient(
+            authenticator=GraphAuthenticator(repo_root=repo_root, env=env),
+            config=GraphClientConfig(base_url=env.base_url, scopes=env.scopes, planner_timezone=env.planner_timezone),
+        )
+        _print_results(mirror.sync(client, folders=args.folder or DEFAULT_FOLDERS, page_size=args.page_size))
+        print(client.stats.describe())
+        return 0
+
+    if args.command == "search":
+        started = time.perf_counter()
+        msgs = mirror.search(args.query, folder=args.folder, limit=args.limit)
+        for m in msgs:
+            ea = (m.get("from") or {}).get("emailAddress") or {}
+            print(f"{m.get('receivedDateTime', '')}  {ea.get('address', '')}  {m.get('subject', '')}")
+        print(f"{len(msgs)} message(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return 0
+
+    for f in mirror.synced_folders():
+        print(f"{f['folder']}: {f['messages']} messages, synced {f['synced_at']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -12,23 +12,30 @@ Typical usage (agent context)::
 
     # Export an entire thread matching a subject to Markdown
     export_thread_markdown(client, subject="Q4 Review", out_path=Path("tmp/thread.md"))
+
+    # Answer repeated searches from a local delta-synced mirror instead of Graph
+    from agent_tools.graph.mail_mirror import MailMirror
+    msgs = search_messages(client, query='"from:sender@example.com"', mirror=MailMirror())
 """
 
 from __future__ import annotations
 
 import re
 from datetime import datetime
-from html import unescape
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
 try:
     from zoneinfo import ZoneInfo
 except Exception:  # pragma: no cover
     ZoneInfo = None  # type: ignore
 
-from agent_tools.graph.client import GraphAPIClient
-from agent_tools.graph.drafts import _emails_from_recipients, iter_graph_paged
+from agent_tools.graph.client import GraphAPIClient, GraphBatchRequest
+from agent_tools.graph.drafts import DEFAULT_PREFETCH_PAGES, _emails_from_recipients, iter_graph_paged
+from agent_tools.graph.html_text import html_to_text
+
+if TYPE_CHECKING:
+    from agent_tools.graph.mail_mirror import MailMirror
 
 
 # ---------------------------------------------------------------------------
@@ -36,26 +43,6 @@ from agent_tools.graph.drafts import _emails_from_recipients, iter_graph_paged
 # ---------------------------------------------------------------------------
 
 
-def html_to_text(html_str: str) -> str:
-    """Convert HTML to plain text (best-effort).
-
-    Handles ``<br>``, ``</p>``, ``</div>`` → newlines, strips remaining tags,
-    and un-escapes HTML entities.
-    """
-    if not html_str:
-        return ""
-
-    text = html_str
-    text = re.sub(r"<\s*br\s*/?>", "\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"</\s*p\s*>", "\n\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"</\s*div\s*>", "\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"<[^>]+>", "", text)
-    text = unescape(text)
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
-
-
 # ---------------------------------------------------------------------------
 # Message search
 # ---------------------------------------------------------------------------
@@ -77,6 +64,7 @@ def search_messages(
     select: Optional[str] = None,
     max_messages: int = 500,
     timeout_s: int = 90,
+    mirror: Optional[MailMirror] = None,
 ) -> List[Dict[str, Any]]:
     """Search messages using the Graph ``$search`` operator.
 
@@ -96,10 +84,16 @@ def search_messages(
         select: OData ``$select`` fields.  Uses a sensible default if None.
         max_messages: Safety cap on total messages returned.
         timeout_s: HTTP timeout per request.
+        mirror: Optional synced :class:`~agent_tools.graph.mail_mirror.MailMirror`.
+            If given, the query is answered from its local FTS5 index (no Graph
+            calls; ``select``/``top``/``auto_escape`` do not apply).
 
     Returns:
         List of message dicts sorted by receivedDateTime descending.
     """
+    if mirror is not None:
+        return mirror.search(query, folder=folder, limit=max_messages)
+
     if auto_escape and not query.startswith('"'):
         query = f'"{query}"'
 
@@ -136,6 +130,7 @@ def search_sent_messages(
     top: int = 50,
     max_messages: int = 500,
     timeout_s: int = 90,
+    mirror: Optional[MailMirror] = None,
 ) -> List[Dict[str, Any]]:
     """Convenience: search the SentItems folder.
 
@@ -148,6 +143,7 @@ def search_sent_messages(
         top=top,
         max_messages=max_messages,
         timeout_s=timeout_s,
+        mirror=mirror,
     )
 
 
@@ -261,6 +257,7 @@ def find_latest_from_sender(
     with_attachments: bool = False,
     top: int = 50,
     timeout_s: int = 90,
+    mirror: Optional[MailMirror] = None,
 ) -> Optional[Dict[str, Any]]:
     """Find the most recent message from a sender (or matching a sender query).
 
@@ -271,6 +268,7 @@ def find_latest_from_sender(
         with_attachments: If True, only consider messages with attachments.
         top: Number of candidates to fetch.
         timeout_s: HTTP timeout per request.
+        mirror: Optional synced mail mirror to search instead of Graph.
 
     Returns:
         The most-recent matching message dict, or None.
@@ -280,6 +278,7 @@ def find_latest_from_sender(
         query=sender_query,
         top=top,
         timeout_s=timeout_s,
+        mirror=mirror,
     )
 
     for msg in msgs:  # already sorted newest-first
@@ -340,6 +339,100 @@ def _format_recipients(recipients: Any) -> str:
     return ", ".join(parts)
 
 
+# Header fields for thread listing; bodies are fetched separately, only for
+# the messages that get rendered.
+_THREAD_SELECT = "id,subject,from,toRecipients,ccRecipients,sentDateTime,receivedDateTime,conversationId"
+_SEED_CANDIDATES = 25
+
+
+def _message_time(msg: Dict[str, Any]) -> str:
+    return str(msg.get("sentDateTime") or msg.get("receivedDateTime") or "")
+
+
+def find_conversation_id(
+    client: GraphAPIClient,
+    subject: str,
+    *,
+    timeout_s: int = 90,
+    mirror: Optional[MailMirror] = None,
+) -> Optional[str]:
+    """``conversationId`` of the newest message whose subject contains *subject*.
+
+    Only one small page of search hits (ids and subjects, no bodies) is
+    fetched to find the seed message.
+    """
+    candidates = search_messages(
+        client,
+        query=f'"{subject}"',
+        top=_SEED_CANDIDATES,
+        select="id,subject,conversationId,sentDateTime,receivedDateTime",
+        max_messages=_SEED_CANDIDATES,
+        timeout_s=timeout_s,
+        mirror=mirror,
+    )
+    needle = subject.strip().lower()
+    for msg in candidates:  # newest first
+        if needle in str(msg.get("subject") or "").strip().lower() and msg.get("conversationId"):
+            return str(msg["conversationId"])
+    return None
+
+
+def list_conversation_messages(
+    client: GraphAPIClient,
+    conversation_id: str,
+    *,
+    max_messages: int = 200,
+    timeout_s: int = 90,
+    mirror: Optional[MailMirror] = None,
+) -> List[Dict[str, Any]]:
+    """Header fields of every message in a conversation, oldest first.
+
+    Keeps the newest *max_messages*. Messages come from the whole mailbox
+    (Inbox, Sent Items, archives), not a subject search, so unrelated mail
+    with a similar subject is never included.
+    """
+    if mirror is not None:
+        msgs = mirror.conversation(conversation_id)
+    else:
+        escaped = conversation_id.replace("'", "''")
+        params: Dict[str, Any] = {
+            "$filter": f"conversationId eq '{escaped}'",
+            "$select": _THREAD_SELECT,
+            "$top": 50,
+        }
+        msgs = list(
+            iter_graph_paged(
+                client, "me/messages", params=params, timeout_s=timeout_s, prefetch=DEFAULT_PREFETCH_PAGES
+            )
+        )
+
+    # Graph rejects $orderby combined with this $filter; sort locally.
+    msgs.sort(key=_message_time)
+    return msgs[-max_messages:] if max_messages > 0 else msgs
+
+
+def _fetch_bodies(client: GraphAPIClient, msgs: List[Dict[str, Any]], *, timeout_s: int) -> None:
+    """Fill in ``body`` for messages that lack it (20 per ``$batch`` call)."""
+    missing = [m for m in msgs if not isinstance(m.get("body"), dict) and m.get("id")]
+    if not missing:
+        return
+    results = client.batch(
+        [GraphBatchRequest("GET", f"me/messages/{m['id']}", params={"$select": "body"}) for m in missing],
+        timeout=timeout_s,
+    )
+    for msg, result in zip(missing, results):
+        if result.ok:
+            msg["body"] = result.body.get("body") or {}
+
+
+def _body_text(body: Dict[str, Any], *, trim_quoted: bool = False) -> str:
+    """Return a Graph ``body`` as plain text; ``text`` bodies pass through unchanged."""
+    content = body.get("content") or ""
+    if str(body.get("contentType") or "html").lower() != "html":
+        return content
+    return html_to_text(content, trim_quoted=trim_quoted)
+
+
 def export_thread_markdown(
     client: GraphAPIClient,
     subject: str,
@@ -348,21 +441,31 @@ def export_thread_markdown(
     max_messages: int = 200,
     tz_name: Optional[str] = None,
     timeout_s: int = 90,
+    mirror: Optional[MailMirror] = None,
+    conversation_id: Optional[str] = None,
+    trim_quoted: bool = False,
 ) -> Path:
-    """Search for messages matching *subject* and export the thread as Markdown.
+    """Export the conversation whose subject matches *subject* as Markdown.
 
-    Messages are sorted chronologically (oldest first) and written to
-    *out_path*.  The thread includes From/To/Cc headers, date, and body
-    text (HTML → plain text).
+    One seed message (the newest whose subject contains *subject*) resolves
+    the ``conversationId``; the thread is then fetched by that id with a
+    trimmed ``$select``, and bodies are downloaded only for the messages
+    written out. Messages are sorted chronologically (oldest first) and the
+    thread includes From/To/Cc headers, date, and body text (HTML → plain
+    text).
 
     Args:
         client: Authenticated GraphAPIClient.
-        subject: Subject substring to search for (wrapped in ``$search``).
+        subject: Subject substring used to find the seed message.
         out_path: Destination Markdown file.  Parent directories are created.
-        max_messages: Maximum messages to include.
+        max_messages: Maximum messages to include (the newest are kept).
         tz_name: Optional timezone name for date formatting (e.g.
             ``"America/New_York"``).
         timeout_s: HTTP timeout per request.
+        mirror: Optional synced mail mirror to read instead of Graph.
+        conversation_id: Skip the seed search and export this conversation.
+        trim_quoted: Drop the quoted reply history from each body; every
+            earlier message is already in the export.
 
     Returns:
         The resolved *out_path*.
@@ -370,27 +473,15 @@ def export_thread_markdown(
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Search with quoted subject.
-    query = f'"{subject}"'
-    msgs = search_messages(
-        client,
-        query=query,
-        max_messages=max_messages * 2,  # over-fetch for filtering
-        timeout_s=timeout_s,
+    conversation_id = conversation_id or find_conversation_id(
+        client, subject, timeout_s=timeout_s, mirror=mirror
     )
-
-    # Client-side filter: subject must contain the search term.
-    needle = subject.strip().lower()
     filtered: List[Dict[str, Any]] = []
-    for msg in msgs:
-        msg_subj = str(msg.get("subject") or "").strip().lower()
-        if needle in msg_subj:
-            filtered.append(msg)
-            if len(filtered) >= max_messages:
-                break
-
-    # Sort chronologically (oldest first) for reading order.
-    filtered.sort(key=lambda m: str(m.get("sentDateTime") or m.get("receivedDateTime") or ""))
+    if conversation_id:
+        filtered = list_conversation_messages(
+            client, conversation_id, max_messages=max_messages, timeout_s=timeout_s, mirror=mirror
+        )
+        _fetch_bodies(client, filtered, timeout_s=timeout_s)
 
     lines: List[str] = [
         f"# Thread: {subject}",
@@ -409,8 +500,7 @@ def export_thread_markdown(
         cc_str = _format_recipients(msg.get("ccRecipients"))
         subj = str(msg.get("subject") or "")
 
-        body_html = ((msg.get("body") or {}).get("content") or "")
-        body_text = html_to_text(body_html)
+        body_text = _body_text(msg.get("body") or {}, trim_quoted=trim_quoted)
 
         lines.append(f"---")
         lines.append(f"## Message {i}")
@@ -515,13 +605,13 @@ def get_latest_human_reply(
     return None
 
 def get_clean_body(msg: Dict[str, Any]) -> str:
-    """Helper to extract and clean the HTML body content from a message dict."""
+    """Helper to extract the body of a message dict as plain text."""
     body_payload = msg.get("body", {})
     if isinstance(body_payload, dict) and body_payload.get("content"):
-        return html_to_text(body_payload["content"])
+        return _body_text(body_payload)
         
     unique_payload = msg.get("uniqueBody", {})
     if isinstance(unique_payload, dict) and unique_payload.get("content"):
-        return html_to_text(unique_payload["content"])
+        return _body_text(unique_payload)
         
     return msg.get("bodyPreview", "")
@@ -0,0 +1,139 @@
+"""Throttling support for Microsoft Graph calls.
+
+Graph throttles per mailbox (roughly 4 concurrent requests per app per
+mailbox, plus rate limits) and answers with 429 or 503/504 and a
+``Retry-After`` header. ``GraphAPIClient`` retries those responses using:
+
+- ``retry_delay_s``: honour ``Retry-After`` (plus a little jitter so parallel
+  workers do not return in lockstep), else full-jitter exponential backoff;
+- ``MailboxGovernor``: one per mailbox per process, wrapping the AIMD
+  ``AdaptiveLimiter`` from ``agent_tools.llm.concurrency`` (starts at the
+  Graph per-mailbox limit, halves on throttling, grows back while healthy).
+  After a throttle it also holds *every* request for that mailbox until the
+  ``Retry-After`` window has passed, so bulk exports slow down instead of
+  piling more 429s onto the same mailbox.
+
+Non-idempotent requests (POST/PATCH: drafts, attachments, upload sessions,
+``$batch``) are only retried when Graph says it did not process them: 429 or
+503 with ``Retry-After`` (``can_retry``), or a connection that was never
+established. A timeout or 502/504 after sending may have been committed, and
+a retry would create duplicates.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping, Optional
+
+from agent_tools.llm.concurrency import AdaptiveLimiter, AIMDConfig, Outcome, deployment_limiter
+
+# Status codes Graph uses for throttling / transient overload.
+RETRIABLE_STATUS = frozenset({429, 502, 503, 504})
+
+# Methods safe to repeat after an ambiguous failure (timeout, 502/504).
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Graph's documented per-app, per-mailbox concurrent request limit.
+MAILBOX_CONCURRENCY = 4
+
+
+def retry_after_s(headers: Mapping[str, Any]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+
+    raw = headers.get("Retry-After") or headers.get("retry-after")
+    if raw is None:
+        return None
+    raw = str(raw).strip()
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def can_retry(method: str, status: int, retry_after: Optional[float]) -> bool:
+    """Whether a ``status`` response to ``method`` may be re-sent."""
+
+    if status not in RETRIABLE_STATUS:
+        return False
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    return status in (429, 503) and retry_after is not None
+
+
+def retry_delay_s(attempt: int, retry_after: Optional[float], *, base_s: float = 1.0, max_s: float = 60.0) -> float:
+    """Delay before retry ``attempt`` (0-based)."""
+
+    if retry_after is not None:
+        return min(max_s, retry_after) + random.uniform(0.0, 0.1 * retry_after + 0.25)
+    return random.uniform(0.0, min(max_s, base_s * (2**attempt)))
+
+
+def mailbox_key(path: str, base_url: str) -> str:
+    """Mailbox a Graph path addresses: ``me``, the user id/UPN of ``users/{id}/...``, else ``tenant``."""
+
+    rel = path[len(base_url) :] if base_url and path.startswith(base_url) else path
+    if "://" in rel:
+        # nextLink from another base URL: drop scheme/host/version.
+        rel = rel.split("://", 1)[1].split("/", 2)[-1]
+    parts = rel.split("?", 1)[0].strip("/").split("/")
+    if parts[0] == "me":
+        return "me"
+    if parts[0] == "users" and len(parts) > 1:
+        return parts[1].lower()
+    return "tenant"
+
+
+class MailboxGovernor:
+    def __init__(self, name: str, limiter: AdaptiveLimiter):
+        self.name = name
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def acquire(self) -> float:
+        """Wait for any active throttle window, then for a slot; returns seconds spent paused."""
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                pause = self._resume_at - time.monotonic()
+            if pause <= 0:
+                break
+            time.sleep(pause)
+            waited += pause
+        self.limiter.acquire()
+        return waited
+
+    def release(self, outcome: Outcome, latency_s: float = 0.0) -> None:
+        self.limiter.release(outcome, latency_s)
+
+    def pause(self, seconds: float) -> None:
+        """Hold new requests for this mailbox for ``seconds``."""
+
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + max(0.0, seconds))
+
+
+_governors: dict[str, MailboxGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def mailbox_governor(mailbox: str, *, max_concurrency: int = MAILBOX_CONCURRENCY) -> MailboxGovernor:
+    """Process-wide governor per mailbox, so every client and thread shares its budget."""
+
+    max_concurrency = max(1, int(max_concurrency))
+    config = AIMDConfig(min_limit=1, max_limit=max_concurrency, initial_limit=max_concurrency)
+    limiter = deployment_limiter(f"graph:{mailbox}", config)
+    with _governors_lock:
+        governor = _governors.get(mailbox)
+        if governor is None or governor.limiter is not limiter:
+            governor = MailboxGovernor(mailbox, limiter)
+            _governors[mailbox] = governor
+        return governor
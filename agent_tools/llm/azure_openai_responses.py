@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import json
+import queue
 import random
+import threading
+import contextvars
 import time
 from dataclasses import dataclass
-from typing import Any, Literal, Optional
+from typing import TYPE_CHECKING, Any, Literal, Optional
 
-import requests
-from requests.exceptions import ConnectionError as RequestsConnectionError
-from requests.exceptions import SSLError, Timeout
+from agent_tools.llm.concurrency import AdaptiveLimiter
+from agent_tools.llm.document_extraction import StreamingJSONBody
+from agent_tools.llm.resilience import (
+    CircuitOpenError,
+    deployment_breaker,
+    latency_percentile,
+    observe_latency,
+)
+from agent_tools.llm.telemetry import current_tags, endpoint_host, record_call, record_retry
+
+if TYPE_CHECKING:
+    import requests
 
 ReasoningEffort = Literal["minimal", "low", "medium", "high"]
 
@@ -27,25 +39,78 @@ class AzureResponsesClientConfig:
     max_backoff_s: float = 20.0
     connect_timeout_s: float = 20.0
 
+    # Circuit breaker (0 disables): open after N consecutive failures, probe after reset_s.
+    circuit_failure_threshold: int = 5
+    circuit_reset_s: float = 60.0
+    # Hedged reduce calls: duplicate a request still running after the observed
+    # latency percentile (floored at hedge_min_delay_s).
+    hedge_reduce: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_delay_s: float = 5.0
+
+
+class AzureResponsesError(RuntimeError):
+    """A Responses API call that failed after the client's own retries.
+
+    ``retriable`` is True for throttling, timeouts, transport errors and 5xx,
+    i.e. failures another deployment might not have.
+    """
+
+    def __init__(self, message: str, *, status_code: Optional[int] = None, retriable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retriable = retriable
+
 
 class AzureOpenAIResponsesClient:
     """Minimal Azure OpenAI Responses API client.
 
     Designed as a starter building block for computer-use agent runs.
+
+    Pass ``limiter`` (see ``concurrency.deployment_limiter``) to cap in-flight
+    requests adaptively when the client is shared by worker threads.
     """
 
-    def __init__(self, config: AzureResponsesClientConfig):
+    def __init__(self, config: AzureResponsesClientConfig, *, limiter: Optional[AdaptiveLimiter] = None):
         self._config = config
+        self._limiter = limiter
+        self._breaker = deployment_breaker(
+            config.deployment_name,
+            failure_threshold=config.circuit_failure_threshold,
+            reset_s=config.circuit_reset_s,
+            endpoint=config.responses_api_url,
+        )
+        self._rate_limit: dict[str, int] = {}
+        # Keep-alive connections are reused across calls (and worker threads).
+        # requests is imported here, not at module level, so CLI startup stays light.
+        import requests
 
-    def create_response(
+        self._session = requests.Session()
+
+    @property
+    def config(self) -> AzureResponsesClientConfig:
+        return self._config
+
+    @property
+    def breaker_open(self) -> bool:
+        return self._breaker.is_open()
+
+    @property
+    def rate_limit_remaining(self) -> dict[str, int]:
+        """Last ``x-ratelimit-remaining-{requests,tokens}`` values seen from this deployment."""
+
+        return dict(self._rate_limit)
+
+    def build_payload(
         self,
         *,
         input_data: str | list[Any],
         instructions: Optional[str] = None,
         max_output_tokens: Optional[int] = None,
         reasoning_effort: Optional[ReasoningEffort] = None,
-        timeout_s: float = 90,
     ) -> dict[str, Any]:
+        """Build the Responses API request body (also used for batch JSONL lines)."""
+
         payload: dict[str, Any] = {
             "model": self._config.deployment_name,
             "input": input_data,
@@ -58,53 +123,232 @@ class AzureOpenAIResponsesClient:
 
         effort = reasoning_effort or self._config.reasoning_effort
         payload["reasoning"] = {"effort": self._map_reasoning_effort(effort)}
+        return payload
+
+    def create_response(
+        self,
+        *,
+        input_data: str | list[Any],
+        instructions: Optional[str] = None,
+        max_output_tokens: Optional[int] = None,
+        reasoning_effort: Optional[ReasoningEffort] = None,
+        timeout_s: float = 90,
+    ) -> dict[str, Any]:
+        payload = self.build_payload(
+            input_data=input_data,
+            instructions=instructions,
+            max_output_tokens=max_output_tokens,
+            reasoning_effort=reasoning_effort,
+        )
 
         headers = {
             "api-key": self._config.api_key,
             "Content-Type": "application/json",
         }
 
+        # Inline files added via encode_file_for_api_streamed are base64-encoded
+        # while the body is sent instead of being materialized up front.
+        if StreamingJSONBody.contains_streamed(payload):
+            body: Any = StreamingJSONBody(payload)
+        else:
+            body = json.dumps(payload)
+
+        from requests.exceptions import ConnectionError as RequestsConnectionError
+        from requests.exceptions import SSLError, Timeout
+
         max_attempts = max(1, int(self._config.max_transport_retries) + 1)
+        call_started = time.time()
+        throttle_wait_s = 0.0
+        deployment = self._config.deployment_name
+        endpoint = endpoint_host(self._config.responses_api_url)
+
+        def _fail(
+            attempts: int,
+            message: str,
+            *,
+            status_code: Optional[int] = None,
+            retriable: bool = False,
+        ) -> AzureResponsesError:
+            record_call(
+                deployment=deployment,
+                endpoint=endpoint,
+                status="error",
+                latency_s=time.time() - call_started,
+                total_s=time.time() - call_started,
+                attempts=attempts,
+                throttle_wait_s=throttle_wait_s,
+                error=message,
+                instructions=instructions,
+            )
+            return AzureResponsesError(message, status_code=status_code, retriable=retriable)
+
+        # The breaker counts one outcome per call (the last attempt's), not one
+        # per transport retry, and a probe is given back however the call ends.
+        try:
+            probe = self._breaker.before_request()
+        except CircuitOpenError as e:
+            _fail(1, str(e))
+            raise
+        outcome = ""
+        try:
+            for attempt in range(max_attempts):
+                started = time.time()
+                try:
+                    resp = self._post(headers=headers, body=body, timeout_s=timeout_s)
+                except (Timeout, RequestsConnectionError, SSLError) as e:
+                    outcome = f"{type(e).__name__}: {e}"
+                    if attempt >= max_attempts - 1:
+                        raise _fail(
+                            attempt + 1,
+                            "Azure OpenAI transport failed after retries: "
+                            f"{type(e).__name__}: {e}",
+                            retriable=True,
+                        ) from e
+                    self._sleep_backoff(attempt)
+                    continue
 
-        for attempt in range(max_attempts):
-            started = time.time()
-            try:
-                resp = requests.post(
-                    self._config.responses_api_url,
-                    headers=headers,
-                    data=json.dumps(payload),
-                    timeout=(float(self._config.connect_timeout_s), float(timeout_s)),
-                )
-            except (Timeout, RequestsConnectionError, SSLError) as e:
-                if attempt >= max_attempts - 1:
-                    raise RuntimeError(
-                        "Azure OpenAI transport failed after retries: "
-                        f"{type(e).__name__}: {e}"
-                    ) from e
-                self._sleep_backoff(attempt)
-                continue
+                duration_s = time.time() - started
+                # Any answer but 5xx/408 (including 429) means the endpoint is up.
+                outcome = f"HTTP {resp.status_code}" if resp.status_code >= 500 or resp.status_code == 408 else "up"
 
-            duration_s = time.time() - started
-            if resp.status_code >= 400:
-                if self._is_retriable_status(resp.status_code) and attempt < max_attempts - 1:
+                if resp.status_code >= 400:
+                    if self._is_retriable_status(resp.status_code) and attempt < max_attempts - 1:
+                        waited = self._sleep_backoff(attempt)
+                        if resp.status_code == 429:
+                            throttle_wait_s += waited
+                        continue
+                    raise _fail(
+                        attempt + 1,
+                        "Azure OpenAI request failed "
+                        f"({resp.status_code}) after {duration_s:.2f}s: {resp.text}",
+                        status_code=resp.status_code,
+                        retriable=self._is_retriable_status(resp.status_code),
+                    )
+
+                try:
+                    result = resp.json()
+                except ValueError as e:
+                    if attempt >= max_attempts - 1:
+                        raise _fail(
+                            attempt + 1,
+                            "Azure OpenAI response was not valid JSON after retries: "
+                            f"{resp.text[:800]}",
+                            retriable=True,
+                        ) from e
                     self._sleep_backoff(attempt)
                     continue
-                raise RuntimeError(
-                    "Azure OpenAI request failed "
-                    f"({resp.status_code}) after {duration_s:.2f}s: {resp.text}"
+
+                observe_latency(deployment, current_tags()[1], time.time() - started)
+                record_call(
+                    deployment=deployment,
+                    endpoint=endpoint,
+                    status="ok",
+                    latency_s=time.time() - started,
+                    total_s=time.time() - call_started,
+                    attempts=attempt + 1,
+                    throttle_wait_s=throttle_wait_s,
+                    result=result,
+                    instructions=instructions,
                 )
+                return result
+
+            raise _fail(max_attempts, "Azure OpenAI request failed after retries", retriable=True)
+        finally:
+            if outcome == "up":
+                self._breaker.record_success()
+            elif outcome:
+                self._breaker.record_failure(outcome)
+            else:
+                self._breaker.release(probe)
 
-            try:
-                return resp.json()
-            except ValueError as e:
-                if attempt >= max_attempts - 1:
-                    raise RuntimeError(
-                        "Azure OpenAI response was not valid JSON after retries: "
-                        f"{resp.text[:800]}"
-                    ) from e
-                self._sleep_backoff(attempt)
+    def hedge_delay_s(self, phase: str = "reduce") -> Optional[float]:
+        """Delay before hedging a call in ``phase``; None when hedging is off or there is no history yet."""
+
+        if not self._config.hedge_reduce:
+            return None
+        observed = latency_percentile(self._config.deployment_name, phase, self._config.hedge_percentile)
+        if observed is None:
+            return None
+        return max(float(self._config.hedge_min_delay_s), observed)
+
+    def create_response_hedged(self, *, hedge_after_s: Optional[float], **kwargs: Any) -> dict[str, Any]:
+        """``create_response``, plus a duplicate request if the first is still running after ``hedge_after_s``.
 
-        raise RuntimeError("Azure OpenAI request failed after retries")
+        Returns whichever finishes successfully first; the slower request is left
+        to finish in the background and its result is discarded. Raises the
+        primary's error only if both fail.
+        """
+
+        if not hedge_after_s or hedge_after_s <= 0:
+            return self.create_response(**kwargs)
+
+        results: queue.Queue[tuple[str, Any, Optional[BaseException]]] = queue.Queue()
+
+        def _run(label: str) -> None:
+            try:
+                results.put((label, self.create_response(**kwargs), None))
+            except BaseException as e:  # noqa: BLE001 - forwarded to the caller
+                results.put((label, None, e))
+
+        def _start(label: str) -> None:
+            ctx = contextvars.copy_context()
+            threading.Thread(target=ctx.run, args=(_run, label), daemon=True).start()
+
+        _start("primary")
+        try:
+            label, result, error = results.get(timeout=float(hedge_after_s))
+            if error is not None:
+                raise error
+            return result
+        except queue.Empty:
+            pass
+
+        record_retry(kind="hedged", wait_s=0.0, error=f"no response after {hedge_after_s:.1f}s; sent duplicate")
+        _start("hedge")
+        errors: dict[str, BaseException] = {}
+        for _ in range(2):
+            label, result, error = results.get()
+            if error is None:
+                if label == "hedge":
+                    record_retry(kind="hedge_won")
+                return result
+            errors[label] = error
+        raise errors.get("primary") or errors["hedge"]
+
+    def _post(self, *, headers: dict[str, str], body: Any, timeout_s: float) -> requests.Response:
+        """One HTTP attempt, holding a limiter slot (if any) only while in flight."""
+
+        from requests.exceptions import Timeout
+
+        limiter = self._limiter
+        if limiter is not None:
+            limiter.acquire()
+        started = time.time()
+        outcome = "error"
+        try:
+            resp = self._session.post(
+                self._config.responses_api_url,
+                headers=headers,
+                data=body,
+                timeout=(float(self._config.connect_timeout_s), float(timeout_s)),
+            )
+            for kind in ("requests", "tokens"):
+                value = resp.headers.get(f"x-ratelimit-remaining-{kind}")
+                if value is not None and value.strip().isdigit():
+                    self._rate_limit[kind] = int(value)
+            if resp.status_code == 429:
+                outcome = "throttled"
+            elif resp.status_code in {408, 503, 504}:
+                outcome = "overloaded"
+            elif resp.status_code < 400:
+                outcome = "ok"
+            return resp
+        except Timeout:
+            outcome = "timeout"
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(outcome, time.time() - started)  # type: ignore[arg-type]
 
     @staticmethod
     def extract_output_text(result: dict[str, Any]) -> str:
@@ -187,10 +431,11 @@ class AzureOpenAIResponsesClient:
     def _is_retriable_status(status_code: int) -> bool:
         return status_code in {408, 409, 425, 429} or status_code >= 500
 
-    def _sleep_backoff(self, attempt: int) -> None:
+    def _sleep_backoff(self, attempt: int) -> float:
         delay = min(
             float(self._config.max_backoff_s),
             float(self._config.initial_backoff_s) * (2**attempt),
         )
         jitter = random.uniform(0.0, min(0.5, delay * 0.2))
         time.sleep(delay + jitter)
+        return delay + jitter
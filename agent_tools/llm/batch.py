@@ -0,0 +1,467 @@
+"""Offline (batch) execution of map-phase requests.
+
+Map calls are written to a JSONL batch file (one Responses API request body per
+line), submitted through a pluggable ``BatchBackend``, polled until the batch
+reaches a terminal state, and the results are returned keyed by ``custom_id``.
+The synthesizers then run their reduce passes synchronously as usual.
+
+Backends:
+- ``AzureOpenAIBatchBackend``: Azure OpenAI Files + Batches API. The model
+  entry must point at a Global Batch deployment.
+- ``LocalBatchBackend``: a local stand-in that executes each line with a
+  responder callable (a live client, or a canned responder for tests).
+
+Work files live in a work directory (``requests.jsonl``, ``batch_state.json``,
+``results.jsonl``). A rerun with an identical request file resumes polling the
+batch that was already submitted instead of submitting again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional, Protocol
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from agent_tools.llm.azure_openai_responses import AzureOpenAIResponsesClient, AzureResponsesClientConfig
+from agent_tools.llm.concurrency import AIMDConfig, deployment_limiter, run_concurrently
+from agent_tools.llm.telemetry import endpoint_host, record_call, telemetry_context
+
+if TYPE_CHECKING:
+    import requests
+
+BATCH_ENDPOINT = "/v1/responses"
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@dataclass(frozen=True)
+class BatchRequest:
+    custom_id: str
+    instructions: str
+    user_prompt: str
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+    batch_id: str
+    status: str
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+    request_counts: dict[str, int] = field(default_factory=dict)
+    errors: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class BatchItemResult:
+    custom_id: str
+    text: str = ""
+    response: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BatchBackend(Protocol):
+    name: str
+    # True when executing the batch already writes per-call telemetry
+    # (an in-process stand-in driving a live client).
+    records_calls: bool
+
+    def submit(self, input_path: Path) -> str:
+        """Upload/submit a JSONL request file and return a batch id."""
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        ...
+
+    def fetch_output_lines(self, status: BatchStatus) -> list[dict[str, Any]]:
+        """Return raw output lines (``{"custom_id", "response": {"status_code", "body"}, "error"}``)."""
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    backend: BatchBackend
+    work_dir: Path
+    poll_interval_s: float = 60.0
+    max_wait_s: float = 24 * 3600.0
+
+
+def write_batch_file(
+    batch_requests: list[BatchRequest],
+    path: Path,
+    *,
+    client: AzureOpenAIResponsesClient,
+    endpoint: str = BATCH_ENDPOINT,
+) -> str:
+    """Write one request per line; returns the sha256 of the file contents."""
+
+    seen: set[str] = set()
+    digest = hashlib.sha256()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for r in batch_requests:
+            if r.custom_id in seen:
+                raise RuntimeError(f"Duplicate batch custom_id: {r.custom_id}")
+            seen.add(r.custom_id)
+            instructions, input_data = client.conversation_to_responses_input(
+                [
+                    {"role": "system", "content": r.instructions},
+                    {"role": "user", "content": r.user_prompt},
+                ]
+            )
+            body = client.build_payload(input_data=input_data, instructions=instructions)
+            line = json.dumps(
+                {"custom_id": r.custom_id, "method": "POST", "url": endpoint, "body": body},
+                ensure_ascii=False,
+            ) + "\n"
+            digest.update(line.encode("utf-8"))
+            f.write(line)
+    tmp.replace(path)
+    return digest.hexdigest()
+
+
+def parse_output_lines(lines: list[dict[str, Any]]) -> dict[str, BatchItemResult]:
+    results: dict[str, BatchItemResult] = {}
+    for row in lines:
+        cid = str(row.get("custom_id") or "")
+        if not cid:
+            continue
+        resp = row.get("response") or {}
+        body = resp.get("body") if isinstance(resp, dict) else None
+        status_code = int(resp.get("status_code") or 0) if isinstance(resp, dict) else 0
+        err = row.get("error")
+        if err or not isinstance(body, dict) or status_code >= 400:
+            message = json.dumps(err) if err else f"status {status_code}: {json.dumps(body)[:500]}"
+            results[cid] = BatchItemResult(custom_id=cid, response=body if isinstance(body, dict) else None, error=message)
+            continue
+        text = AzureOpenAIResponsesClient.extract_output_text(body).strip()
+        results[cid] = BatchItemResult(custom_id=cid, text=text, response=body, error=None if text else "empty output")
+    return results
+
+
+def _read_jsonl_text(text: str) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue
+    return rows
+
+
+class AzureOpenAIBatchBackend:
+    """Azure OpenAI Batch API (Files upload + Batches create/poll + output file download)."""
+
+    name = "azure"
+    records_calls = False
+
+    def __init__(
+        self,
+        config: AzureResponsesClientConfig,
+        *,
+        endpoint: str = BATCH_ENDPOINT,
+        completion_window: str = "24h",
+        timeout_s: float = 300.0,
+    ):
+        self._config = config
+        self._endpoint = endpoint
+        self._completion_window = completion_window
+        self._timeout_s = float(timeout_s)
+
+        # Derive the resource base from the Responses URL:
+        #   https://<res>.openai.azure.com/openai/responses?api-version=X -> .../openai
+        #   https://<res>.openai.azure.com/openai/v1/responses            -> .../openai/v1
+        parts = urlsplit(config.responses_api_url)
+        path = parts.path.rstrip("/")
+        if path.endswith("/responses"):
+            path = path[: -len("/responses")]
+        self._base = urlunsplit((parts.scheme, parts.netloc, path, "", ""))
+        api_version = parse_qs(parts.query).get("api-version")
+        self._params = {"api-version": api_version[0]} if api_version else {}
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        import requests
+
+        resp = requests.request(
+            method,
+            f"{self._base}{path}",
+            headers={"api-key": self._config.api_key},
+            params=self._params,
+            timeout=(float(self._config.connect_timeout_s), self._timeout_s),
+            **kwargs,
+        )
+        if resp.status_code >= 400:
+            raise RuntimeError(f"Azure OpenAI batch request failed ({resp.status_code}) {method} {path}: {resp.text[:800]}")
+        return resp
+
+    def submit(self, input_path: Path) -> str:
+        with input_path.open("rb") as fh:
+            uploaded = self._request(
+                "POST",
+                "/files",
+                files={"file": (input_path.name, fh, "application/jsonl")},
+                data={"purpose": "batch"},
+            ).json()
+        file_id = uploaded.get("id")
+        if not file_id:
+            raise RuntimeError(f"Batch file upload returned no id: {uploaded}")
+
+        created = self._request(
+            "POST",
+            "/batches",
+            json={"input_file_id": file_id, "endpoint": self._endpoint, "completion_window": self._completion_window},
+        ).json()
+        batch_id = created.get("id")
+        if not batch_id:
+            raise RuntimeError(f"Batch create returned no id: {created}")
+        return str(batch_id)
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        data = self._request("GET", f"/batches/{batch_id}").json()
+        errors = data.get("errors")
+        return BatchStatus(
+            batch_id=batch_id,
+            status=str(data.get("status") or "unknown"),
+            output_file_id=data.get("output_file_id"),
+            error_file_id=data.get("error_file_id"),
+            request_counts=dict(data.get("request_counts") or {}),
+            errors=json.dumps(errors)[:800] if errors else None,
+        )
+
+    def fetch_output_lines(self, status: BatchStatus) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        for file_id in (status.output_file_id, status.error_file_id):
+            if file_id:
+                rows.extend(_read_jsonl_text(self._request("GET", f"/files/{file_id}/content").text))
+        return rows
+
+
+Responder = Callable[[dict[str, Any]], dict[str, Any]]
+
+
+def client_responder(client: AzureOpenAIResponsesClient, *, timeout_s: float = 300.0) -> Responder:
+    """Execute a batch line body synchronously with a live client."""
+
+    def _respond(body: dict[str, Any]) -> dict[str, Any]:
+        return client.create_response(
+            input_data=body.get("input") or "",
+            instructions=body.get("instructions"),
+            max_output_tokens=body.get("max_output_tokens"),
+            timeout_s=timeout_s,
+        )
+
+    return _respond
+
+
+class LocalBatchBackend:
+    """In-process stand-in for a batch service.
+
+    ``submit`` returns an id naming the request file and its content hash; the
+    first ``poll`` executes every line with the responder and writes an output
+    file in the Batch API output format next to the input. Failures of
+    individual lines are reported per line, as the real service does.
+    """
+
+    name = "local"
+
+    def __init__(self, responder: Responder, *, records_calls: bool = False, max_workers: int = 1):
+        self._responder = responder
+        self.records_calls = records_calls
+        self._max_workers = max(1, int(max_workers))
+
+    def submit(self, input_path: Path) -> str:
+        sha = hashlib.sha256(input_path.read_bytes()).hexdigest()[:12]
+        return f"local:{sha}:{input_path.resolve()}"
+
+    @staticmethod
+    def _paths(batch_id: str) -> tuple[Path, Path]:
+        _, sha, raw_path = batch_id.split(":", 2)
+        input_path = Path(raw_path)
+        return input_path, input_path.with_name(f"{input_path.stem}.{sha}.output.jsonl")
+
+    def poll(self, batch_id: str) -> BatchStatus:
+        try:
+            input_path, out_path = self._paths(batch_id)
+        except ValueError:
+            return BatchStatus(batch_id=batch_id, status="failed", errors="Malformed local batch id")
+
+        if not out_path.exists():
+            if not input_path.exists():
+                return BatchStatus(batch_id=batch_id, status="failed", errors=f"Missing request file: {input_path}")
+            rows = _read_jsonl_text(input_path.read_text(encoding="utf-8"))
+            outputs = run_concurrently(self._execute, rows, max_workers=self._max_workers)
+            tmp = out_path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                for out in outputs:
+                    f.write(json.dumps(out, ensure_ascii=False) + "\n")
+            tmp.replace(out_path)
+
+        return BatchStatus(batch_id=batch_id, status="completed", output_file_id=str(out_path))
+
+    def _execute(self, row: dict[str, Any]) -> dict[str, Any]:
+        try:
+            body = self._responder(row.get("body") or {})
+            return {"custom_id": row.get("custom_id"), "response": {"status_code": 200, "body": body}, "error": None}
+        except Exception as e:
+            return {
+                "custom_id": row.get("custom_id"),
+                "response": None,
+                "error": {"code": type(e).__name__, "message": str(e)[:500]},
+            }
+
+    def fetch_output_lines(self, status: BatchStatus) -> list[dict[str, Any]]:
+        if not status.output_file_id:
+            return []
+        return _read_jsonl_text(Path(status.output_file_id).read_text(encoding="utf-8"))
+
+
+def make_batch_backend(name: str, config: AzureResponsesClientConfig, *, max_concurrency: int = 1) -> BatchBackend:
+    if name == "azure":
+        return AzureOpenAIBatchBackend(config)
+    if name == "local":
+        limiter = (
+            deployment_limiter(
+                config.deployment_name, AIMDConfig(max_limit=max_concurrency), endpoint=config.responses_api_url
+            )
+            if max_concurrency > 1
+            else None
+        )
+        client = AzureOpenAIResponsesClient(config, limiter=limiter)
+        return LocalBatchBackend(client_responder(client), records_calls=True, max_workers=max_concurrency)
+    raise RuntimeError(f"Unknown batch backend: {name!r} (expected 'azure' or 'local')")
+
+
+def run_batch(
+    batch_requests: list[BatchRequest],
+    *,
+    backend: BatchBackend,
+    client: AzureOpenAIResponsesClient,
+    work_dir: Path,
+    poll_interval_s: float = 60.0,
+    max_wait_s: float = 24 * 3600.0,
+) -> dict[str, BatchItemResult]:
+    """Write, submit, poll and collect a batch of map requests.
+
+    Returns results keyed by ``custom_id``. Requests missing from the output (or
+    failed per line) are returned with ``error`` set so callers can fall back to
+    synchronous calls for just those items.
+    """
+
+    if not batch_requests:
+        return {}
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    input_path = work_dir / "requests.jsonl"
+    state_path = work_dir / "batch_state.json"
+    input_sha = write_batch_file(batch_requests, input_path, client=client)
+
+    state: dict[str, Any] = {}
+    if state_path.exists():
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except ValueError:
+            state = {}
+
+    resumable = (
+        state.get("input_sha256") == input_sha
+        and state.get("backend") == backend.name
+        and state.get("status") not in {"failed", "expired", "cancelled"}
+    )
+    if resumable:
+        batch_id = str(state["batch_id"])
+        submitted_at = float(state.get("submitted_at") or time.time())
+        print(f"Resuming batch {batch_id} ({len(batch_requests)} requests)")
+    else:
+        batch_id = backend.submit(input_path)
+        submitted_at = time.time()
+        print(f"Submitted batch {batch_id} via {backend.name} ({len(batch_requests)} requests)")
+
+    def _save_state(status: str) -> None:
+        state_path.write_text(
+            json.dumps(
+                {
+                    "batch_id": batch_id,
+                    "backend": backend.name,
+                    "input_sha256": input_sha,
+                    "requests": len(batch_requests),
+                    "submitted_at": submitted_at,
+                    "status": status,
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+    _save_state("submitted")
+    deadline = time.time() + float(max_wait_s)
+    while True:
+        with telemetry_context(phase="batch_map"):
+            st = backend.poll(batch_id)
+        _save_state(st.status)
+        if st.status in TERMINAL_STATUSES:
+            break
+        if time.time() >= deadline:
+            raise RuntimeError(
+                f"Batch {batch_id} not finished after {max_wait_s:.0f}s (status={st.status}); "
+                f"rerun to resume polling"
+            )
+        print(f"Batch {batch_id}: {st.status} {st.request_counts or ''}")
+        time.sleep(max(1.0, float(poll_interval_s)))
+
+    rows = backend.fetch_output_lines(st)
+    (work_dir / "results.jsonl").write_text(
+        "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows), encoding="utf-8"
+    )
+
+    parsed = parse_output_lines(rows)
+    if st.status != "completed" and not parsed:
+        raise RuntimeError(f"Batch {batch_id} ended with status {st.status}: {st.errors or 'no output'}")
+
+    turnaround_s = time.time() - submitted_at
+    results: dict[str, BatchItemResult] = {}
+    with telemetry_context(phase="batch_map"):
+        for r in batch_requests:
+            item = parsed.get(r.custom_id) or BatchItemResult(
+                custom_id=r.custom_id, error=f"missing from batch output (status={st.status})"
+            )
+            results[r.custom_id] = item
+            if backend.records_calls:
+                continue
+            record_call(
+                deployment=client.config.deployment_name,
+                endpoint=endpoint_host(client.config.responses_api_url),
+                status="ok" if item.error is None else "error",
+                latency_s=turnaround_s,
+                total_s=turnaround_s,
+                attempts=1,
+                result=item.response,
+                error=item.error,
+            )
+
+    failed = sum(1 for it in results.values() if it.error)
+    print(f"Batch {batch_id}: {st.status}; {len(results) - failed} ok, {failed} failed/missing")
+    return results
+
+
+def run_batch_map(
+    batch_requests: list[BatchRequest],
+    *,
+    options: BatchOptions,
+    client: AzureOpenAIResponsesClient,
+) -> dict[str, str]:
+    """Run map requests as a batch; returns output text for successful items only."""
+
+    results = run_batch(
+        batch_requests,
+        backend=options.backend,
+        client=client,
+        work_dir=options.work_dir,
+        poll_interval_s=options.poll_interval_s,
+        max_wait_s=options.max_wait_s,
+    )
+    return {cid: r.text for cid, r in results.items() if r.error is None}
@@ -0,0 +1,136 @@
+"""Process-wide cache of resolved Azure configs and Responses clients.
+
+Synthesis entry points call ``get_client(model_name)`` instead of resolving
+``.env`` + ``config/models.json`` and building a client per document, so a
+folder or incremental run reuses one configured client (and its HTTP
+connection pool, limiters and breakers) for the whole process.
+
+Entries are keyed by model name (and ``max_concurrency`` for clients) and are
+rebuilt when the modification time of ``config/models.json`` or ``.env``
+changes, so long-lived processes pick up config edits without a restart.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Optional
+
+from agent_tools.llm.azure_openai_responses import AzureOpenAIResponsesClient, AzureResponsesClientConfig
+from agent_tools.llm.env import load_repo_dotenv, read_azure_openai_env
+from agent_tools.llm.model_registry import ModelConfig, load_models_config
+from agent_tools.llm.pool import make_responses_client
+
+DEFAULT_MODEL = "azure-gpt-5.4"
+
+_Signature = tuple[Optional[int], Optional[int]]
+
+_lock = threading.Lock()
+_models: Optional[tuple[_Signature, dict[str, ModelConfig]]] = None
+_configs: dict[str, tuple[_Signature, AzureResponsesClientConfig]] = {}
+_clients: dict[tuple[str, int], tuple[_Signature, AzureOpenAIResponsesClient]] = {}
+
+
+def _repo_root() -> Path:
+    return Path(__file__).resolve().parents[2]
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _signature(repo_root: Path) -> _Signature:
+    return (_mtime_ns(repo_root / "config" / "models.json"), _mtime_ns(repo_root / ".env"))
+
+
+def _load_models(repo_root: Path, sig: _Signature) -> dict[str, ModelConfig]:
+    global _models
+    if _models is None or _models[0] != sig:
+        load_repo_dotenv(repo_root)
+        _models = (sig, load_models_config(repo_root))
+    return _models[1]
+
+
+def _build_config(model: Optional[ModelConfig]) -> AzureResponsesClientConfig:
+    env = read_azure_openai_env()
+    if not env.api_key:
+        raise RuntimeError("Missing AZURE_OPENAI_KEY in environment (.env)")
+
+    deployment_name = (model.deployment_name if model else None) or env.deployment_name
+    candidate_url = (model.api_url if model else None) or env.responses_api_url or env.api_url
+
+    if not deployment_name:
+        raise RuntimeError("Missing deployment name (AZURE_OPENAI_DEPLOYMENT or config/models.json)")
+    if not candidate_url:
+        raise RuntimeError("Missing Responses API URL (AZURE_OPENAI_RESPONSES_URL or config/models.json)")
+
+    max_output_tokens = (model.max_output_tokens if model else None) or 8192
+    reasoning_effort = (model.reasoning_effort if model else None) or "medium"
+
+    return AzureResponsesClientConfig(
+        api_key=env.api_key,
+        responses_api_url=candidate_url,
+        deployment_name=deployment_name,
+        max_output_tokens=int(max_output_tokens),
+        reasoning_effort=reasoning_effort,  # type: ignore[arg-type]
+        **(model.resilience_overrides() if model else {}),
+    )
+
+
+def get_model_config(model_name: str = DEFAULT_MODEL) -> Optional[ModelConfig]:
+    """Entry for ``model_name`` in config/models.json (None: fall back to env vars)."""
+
+    repo_root = _repo_root()
+    sig = _signature(repo_root)
+    with _lock:
+        return _load_models(repo_root, sig).get(model_name)
+
+
+def resolve_azure_config(model_name: str = DEFAULT_MODEL) -> AzureResponsesClientConfig:
+    """Client config for ``model_name`` from config/models.json, falling back to ``AZURE_OPENAI_*`` env vars."""
+
+    repo_root = _repo_root()
+    sig = _signature(repo_root)
+    with _lock:
+        cached = _configs.get(model_name)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        cfg = _build_config(_load_models(repo_root, sig).get(model_name))
+        _configs[model_name] = (sig, cfg)
+        return cfg
+
+
+def get_client(model_name: str = DEFAULT_MODEL, *, max_concurrency: int = 1) -> AzureOpenAIResponsesClient:
+    """Shared client for ``model_name``: a deployment pool when the model lists several deployments.
+
+    Above ``max_concurrency`` 1, in-flight calls are AIMD-limited per deployment.
+    """
+
+    max_concurrency = max(1, int(max_concurrency))
+    key = (model_name, max_concurrency)
+    repo_root = _repo_root()
+    sig = _signature(repo_root)
+    with _lock:
+        cached = _clients.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+    cfg = resolve_azure_config(model_name)
+    with _lock:
+        model = _load_models(repo_root, sig).get(model_name)
+        cached = _clients.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        client = make_responses_client(cfg, model, max_concurrency=max_concurrency)
+        _clients[key] = (sig, client)
+        return client
+
+
+def clear_client_cache() -> None:
+    global _models
+    with _lock:
+        _models = None
+        _configs.clear()
+        _clients.clear()
@@ -0,0 +1,183 @@
+"""Adaptive (AIMD) concurrency control for Azure OpenAI calls.
+
+``AdaptiveLimiter`` caps in-flight HTTP attempts per deployment. The limit
+grows additively (+1 per window of healthy completions, where a window is as
+many completions as the current limit) while latency stays near the observed
+baseline, and shrinks multiplicatively on congestion signals (429, timeouts,
+503). Decisions are appended to ``concurrency_decisions.jsonl`` next to the
+telemetry ledger.
+
+The client acquires a slot around each attempt and releases it before any
+backoff sleep, so callers only choose how many worker threads may *wait* for a
+slot (``max_limit``); the limiter decides how many actually run.
+
+Parallel paths use ``run_concurrently``:
+
+    limiter = deployment_limiter(cfg.deployment_name, AIMDConfig(max_limit=8))
+    client = AzureOpenAIResponsesClient(cfg, limiter=limiter)
+    results = run_concurrently(lambda r: call(client, r), items, max_workers=8)
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Literal, Optional, TypeVar
+
+from agent_tools.llm.telemetry import record_concurrency_decision
+
+Outcome = Literal["ok", "throttled", "timeout", "overloaded", "error"]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class AIMDConfig:
+    min_limit: int = 1
+    max_limit: int = 8
+    initial_limit: int = 2
+    additive_increase: int = 1
+    multiplicative_decrease: float = 0.5
+    # A completion is "healthy" when latency <= latency_tolerance * baseline,
+    # or <= latency_target_s when set (absolute target overrides the baseline).
+    latency_tolerance: float = 2.0
+    latency_target_s: Optional[float] = None
+    # Ignore further congestion signals for this long after a decrease (one burst
+    # of 429s from the same moment should only halve the limit once).
+    decrease_cooldown_s: float = 5.0
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, config: AIMDConfig = AIMDConfig()):
+        self.name = name
+        self.config = config
+        self._cond = threading.Condition()
+        self._limit = max(config.min_limit, min(config.max_limit, config.initial_limit))
+        self._in_flight = 0
+        self._healthy_in_window = 0
+        self._baseline_s: Optional[float] = None
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, outcome: Outcome, latency_s: float = 0.0) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if outcome == "ok":
+                self._on_success(float(latency_s))
+            elif outcome in ("throttled", "timeout", "overloaded"):
+                self._on_congestion(outcome, float(latency_s))
+            self._cond.notify_all()
+
+    def _healthy(self, latency_s: float) -> bool:
+        c = self.config
+        if c.latency_target_s is not None:
+            return latency_s <= c.latency_target_s
+        if self._baseline_s is None:
+            return True
+        return latency_s <= c.latency_tolerance * self._baseline_s
+
+    def _on_success(self, latency_s: float) -> None:
+        healthy = self._healthy(latency_s)
+        # Baseline tracks the fast end of observed latency and drifts up slowly so
+        # it can follow a genuinely slower deployment.
+        if self._baseline_s is None or latency_s < self._baseline_s:
+            self._baseline_s = latency_s
+        else:
+            self._baseline_s *= 1.02
+
+        if not healthy:
+            self._healthy_in_window = 0
+            return
+
+        self._healthy_in_window += 1
+        if self._healthy_in_window >= self._limit and self._limit < self.config.max_limit:
+            before = self._limit
+            self._limit = min(self.config.max_limit, self._limit + max(1, self.config.additive_increase))
+            self._healthy_in_window = 0
+            self._log("increase", before, "healthy window", latency_s)
+
+    def _on_congestion(self, outcome: str, latency_s: float) -> None:
+        self._healthy_in_window = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.config.decrease_cooldown_s:
+            return
+        before = self._limit
+        self._limit = max(self.config.min_limit, int(self._limit * self.config.multiplicative_decrease))
+        self._last_decrease = now
+        self._log("decrease" if self._limit < before else "hold", before, outcome, latency_s)
+
+    def _log(self, action: str, before: int, reason: str, latency_s: float) -> None:
+        record_concurrency_decision(
+            limiter=self.name,
+            action=action,
+            limit_before=before,
+            limit_after=self._limit,
+            in_flight=self._in_flight,
+            reason=reason,
+            latency_s=latency_s,
+            baseline_s=self._baseline_s,
+        )
+
+
+_limiters: dict[tuple[str, str], AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def deployment_limiter(
+    deployment_name: str, config: AIMDConfig = AIMDConfig(), *, endpoint: str = ""
+) -> AdaptiveLimiter:
+    """Process-wide limiter per deployment (so concurrent paths share one budget).
+
+    ``endpoint`` (the API URL) keeps same-named deployments in different
+    resources or regions apart.
+    """
+
+    key = (endpoint, deployment_name)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None or limiter.config != config:
+            limiter = AdaptiveLimiter(deployment_name, config)
+            _limiters[key] = limiter
+        return limiter
+
+
+def run_concurrently(fn: Callable[[T], R], items: list[T], *, max_workers: int) -> list[R]:
+    """Apply ``fn`` to ``items`` on a thread pool; results keep input order.
+
+    Each task runs in a copy of the caller's context, so telemetry tags set with
+    ``telemetry_context`` apply inside workers. On the first exception, tasks
+    not yet started are cancelled and the exception is raised once the running
+    ones finish.
+    """
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for f in futures:
+            error = f.exception() if f in done else None
+            if error is not None:
+                raise error
+        return [f.result() for f in futures]
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
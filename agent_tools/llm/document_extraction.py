@@ -9,6 +9,7 @@ Usage:
     from agent_tools.llm.document_extraction import (
         extract_pdf_text,
         extract_eml_text,
+        extract_pdf_pages_sanitized,
         sanitize_text,
         call_with_retry,
     )
@@ -16,18 +17,32 @@ Usage:
 
 from __future__ import annotations
 
-import re
+import base64
+import hashlib
+import json
+import mimetypes
+import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
 from email import policy
+from email.message import EmailMessage
 from email.parser import BytesParser
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Literal, Optional
+
+from agent_tools.llm.redaction import RedactionRuleset, default_ruleset, merge_counts
+from agent_tools.llm.telemetry import record_retry
 
-try:
-    import PyPDF2
-except ImportError:
-    PyPDF2 = None  # type: ignore
+
+def _pypdf2() -> Any:
+    """Import PyPDF2 on first PDF use (keeps CLI startup light)."""
+
+    try:
+        import PyPDF2
+    except ImportError as e:
+        raise ImportError("PyPDF2 is required for PDF extraction. Install with: pip install PyPDF2") from e
+    return PyPDF2
 
 
 @dataclass(frozen=True)
@@ -47,8 +62,7 @@ def extract_pdf_text(file_path: Path, max_pages: Optional[int] = None) -> str:
     Returns:
         Extracted text as a single string.
     """
-    if PyPDF2 is None:
-        raise ImportError("PyPDF2 is required for PDF extraction. Install with: pip install PyPDF2")
+    PyPDF2 = _pypdf2()
 
     text_parts = []
     try:
@@ -84,8 +98,7 @@ def extract_pdf_pages(
         A list of PdfPageExtraction in page order (1-based page_number).
     """
 
-    if PyPDF2 is None:
-        raise ImportError("PyPDF2 is required for PDF extraction. Install with: pip install PyPDF2")
+    PyPDF2 = _pypdf2()
 
     def _extract_one_page(page) -> str:
         if page_timeout_s is None:
@@ -144,27 +157,35 @@ def extract_eml_text(file_path: Path) -> str:
     try:
         with open(file_path, "rb") as f:
             msg = BytesParser(policy=policy.default).parse(f)
-
-        text = (
-            f"Subject: {msg['subject']}\n"
-            f"From: {msg['from']}\n"
-            f"To: {msg['to']}\n"
-            f"Date: {msg['date']}\n\n"
-        )
-        body = msg.get_body(preferencelist=("plain", "html"))
-        if body:
-            text += body.get_content()
-        return text
+        return email_message_to_text(msg)
     except Exception as e:
         raise RuntimeError(f"Error extracting EML {file_path}: {e}") from e
 
 
+def email_message_to_text(msg: EmailMessage) -> str:
+    """Render a parsed email message as header lines plus its preferred text body.
+
+    Only the best text part (plain, then HTML) is decoded; attachments are skipped.
+    """
+    text = (
+        f"Subject: {msg['subject']}\n"
+        f"From: {msg['from']}\n"
+        f"To: {msg['to']}\n"
+        f"Date: {msg['date']}\n\n"
+    )
+    body = msg.get_body(preferencelist=("plain", "html"))
+    if body:
+        text += body.get_content()
+    return text
+
+
 def sanitize_text(text: str) -> str:
     """Remove potential secrets and sensitive patterns from text.
 
-    Redacts:
+    Redacts (via the registered rules in ``agent_tools.llm.redaction``):
     - API keys, secrets, tokens, passwords, credentials
     - Bearer tokens
+    - Any additional rules added with ``register_redaction_rule``
 
     Args:
         text: Raw text to sanitize.
@@ -172,15 +193,141 @@ def sanitize_text(text: str) -> str:
     Returns:
         Sanitized text with sensitive values replaced by [REDACTED].
     """
-    # Redact common secret patterns
-    text = re.sub(
-        r"(?i)(api[-_]?key|secret|token|password|credential|pwd)\s*[:=]\s*[a-zA-Z0-9_\-\.~]+",
-        r"\1: [REDACTED]",
-        text,
-    )
-    # Redact Bearer tokens
-    text = re.sub(r"Bearer\s+[a-zA-Z0-9\-\._]+", "Bearer [REDACTED]", text)
-    return text
+    return default_ruleset().redact(text).text
+
+
+def sanitize_pdf_pages(
+    pages: list[PdfPageExtraction],
+    *,
+    ruleset: Optional[RedactionRuleset] = None,
+) -> tuple[list[PdfPageExtraction], dict[str, int]]:
+    """Sanitize each page once and return per-rule redaction counts.
+
+    Returns:
+        (sanitized pages, {rule_name: redaction_count})
+    """
+    rs = ruleset or default_ruleset()
+    counts: dict[str, int] = {}
+    out: list[PdfPageExtraction] = []
+    for p in pages:
+        result = rs.redact(p.text)
+        merge_counts(counts, result.counts)
+        out.append(PdfPageExtraction(page_number=p.page_number, text=result.text, error=p.error))
+    return out, counts
+
+
+_memory_cache: OrderedDict[str, tuple[list[PdfPageExtraction], dict[str, int], int]] = OrderedDict()
+_memory_cache_lock = threading.Lock()
+_memory_cache_max_chars = 0
+
+
+def enable_memory_cache(max_chars: int) -> None:
+    """Also keep recent ``extract_pdf_pages_sanitized`` results in memory (LRU, bounded by text size).
+
+    Off by default so one-shot runs keep their bounded memory profile; the
+    synthesis daemon turns it on. ``0`` disables and clears it.
+    """
+
+    global _memory_cache_max_chars
+    with _memory_cache_lock:
+        _memory_cache_max_chars = max(0, int(max_chars))
+        if not _memory_cache_max_chars:
+            _memory_cache.clear()
+
+
+def _memory_cache_get(key: str) -> Optional[tuple[list[PdfPageExtraction], dict[str, int]]]:
+    with _memory_cache_lock:
+        hit = _memory_cache.get(key)
+        if hit is None:
+            return None
+        _memory_cache.move_to_end(key)
+        return list(hit[0]), dict(hit[1])
+
+
+def _memory_cache_put(key: str, pages: list[PdfPageExtraction], counts: dict[str, int]) -> None:
+    size = sum(len(p.text) for p in pages)
+    with _memory_cache_lock:
+        if size > _memory_cache_max_chars:
+            return
+        _memory_cache[key] = (list(pages), dict(counts), size)
+        total = sum(entry[2] for entry in _memory_cache.values())
+        while total > _memory_cache_max_chars:
+            _, evicted = _memory_cache.popitem(last=False)
+            total -= evicted[2]
+
+
+def extract_pdf_pages_sanitized(
+    file_path: Path,
+    *,
+    cache_dir: Optional[Path] = None,
+    max_pages: Optional[int] = None,
+    page_timeout_s: Optional[int] = None,
+    ruleset: Optional[RedactionRuleset] = None,
+) -> tuple[list[PdfPageExtraction], dict[str, int], bool]:
+    """Extract and sanitize PDF pages, optionally caching the result on disk.
+
+    The cache key covers the file identity (resolved path, size, mtime), the
+    extraction limits, and the redaction ruleset fingerprint, so edits to either
+    the document or the rules invalidate it.
+
+    Returns:
+        (sanitized pages, redaction counts, cache_hit)
+    """
+    rs = ruleset or default_ruleset()
+
+    cache_path: Optional[Path] = None
+    key: Optional[str] = None
+    if cache_dir is not None or _memory_cache_max_chars:
+        st = file_path.stat()
+        key = "|".join(
+            [
+                str(file_path.resolve()),
+                str(st.st_size),
+                str(st.st_mtime_ns),
+                str(max_pages),
+                str(page_timeout_s),
+                rs.fingerprint,
+            ]
+        )
+        if _memory_cache_max_chars:
+            hit = _memory_cache_get(key)
+            if hit is not None:
+                return hit[0], hit[1], True
+    if cache_dir is not None and key is not None:
+        cache_path = cache_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}.pages.json"
+        if cache_path.exists():
+            try:
+                cached = json.loads(cache_path.read_text(encoding="utf-8"))
+                pages = [PdfPageExtraction(**p) for p in cached["pages"]]
+                counts = dict(cached.get("redactions") or {})
+                if _memory_cache_max_chars:
+                    _memory_cache_put(key, pages, counts)
+                return pages, counts, True
+            except (ValueError, KeyError, TypeError):
+                pass  # Corrupt cache entry; re-extract below.
+
+    raw = extract_pdf_pages(file_path, max_pages=max_pages, page_timeout_s=page_timeout_s)
+    pages, counts = sanitize_pdf_pages(raw, ruleset=rs)
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "source_path": str(file_path),
+                    "ruleset": rs.fingerprint,
+                    "redactions": counts,
+                    "pages": [asdict(p) for p in pages],
+                }
+            ),
+            encoding="utf-8",
+        )
+        tmp.replace(cache_path)
+
+    if key is not None and _memory_cache_max_chars:
+        _memory_cache_put(key, pages, counts)
+    return pages, counts, False
 
 
 def call_with_retry(
@@ -229,6 +376,7 @@ def call_with_retry(
             if "429" in error_str or "Too Many Requests" in error_str:
                 delay = initial_delay * (2**attempt)
                 print(f"Rate limited (attempt {attempt + 1}/{max_retries}). Retrying in {delay:.1f}s...")
+                record_retry(kind="rate_limited", wait_s=delay, error=error_str)
                 time.sleep(delay)
                 continue
 
@@ -236,6 +384,7 @@ def call_with_retry(
             if "Read timed out" in error_str or "timed out" in error_str.lower():
                 current_timeout += 120
                 print(f"Timeout (attempt {attempt + 1}/{max_retries}). Retrying with {current_timeout:.0f}s timeout...")
+                record_retry(kind="timeout", error=error_str)
                 continue
 
             # Non-retriable error
@@ -254,8 +403,7 @@ def check_pdf_redundancy(file_path: Path, threshold_chars_per_page: int = 50000)
     Returns:
         True if the PDF appears to have redundant content per page.
     """
-    if PyPDF2 is None:
-        raise ImportError("PyPDF2 is required. Install with: pip install PyPDF2")
+    PyPDF2 = _pypdf2()
 
     with open(file_path, "rb") as f:
         reader = PyPDF2.PdfReader(f)
@@ -268,23 +416,35 @@ def check_pdf_redundancy(file_path: Path, threshold_chars_per_page: int = 50000)
 
     return avg_chars_per_page > threshold_chars_per_page
 
-import base64
-import mimetypes
+# Files larger than this are routed to the chunked text pipeline rather than
+# uploaded inline as base64 (which inflates the payload by ~33%).
+DEFAULT_INLINE_MAX_BYTES = 20 * 1024 * 1024
 
-def encode_file_for_api(file_path: Path) -> dict[str, Any]:
-    """Encode a file (PDF, image, etc.) as a base64 data URI for the Responses API.
+# Multiple of 3 so each read encodes to base64 without padding mid-stream.
+_B64_READ_BYTES = 3 * 256 * 1024
 
-    Returns the dictionary structure expected by the API:
-    {"type": "input_file", "file_data": "data:<mime-type>;base64,<base64>"}
-    """
+
+def _api_mime_type(file_path: Path) -> str:
     mime_type, _ = mimetypes.guess_type(str(file_path))
     if not mime_type:
         mime_type = "application/octet-stream"
-    
+
     # Azure OpenAI Responses API might not like application/octet-stream or text/markdown
     if "markdown" in mime_type or str(file_path).endswith((".md", ".txt")):
         mime_type = "text/plain"
-        
+    return mime_type
+
+
+def encode_file_for_api(file_path: Path) -> dict[str, Any]:
+    """Encode a file (PDF, image, etc.) as a base64 data URI for the Responses API.
+
+    Returns the dictionary structure expected by the API:
+    {"type": "input_file", "file_data": "data:<mime-type>;base64,<base64>"}
+
+    This holds the whole file (and its encoding) in memory; prefer
+    ``encode_file_for_api_streamed`` for large files.
+    """
+    mime_type = _api_mime_type(file_path)
     with open(file_path, "rb") as f:
         base64_data = base64.b64encode(f.read()).decode("utf-8")
     return {
@@ -292,3 +452,128 @@ def encode_file_for_api(file_path: Path) -> dict[str, Any]:
         "file_data": f"data:{mime_type};base64,{base64_data}",
         "filename": str(file_path.name)
     }
+
+
+@dataclass(frozen=True)
+class StreamedFileData:
+    """Placeholder for a ``file_data`` data URI that is encoded while the request body is sent."""
+
+    path: Path
+    mime_type: str
+
+    @property
+    def prefix(self) -> str:
+        return f"data:{self.mime_type};base64,"
+
+    @property
+    def encoded_len(self) -> int:
+        size = self.path.stat().st_size
+        return len(self.prefix) + 4 * ((size + 2) // 3)
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        yield self.prefix.encode("ascii")
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(_B64_READ_BYTES), b""):
+                yield base64.b64encode(block)
+
+
+def encode_file_for_api_streamed(file_path: Path) -> dict[str, Any]:
+    """Like ``encode_file_for_api`` but defers reading/encoding to request time.
+
+    The returned item can be placed in ``input_data`` for
+    ``AzureOpenAIResponsesClient.create_response``; the client then streams the
+    JSON body (see ``StreamingJSONBody``) so peak memory stays ~one read block.
+    """
+    return {
+        "type": "input_file",
+        "file_data": StreamedFileData(path=Path(file_path), mime_type=_api_mime_type(file_path)),
+        "filename": str(Path(file_path).name),
+    }
+
+
+class StreamingJSONBody:
+    """Re-iterable JSON request body that streams any ``StreamedFileData`` values.
+
+    Exposes ``__len__`` so ``requests`` sends a Content-Length header instead of
+    chunked transfer encoding. Iterating again (on retry) re-reads the files.
+    """
+
+    def __init__(self, payload: Any):
+        self._files: list[StreamedFileData] = []
+        self._sentinels: list[str] = []
+
+        def _swap(obj: Any) -> Any:
+            if isinstance(obj, StreamedFileData):
+                sentinel = f"__streamed_file_{len(self._files)}_{id(obj)}__"
+                self._files.append(obj)
+                self._sentinels.append(sentinel)
+                return sentinel
+            if isinstance(obj, dict):
+                return {k: _swap(v) for k, v in obj.items()}
+            if isinstance(obj, (list, tuple)):
+                return [_swap(v) for v in obj]
+            return obj
+
+        text = json.dumps(_swap(payload))
+        self._parts: list[bytes] = []
+        for sentinel in self._sentinels:
+            head, text = text.split(f'"{sentinel}"', 1)
+            self._parts.append(head.encode("utf-8"))
+        self._parts.append(text.encode("utf-8"))
+
+    @staticmethod
+    def contains_streamed(obj: Any) -> bool:
+        if isinstance(obj, StreamedFileData):
+            return True
+        if isinstance(obj, dict):
+            return any(StreamingJSONBody.contains_streamed(v) for v in obj.values())
+        if isinstance(obj, (list, tuple)):
+            return any(StreamingJSONBody.contains_streamed(v) for v in obj)
+        return False
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self._parts) + sum(f.encoded_len + 2 for f in self._files)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part, f in zip(self._parts, self._files):
+            yield part
+            yield b'"'
+            yield from f.iter_chunks()
+            yield b'"'
+        yield self._parts[-1]
+
+
+@dataclass(frozen=True)
+class FileRoute:
+    mode: Literal["inline", "chunked_text"]
+    size_bytes: int
+    reason: str
+
+
+def route_file_for_api(file_path: Path, *, inline_max_bytes: int = DEFAULT_INLINE_MAX_BYTES) -> FileRoute:
+    """Decide whether a file should be uploaded inline or sent through text chunking.
+
+    Inline upload keeps layout/images for the model but costs base64 overhead and
+    a single huge request; above ``inline_max_bytes`` the chunked text pipeline
+    (``summarize_file.synthesize_pdf`` / ``synthesize_text``) is used instead.
+    """
+    size = Path(file_path).stat().st_size
+    if size > int(inline_max_bytes):
+        return FileRoute(
+            mode="chunked_text",
+            size_bytes=size,
+            reason=f"{size} bytes exceeds inline limit {int(inline_max_bytes)}",
+        )
+    return FileRoute(mode="inline", size_bytes=size, reason=f"{size} bytes within inline limit {int(inline_max_bytes)}")
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, or None if unavailable (e.g. Windows)."""
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB; macOS reports bytes.
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
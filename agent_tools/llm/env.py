@@ -5,11 +5,6 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-try:
-    from dotenv import load_dotenv
-except Exception:  # pragma: no cover
-    load_dotenv = None
-
 
 @dataclass(frozen=True)
 class AzureOpenAIEnv:
@@ -19,18 +14,39 @@ class AzureOpenAIEnv:
     deployment_name: Optional[str]
 
 
+# Values this module copied from .env, so a reload can tell them apart from
+# variables the process environment set itself.
+_dotenv_loaded: dict[str, str] = {}
+
+
 def load_repo_dotenv(repo_root: Path) -> None:
     """Best-effort load of repo-root .env (never commit secrets).
 
+    Variables already set in the environment win. Calling again after .env
+    changed applies the edits (and drops removed keys) for the variables a
+    previous call took from .env.
+
     If python-dotenv isn't installed, this is a no-op.
     """
 
-    if load_dotenv is None:
+    try:
+        from dotenv import dotenv_values
+    except Exception:  # pragma: no cover
         return
 
     dotenv_path = repo_root / ".env"
+    values = {}
     if dotenv_path.exists():
-        load_dotenv(dotenv_path=dotenv_path, override=False)
+        values = {k: v for k, v in dotenv_values(dotenv_path).items() if v is not None}
+
+    for key, value in values.items():
+        current = os.environ.get(key)
+        if current is None or current == _dotenv_loaded.get(key):
+            os.environ[key] = value
+            _dotenv_loaded[key] = value
+    for key in set(_dotenv_loaded) - set(values):
+        if os.environ.get(key) == _dotenv_loaded.pop(key):
+            del os.environ[key]
 
 
 def read_azure_openai_env() -> AzureOpenAIEnv:
@@ -0,0 +1,393 @@
+"""Streaming mailbox ingestion for synthesis workflows.
+
+Exported mailboxes (multi-GB MBOX files, folders of tens of thousands of EMLs)
+are too large to parse up front. This module works in two passes:
+
+1. Scan: stream each source once, keep only header fields and byte offsets.
+2. Thread: group messages by Message-ID / In-Reply-To / References, then load
+   and decode the text body of one thread at a time.
+
+Memory is bounded by the header index plus the largest single thread.
+
+Usage:
+    from agent_tools.llm.mail_ingest import iter_mail_threads, thread_to_text
+
+    for thread in iter_mail_threads(Path("exports/mailbox.mbox")):
+        text = thread_to_text(thread)
+
+CLI:
+    python -m agent_tools.llm.mail_ingest --source <MBOX_OR_DIR> --out-dir runs/<RUN_ID>/exports/mail
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from email import policy
+from email.parser import BytesHeaderParser, BytesParser
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Literal, Optional
+
+from agent_tools.llm.document_extraction import email_message_to_text
+
+
+SourceKind = Literal["mbox", "eml"]
+
+MBOX_EXTS = {".mbox", ".mbx"}
+EML_EXTS = {".eml"}
+
+_MESSAGE_ID_RE = re.compile(r"<[^<>\s]+>")
+
+
+@dataclass(frozen=True)
+class MailSource:
+    """Where a message lives on disk (whole EML file, or a byte span of an MBOX)."""
+
+    kind: SourceKind
+    path: str
+    offset: int = 0
+    length: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class MailHeader:
+    source: MailSource
+    message_id: str
+    in_reply_to: Optional[str]
+    references: tuple[str, ...]
+    subject: str
+    sender: str
+    date: str
+    sort_ts: float
+
+
+@dataclass(frozen=True)
+class MailThread:
+    thread_id: str
+    subject: str
+    messages: tuple[MailHeader, ...]  # chronological
+
+
+def _first_message_id(value: Any) -> Optional[str]:
+    if not value:
+        return None
+    found = _MESSAGE_ID_RE.findall(str(value))
+    return found[0] if found else str(value).strip() or None
+
+
+def _sort_ts(raw_date: str) -> float:
+    try:
+        return parsedate_to_datetime(raw_date).timestamp()
+    except Exception:
+        return 0.0
+
+
+def _header_from_bytes(header_bytes: bytes, source: MailSource) -> MailHeader:
+    hdr = BytesHeaderParser(policy=policy.default).parsebytes(header_bytes)
+
+    def _get(name: str) -> str:
+        try:
+            return str(hdr.get(name) or "").strip()
+        except Exception:
+            # Malformed headers should not abort a mailbox-wide scan.
+            return ""
+
+    message_id = _first_message_id(_get("Message-ID"))
+    if not message_id:
+        # Synthesize a stable id from the on-disk location.
+        message_id = f"<{source.path}:{source.offset}@local>"
+
+    raw_date = _get("Date")
+    return MailHeader(
+        source=source,
+        message_id=message_id,
+        in_reply_to=_first_message_id(_get("In-Reply-To")),
+        references=tuple(_MESSAGE_ID_RE.findall(_get("References"))),
+        subject=_get("Subject"),
+        sender=_get("From"),
+        date=raw_date,
+        sort_ts=_sort_ts(raw_date),
+    )
+
+
+def iter_mbox_headers(mbox_path: Path) -> Iterator[MailHeader]:
+    """Stream an MBOX file and yield one header record per message.
+
+    Messages are delimited by lines starting with ``From `` (the same rule used by
+    the stdlib ``mailbox.mbox``). Only header lines are retained; bodies are
+    skipped and re-read later by offset.
+    """
+
+    path_str = str(mbox_path)
+    start: Optional[int] = None
+    header_lines: list[bytes] = []
+    in_headers = False
+    pos = 0
+
+    def _emit(end: int) -> MailHeader:
+        source = MailSource(kind="mbox", path=path_str, offset=int(start or 0), length=end - int(start or 0))
+        return _header_from_bytes(b"".join(header_lines), source)
+
+    with open(mbox_path, "rb") as f:
+        for line in f:
+            if line.startswith(b"From "):
+                if start is not None:
+                    yield _emit(pos)
+                start = pos
+                header_lines = []
+                in_headers = True
+            elif in_headers:
+                if line in (b"\n", b"\r\n"):
+                    in_headers = False
+                else:
+                    header_lines.append(line)
+            pos += len(line)
+
+    if start is not None:
+        yield _emit(pos)
+
+
+def _read_eml_headers(eml_path: Path) -> MailHeader:
+    lines: list[bytes] = []
+    with open(eml_path, "rb") as f:
+        for line in f:
+            if line in (b"\n", b"\r\n"):
+                break
+            lines.append(line)
+    return _header_from_bytes(b"".join(lines), MailSource(kind="eml", path=str(eml_path)))
+
+
+def iter_mail_sources(source: Path) -> Iterator[tuple[SourceKind, Path]]:
+    """Yield (kind, path) for an MBOX/EML file or every MBOX/EML under a directory."""
+
+    if source.is_file():
+        yield ("eml" if source.suffix.lower() in EML_EXTS else "mbox"), source
+        return
+    if not source.is_dir():
+        raise RuntimeError(f"Not a file or directory: {source}")
+
+    for p in sorted(source.rglob("*")):
+        if not p.is_file() or p.name.startswith("."):
+            continue
+        suffix = p.suffix.lower()
+        if suffix in EML_EXTS:
+            yield "eml", p
+        elif suffix in MBOX_EXTS:
+            yield "mbox", p
+
+
+def iter_mail_headers(source: Path) -> Iterator[MailHeader]:
+    for kind, path in iter_mail_sources(source):
+        if kind == "mbox":
+            yield from iter_mbox_headers(path)
+        else:
+            try:
+                yield _read_eml_headers(path)
+            except OSError as e:
+                raise RuntimeError(f"Error reading EML headers {path}: {e}") from e
+
+
+def group_threads(headers: Iterable[MailHeader]) -> list[MailThread]:
+    """Group messages into threads using Message-ID, In-Reply-To and References.
+
+    Any message linked by id (directly or through a shared ancestor) lands in the
+    same thread, even when intermediate messages are missing from the export.
+    Threads are returned ordered by their first message date.
+    """
+
+    parent: dict[str, str] = {}
+
+    def _find(x: str) -> str:
+        parent.setdefault(x, x)
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def _union(a: str, b: str) -> None:
+        ra, rb = _find(a), _find(b)
+        if ra != rb:
+            parent[rb] = ra
+
+    all_headers: list[MailHeader] = []
+    for h in headers:
+        all_headers.append(h)
+        _find(h.message_id)
+        for ref in h.references:
+            _union(ref, h.message_id)
+        if h.in_reply_to:
+            _union(h.in_reply_to, h.message_id)
+
+    grouped: dict[str, list[MailHeader]] = {}
+    for h in all_headers:
+        grouped.setdefault(_find(h.message_id), []).append(h)
+
+    threads: list[MailThread] = []
+    for members in grouped.values():
+        members.sort(key=lambda m: (m.sort_ts, m.message_id))
+        root = members[0]
+        thread_id = hashlib.sha1(root.message_id.encode("utf-8")).hexdigest()[:12]
+        threads.append(MailThread(thread_id=thread_id, subject=root.subject, messages=tuple(members)))
+
+    threads.sort(key=lambda t: (t.messages[0].sort_ts, t.thread_id))
+    return threads
+
+
+def iter_mail_threads(source: Path) -> Iterator[MailThread]:
+    """Scan headers from *source* and yield threads (bodies are not loaded)."""
+
+    yield from group_threads(iter_mail_headers(source))
+
+
+def read_message_bytes(src: MailSource) -> bytes:
+    with open(src.path, "rb") as f:
+        if src.kind == "eml":
+            return f.read()
+        f.seek(src.offset)
+        raw = f.read(src.length) if src.length is not None else f.read()
+    # Drop the mbox "From " envelope line.
+    _, _, rest = raw.partition(b"\n")
+    return rest
+
+
+def load_message_text(header: MailHeader) -> str:
+    """Parse one message from disk and decode only its preferred text body."""
+
+    try:
+        msg = BytesParser(policy=policy.default).parsebytes(read_message_bytes(header.source))
+        return email_message_to_text(msg)
+    except Exception as e:
+        return f"Subject: {header.subject}\nFrom: {header.sender}\nDate: {header.date}\n\n[body extraction error: {e}]"
+
+
+def thread_to_text(thread: MailThread) -> str:
+    parts = [f"--- Message {i}/{len(thread.messages)} ---\n{load_message_text(m).strip()}" for i, m in enumerate(thread.messages, 1)]
+    return "\n\n".join(parts)
+
+
+def _slugify(name: str) -> str:
+    s = re.sub(r"^(re|fw|fwd)\s*:\s*", "", name.strip().lower())
+    s = re.sub(r"[^a-z0-9]+", "_", s)
+    s = re.sub(r"_+", "_", s).strip("_")
+    return s[:60] or "thread"
+
+
+def synthesize_mailbox(
+    *,
+    source: Path,
+    out_dir: Path,
+    manifest_path: Optional[Path] = None,
+    model_name: str = "azure-gpt-5.4",
+    max_threads: int = 0,
+    min_messages: int = 1,
+    target_chunk_chars: int = 30_000,
+    max_chunk_chars: int = 45_000,
+    max_reduction_passes: int = 3,
+) -> dict[str, Any]:
+    """Synthesize an MBOX file or EML folder thread by thread via ``synthesize_text``."""
+
+    # Imported lazily so header scans do not require the LLM stack.
+    from agent_tools.llm.summarize_file import synthesize_text
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    threads = [t for t in iter_mail_threads(source) if len(t.messages) >= max(1, int(min_messages))]
+    threads_total = len(threads)
+    if max_threads and max_threads > 0:
+        threads = threads[: int(max_threads)]
+
+    entries: list[dict[str, Any]] = []
+    for idx, thread in enumerate(threads, start=1):
+        title = thread.subject or "(no subject)"
+        slug = f"{_slugify(title)}__{thread.thread_id}"
+        out_md = out_dir / f"{slug}__synthesis.md"
+        out_manifest = out_dir / f"{slug}__synthesis.manifest.json"
+
+        print(f"[{idx}/{len(threads)}] Synthesizing thread: {title} ({len(thread.messages)} messages)")
+        synthesize_text(
+            title=title,
+            text=thread_to_text(thread),
+            out_md_path=out_md,
+            manifest_path=out_manifest,
+            model_name=model_name,
+            target_chunk_chars=target_chunk_chars,
+            max_chunk_chars=max_chunk_chars,
+            max_reduction_passes=max_reduction_passes,
+        )
+
+        entries.append(
+            {
+                "thread_id": thread.thread_id,
+                "subject": title,
+                "messages": len(thread.messages),
+                "first_date": thread.messages[0].date,
+                "last_date": thread.messages[-1].date,
+                "out_md": str(out_md),
+                "out_manifest": str(out_manifest),
+            }
+        )
+
+    manifest = {
+        "source": str(source),
+        "generated_on": date.today().isoformat(),
+        "model": model_name,
+        "threads_total": threads_total,
+        "threads_synthesized": len(entries),
+        "threads": entries,
+    }
+    if manifest_path:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Thread-by-thread synthesis of an MBOX file or EML folder")
+    parser.add_argument("--source", required=True, help="MBOX file, EML file, or directory of MBOX/EML files")
+    parser.add_argument("--out-dir", required=True, help="Directory to write per-thread syntheses")
+    parser.add_argument("--manifest", default="", help="Optional JSON manifest output path")
+    parser.add_argument("--model", default="azure-gpt-5.4", help="Model name from config/models.json")
+    parser.add_argument("--max-threads", type=int, default=0, help="Optional limit on threads (0 = all)")
+    parser.add_argument("--min-messages", type=int, default=1, help="Skip threads with fewer messages")
+    parser.add_argument("--list", action="store_true", help="Only list threads (no model calls)")
+    parser.add_argument("--target-chunk-chars", type=int, default=30000)
+    parser.add_argument("--max-chunk-chars", type=int, default=45000)
+    parser.add_argument("--max-reduction-passes", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    source = Path(args.source)
+
+    if args.list:
+        for t in iter_mail_threads(source):
+            if len(t.messages) >= args.min_messages:
+                print(f"{t.thread_id}  {len(t.messages):>4}  {t.messages[0].date}  {t.subject}")
+        return 0
+
+    manifest_path = Path(args.manifest) if args.manifest else None
+    manifest = synthesize_mailbox(
+        source=source,
+        out_dir=Path(args.out_dir),
+        manifest_path=manifest_path,
+        model_name=args.model,
+        max_threads=int(args.max_threads),
+        min_messages=int(args.min_messages),
+        target_chunk_chars=int(args.target_chunk_chars),
+        max_chunk_chars=int(args.max_chunk_chars),
+        max_reduction_passes=int(args.max_reduction_passes),
+    )
+
+    print(f"Wrote {manifest['threads_synthesized']} thread syntheses under: {args.out_dir}")
+    if manifest_path:
+        print(f"Wrote: {manifest_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
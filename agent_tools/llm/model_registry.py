@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Optional
 
@@ -25,6 +26,47 @@ def _none_if_placeholder(value: Any) -> Optional[str]:
     return v
 
 
+@dataclass(frozen=True)
+class DeploymentTarget:
+    """One member of a model's deployment pool (another deployment or region)."""
+
+    deployment_name: str
+    api_url: Optional[str] = None  # None: use the model's api_url
+    weight: float = 1.0
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    # Key for a resource other than the model's (None: use AZURE_OPENAI_KEY).
+    api_key: Optional[str] = field(default=None, repr=False)
+    api_key_env: Optional[str] = None
+
+    def resolve_api_key(self) -> Optional[str]:
+        """This member's own key (``api_key``, else ``$api_key_env``), or None to use the model's."""
+
+        if self.api_key:
+            return self.api_key
+        if not self.api_key_env:
+            return None
+        key = os.getenv(self.api_key_env)
+        if not key:
+            raise RuntimeError(f"Missing {self.api_key_env} in environment (.env) for deployment {self.deployment_name}")
+        return key
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> "DeploymentTarget":
+        name = _none_if_placeholder(data.get("deployment_name"))
+        if not name:
+            raise ValueError("Each entry in 'deployments' needs a deployment_name")
+        return DeploymentTarget(
+            deployment_name=name,
+            api_url=_none_if_placeholder(data.get("api_url")),
+            weight=float(data.get("weight", 1.0)),
+            requests_per_minute=data.get("requests_per_minute"),
+            tokens_per_minute=data.get("tokens_per_minute"),
+            api_key=_none_if_placeholder(data.get("api_key")),
+            api_key_env=_none_if_placeholder(data.get("api_key_env")),
+        )
+
+
 @dataclass(frozen=True)
 class ModelConfig:
     provider: str
@@ -36,6 +78,27 @@ class ModelConfig:
     reasoning_effort: Optional[str] = None
     supports_temperature: Optional[bool] = None
     supports_reasoning_effort: Optional[bool] = None
+    # Optional planning inputs (used by --plan estimates; never sent to the API).
+    input_cost_per_1m_tokens: Optional[float] = None
+    output_cost_per_1m_tokens: Optional[float] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    # Optional resilience overrides for AzureResponsesClientConfig (None keeps the client default).
+    circuit_failure_threshold: Optional[int] = None
+    circuit_reset_s: Optional[float] = None
+    hedge_reduce: Optional[bool] = None
+    hedge_percentile: Optional[float] = None
+    hedge_min_delay_s: Optional[float] = None
+    # Optional pool of deployments serving this model; requests are spread by
+    # weight and remaining quota, with failover (see pool.py). Empty means the
+    # single deployment_name/api_url above.
+    deployments: tuple[DeploymentTarget, ...] = ()
+
+    def resilience_overrides(self) -> dict[str, Any]:
+        """Client config kwargs for the resilience fields that are set."""
+
+        fields = ("circuit_failure_threshold", "circuit_reset_s", "hedge_reduce", "hedge_percentile", "hedge_min_delay_s")
+        return {name: getattr(self, name) for name in fields if getattr(self, name) is not None}
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "ModelConfig":
@@ -49,6 +112,16 @@ class ModelConfig:
             reasoning_effort=_none_if_placeholder(data.get("reasoning_effort")),
             supports_temperature=data.get("supports_temperature"),
             supports_reasoning_effort=data.get("supports_reasoning_effort"),
+            input_cost_per_1m_tokens=data.get("input_cost_per_1m_tokens"),
+            output_cost_per_1m_tokens=data.get("output_cost_per_1m_tokens"),
+            requests_per_minute=data.get("requests_per_minute"),
+            tokens_per_minute=data.get("tokens_per_minute"),
+            circuit_failure_threshold=data.get("circuit_failure_threshold"),
+            circuit_reset_s=data.get("circuit_reset_s"),
+            hedge_reduce=data.get("hedge_reduce"),
+            hedge_percentile=data.get("hedge_percentile"),
+            hedge_min_delay_s=data.get("hedge_min_delay_s"),
+            deployments=tuple(DeploymentTarget.from_dict(d) for d in data.get("deployments") or ()),
         )
 
 
@@ -0,0 +1,214 @@
+"""Weighted multi-deployment pools with failover.
+
+A model entry in ``config/models.json`` may list several deployments serving
+the same model (extra deployments in one resource, or other regions)::
+
+    "azure-gpt-5.4": {
+      ...,
+      "deployments": [
+        {"deployment_name": "gpt-5.4-eastus2", "weight": 2, "requests_per_minute": 300},
+        {"deployment_name": "gpt-5.4-swedencentral",
+         "api_url": "https://<resource>.openai.azure.com/openai/responses?api-version=...",
+         "api_key_env": "AZURE_OPENAI_KEY_SWEDEN",
+         "weight": 1}
+      ]
+    }
+
+``DeploymentPool`` is a drop-in ``AzureOpenAIResponsesClient`` that picks a
+member per request by ``weight`` x remaining quota (the last
+``x-ratelimit-remaining-*`` headers relative to the configured per-minute
+limits). Members with an open circuit, or throttled in the last few seconds,
+are skipped while others are available. A retriable failure (429, timeout,
+5xx, open circuit) fails over to another member; when every member has failed
+the pool backs off and tries one more round.
+
+A member in another resource takes its key from ``api_key`` or
+``api_key_env`` (default: the model's ``AZURE_OPENAI_KEY``). Members are
+identified by ``(api_url, deployment_name)``, so the same deployment name in
+two regions is two members. Each member keeps its own limiter, circuit breaker
+and telemetry ``deployment``/``endpoint`` tags, so ``python -m agent_tools.llm.telemetry``
+reports per-deployment stats and ``failover`` events.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import replace
+from typing import Any, Optional
+
+from agent_tools.llm.azure_openai_responses import (
+    AzureOpenAIResponsesClient,
+    AzureResponsesClientConfig,
+    AzureResponsesError,
+)
+from agent_tools.llm.concurrency import AIMDConfig, deployment_limiter
+from agent_tools.llm.model_registry import DeploymentTarget, ModelConfig
+from agent_tools.llm.resilience import CircuitOpenError
+from agent_tools.llm.telemetry import endpoint_host, record_retry
+
+# After a 429, prefer other members for this long.
+THROTTLE_COOLDOWN_S = 10.0
+
+# Floor for a member's quota share so a drained deployment is still probed occasionally.
+_MIN_HEADROOM = 0.05
+
+
+class _Member:
+    def __init__(self, client: AzureOpenAIResponsesClient, target: DeploymentTarget):
+        self.client = client
+        self.target = target
+        self.throttled_until = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.client.config.deployment_name
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.client.config.responses_api_url, self.client.config.deployment_name)
+
+    def available(self, now: float) -> bool:
+        return not self.client.breaker_open and self.throttled_until <= now
+
+    def headroom(self) -> float:
+        remaining = self.client.rate_limit_remaining
+        fractions = [
+            remaining[kind] / float(limit)
+            for kind, limit in (
+                ("requests", self.target.requests_per_minute),
+                ("tokens", self.target.tokens_per_minute),
+            )
+            if limit and kind in remaining
+        ]
+        if not fractions:
+            return 1.0
+        return min(1.0, max(_MIN_HEADROOM, min(fractions)))
+
+
+class DeploymentPool(AzureOpenAIResponsesClient):
+    """Spread requests over several deployments of one model, failing over on retriable errors."""
+
+    def __init__(
+        self,
+        members: list[tuple[AzureOpenAIResponsesClient, DeploymentTarget]],
+        *,
+        max_rounds: int = 2,
+    ):
+        if not members:
+            raise ValueError("DeploymentPool needs at least one member")
+        # Only the shared state the base class's helpers read is set up: the
+        # first member's config stands in for ``config`` / ``build_payload``, and
+        # the members own the sessions, breakers and limiters.
+        self._config = members[0][0].config
+        self._limiter = None
+        self._rate_limit = {}
+        self._members = [_Member(client, target) for client, target in members]
+        self._max_rounds = max(1, int(max_rounds))
+        self._pick_lock = threading.Lock()
+
+    @property
+    def breaker_open(self) -> bool:
+        return all(m.client.breaker_open for m in self._members)
+
+    @property
+    def deployment_names(self) -> list[str]:
+        return [m.name for m in self._members]
+
+    def _pick(self, exclude: set[tuple[str, str]]) -> Optional[_Member]:
+        now = time.monotonic()
+        candidates = [m for m in self._members if m.key not in exclude and not m.client.breaker_open]
+        ready = [m for m in candidates if m.available(now)] or candidates
+        if not ready:
+            return None
+        weights = [max(0.0, m.target.weight) * m.headroom() for m in ready]
+        if sum(weights) <= 0:
+            return ready[0]
+        with self._pick_lock:
+            return random.choices(ready, weights=weights)[0]
+
+    def create_response(self, **kwargs: Any) -> dict[str, Any]:  # type: ignore[override]
+        last_error: Optional[RuntimeError] = None
+        for round_index in range(self._max_rounds):
+            tried: set[tuple[str, str]] = set()
+            while True:
+                member = self._pick(tried)
+                if member is None:
+                    break
+                try:
+                    return member.client.create_response(**kwargs)
+                except CircuitOpenError as e:
+                    last_error = e
+                except AzureResponsesError as e:
+                    if not e.retriable:
+                        raise
+                    last_error = e
+                    if e.status_code == 429:
+                        member.throttled_until = time.monotonic() + THROTTLE_COOLDOWN_S
+                tried.add(member.key)
+                record_retry(
+                    kind="failover",
+                    deployment=member.name,
+                    endpoint=endpoint_host(member.key[0]),
+                    error=str(last_error),
+                )
+            if round_index < self._max_rounds - 1:
+                self._sleep_backoff(round_index)
+
+        if last_error is None:
+            raise CircuitOpenError(
+                f"All deployments in pool are unavailable (open circuits): {', '.join(self.deployment_names)}"
+            )
+        raise last_error
+
+    def hedge_delay_s(self, phase: str = "reduce") -> Optional[float]:
+        delays = [d for d in (m.client.hedge_delay_s(phase) for m in self._members) if d is not None]
+        return min(delays) if delays else None
+
+
+def _limited_client(cfg: AzureResponsesClientConfig, max_concurrency: int) -> AzureOpenAIResponsesClient:
+    if max_concurrency <= 1:
+        return AzureOpenAIResponsesClient(cfg)
+    limiter = deployment_limiter(
+        cfg.deployment_name, AIMDConfig(max_limit=int(max_concurrency)), endpoint=cfg.responses_api_url
+    )
+    return AzureOpenAIResponsesClient(cfg, limiter=limiter)
+
+
+def make_responses_client(
+    cfg: AzureResponsesClientConfig,
+    model: Optional[ModelConfig] = None,
+    *,
+    max_concurrency: int = 1,
+) -> AzureOpenAIResponsesClient:
+    """Client for ``cfg``, or a ``DeploymentPool`` when ``model`` lists several deployments.
+
+    Above ``max_concurrency`` 1, each deployment gets its own AIMD limiter.
+    Pool members retry once themselves and then fail over, instead of backing
+    off on a throttled deployment while others have quota.
+    """
+
+    targets = model.deployments if model else ()
+    if len(targets) <= 1:
+        if targets:
+            t = targets[0]
+            cfg = replace(
+                cfg,
+                api_key=t.resolve_api_key() or cfg.api_key,
+                deployment_name=t.deployment_name,
+                responses_api_url=t.api_url or cfg.responses_api_url,
+            )
+        return _limited_client(cfg, max_concurrency)
+
+    members: list[tuple[AzureOpenAIResponsesClient, DeploymentTarget]] = []
+    for t in targets:
+        member_cfg = replace(
+            cfg,
+            api_key=t.resolve_api_key() or cfg.api_key,
+            deployment_name=t.deployment_name,
+            responses_api_url=t.api_url or cfg.responses_api_url,
+            max_transport_retries=min(1, int(cfg.max_transport_retries)),
+        )
+        members.append((_limited_client(member_cfg, max_concurrency), t))
+    return DeploymentPool(members)
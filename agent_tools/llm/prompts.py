@@ -0,0 +1,153 @@
+"""Prompt builders for the synthesis pipeline, ordered for prompt caching.
+
+Each builder returns a ``PromptSplit``: fixed ``instructions`` that are
+byte-identical for every call of that kind (across chunks, documents and runs)
+and a variable ``user_prompt`` (title, chunk locator, text). The Responses API
+places instructions ahead of the input, so nothing call-specific precedes the
+fixed part.
+
+Azure OpenAI only caches a prompt prefix of at least ``CACHE_MIN_PREFIX_TOKENS``
+tokens. The instructions here are shorter than that, so they are not cached
+today; ``prefix_split_record`` says so (``cacheable``) rather than padding them.
+The stable ordering still lets a longer fixed part cache without other changes.
+
+Keep per-call values (titles, page ranges, counters) out of the instruction
+constants; changing an instruction constant changes its ``prefix_id``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class PromptSplit:
+    kind: str  # "map" | "reduce" | "combined"
+    instructions: str  # fixed prefix
+    user_prompt: str  # variable suffix
+
+    @property
+    def prefix_id(self) -> str:
+        return prefix_fingerprint(self.instructions)
+
+    @property
+    def prefix_chars(self) -> int:
+        return len(self.instructions)
+
+
+def prefix_fingerprint(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:12]
+
+
+# Shortest prefix the provider caches, and the rough token estimate used for it
+# (the synthesis planner's default too).
+CACHE_MIN_PREFIX_TOKENS = 1024
+_CHARS_PER_TOKEN = 4.0
+
+
+def prefix_tokens_estimate(chars: int) -> int:
+    return int(math.ceil(max(0, chars) / _CHARS_PER_TOKEN))
+
+
+MAP_INSTRUCTIONS = (
+    "You extract accurate notes from provided document text.\n\n"
+    "The user message contains one chunk of a larger document, preceded by the document title "
+    "and the chunk's position (chunk number and/or page range). Summarize only that chunk.\n\n"
+    "Return Markdown with:\n"
+    "- Key points (bullets)\n"
+    "- Decisions / confirmations\n"
+    "- Open questions\n"
+    "- Action items (with owners if present)\n"
+    "- Notable metrics/claims (quote exact phrases when possible)\n\n"
+    "Do not invent details. If uncertain, say 'unknown'."
+)
+
+REDUCE_INSTRUCTIONS = (
+    "You synthesize multiple chunk summaries into a single accurate memo.\n\n"
+    "The user message contains chunk summaries from a single document. "
+    "Produce a consolidated, client-ready synthesis.\n\n"
+    "Output Markdown with:\n"
+    "1) Executive Summary (6-10 bullets)\n"
+    "2) Meeting Context\n"
+    "3) Key Decisions / Confirmations\n"
+    "4) Open Questions / Follow-ups\n"
+    "5) Risks / Dependencies\n"
+    "6) Suggested Next-Step Email (short draft)\n\n"
+    "Be faithful to the chunk summaries; do not invent. If something is unclear, mark as unknown."
+)
+
+COMBINED_INSTRUCTIONS = (
+    "You are a strategic analyst synthesizing business intelligence documents.\n\n"
+    "The user message contains per-document syntheses from a folder of documents. "
+    "Provide a high-level executive summary and thematic synthesis across all these findings. "
+    "Identify key themes, recurring topics, and strategic takeaways.\n\n"
+    "Output Markdown with:\n"
+    "- Executive Summary (8-12 bullets)\n"
+    "- Themes (with evidence references to specific documents)\n"
+    "- Notable Decisions / Confirmations\n"
+    "- Open Questions / Follow-ups\n"
+    "- Recommended Next Actions\n\n"
+    "Be faithful to the sources; do not invent details."
+)
+
+
+def map_text_prompt(*, title: str, index: int, total: int, text: str) -> PromptSplit:
+    return PromptSplit(
+        kind="map",
+        instructions=MAP_INSTRUCTIONS,
+        user_prompt=f"Document: {title}\nChunk: {index}/{total}\n\nTEXT:\n{text}",
+    )
+
+
+def map_pdf_prompt(*, title: str, start_page: int, end_page: int, text: str) -> PromptSplit:
+    return PromptSplit(
+        kind="map",
+        instructions=MAP_INSTRUCTIONS,
+        user_prompt=f"Document: {title} (PDF)\nChunk pages: {start_page}-{end_page}\n\nTEXT:\n{text}",
+    )
+
+
+def reduce_prompt(*, summaries: str, title: Optional[str] = None) -> PromptSplit:
+    header = f"Document: {title}\n\n" if title else ""
+    return PromptSplit(
+        kind="reduce",
+        instructions=REDUCE_INSTRUCTIONS,
+        user_prompt=f"{header}CHUNK SUMMARIES:\n{summaries}",
+    )
+
+
+def combined_prompt(*, sources: str) -> PromptSplit:
+    return PromptSplit(kind="combined", instructions=COMBINED_INSTRUCTIONS, user_prompt=f"SOURCES:\n{sources}")
+
+
+def prefix_split_record(splits: Iterable[PromptSplit]) -> dict[str, dict[str, Any]]:
+    """Manifest-friendly record of the fixed/variable split per prompt kind.
+
+    More than one ``prefix_id`` for a kind means the fixed part drifted between
+    calls and those calls could not share a cached prefix. ``cacheable`` is
+    False while the prefix is estimated below ``CACHE_MIN_PREFIX_TOKENS``, in
+    which case the provider caches nothing whatever the ordering.
+    """
+
+    out: dict[str, dict[str, Any]] = {}
+    for s in splits:
+        tokens = prefix_tokens_estimate(s.prefix_chars)
+        rec = out.setdefault(
+            s.kind,
+            {
+                "prefix_ids": [],
+                "prefix_chars": s.prefix_chars,
+                "prefix_tokens_est": tokens,
+                "cacheable": tokens >= CACHE_MIN_PREFIX_TOKENS,
+                "calls": 0,
+                "variable_chars": 0,
+            },
+        )
+        if s.prefix_id not in rec["prefix_ids"]:
+            rec["prefix_ids"].append(s.prefix_id)
+        rec["calls"] += 1
+        rec["variable_chars"] += len(s.user_prompt)
+    return out
@@ -0,0 +1,170 @@
+"""Precompiled redaction rules for text sent to LLM endpoints.
+
+Registered rules are compiled once and applied in order, each to the output of
+the previous one (so ``Bearer token=abc`` loses both the token and the value).
+Each pass also reports how many redactions each rule made (for manifests).
+
+Usage:
+    from agent_tools.llm.redaction import default_ruleset, register_redaction_rule, RedactionRule
+
+    register_redaction_rule(RedactionRule(name="ssn", pattern=r"\\b\\d{3}-\\d{2}-\\d{4}\\b", replacement="[REDACTED-SSN]"))
+    result = default_ruleset().redact(text)
+    result.text, result.counts  # {"ssn": 2, ...}
+
+For text that arrives in pieces, use ``StreamingRedactor`` to avoid joining it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+
+@dataclass(frozen=True)
+class RedactionRule:
+    name: str  # identifier; keys the rule registry and the per-rule redaction counts
+    pattern: str
+    replacement: str  # may reference the rule's own groups, e.g. r"\1: [REDACTED]"
+    ignore_case: bool = False
+
+
+@dataclass(frozen=True)
+class RedactionResult:
+    text: str
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+DEFAULT_RULES: tuple[RedactionRule, ...] = (
+    RedactionRule(
+        name="secret_assignment",
+        pattern=r"(api[-_]?key|secret|token|password|credential|pwd)\s*[:=]\s*[a-zA-Z0-9_\-\.~]+",
+        replacement=r"\1: [REDACTED]",
+        ignore_case=True,
+    ),
+    RedactionRule(
+        name="bearer_token",
+        pattern=r"Bearer\s+[a-zA-Z0-9\-\._]+",
+        replacement="Bearer [REDACTED]",
+    ),
+)
+
+
+class RedactionRuleset:
+    """An ordered set of precompiled rules, applied one after another.
+
+    Rules are not merged into one alternation: a combined pass would let one
+    rule consume text that a later rule needs to see.
+    """
+
+    def __init__(self, rules: Iterable[RedactionRule]):
+        self._rules: tuple[RedactionRule, ...] = tuple(rules)
+        names = [r.name for r in self._rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate redaction rule names: {names}")
+        for name in names:
+            if not name.isidentifier():
+                raise ValueError(f"Redaction rule name must be an identifier: {name!r}")
+
+        self._compiled: list[tuple[RedactionRule, re.Pattern[str]]] = [
+            (r, re.compile(r.pattern, re.IGNORECASE if r.ignore_case else 0)) for r in self._rules
+        ]
+        self.fingerprint = hashlib.sha1(
+            "\n".join(f"{r.name}\t{r.pattern}\t{r.replacement}\t{r.ignore_case}" for r in self._rules).encode("utf-8")
+        ).hexdigest()[:12]
+
+    @property
+    def rules(self) -> tuple[RedactionRule, ...]:
+        return self._rules
+
+    def redact(self, text: str) -> RedactionResult:
+        counts: dict[str, int] = {}
+        if not text:
+            return RedactionResult(text="", counts=counts)
+        for rule, compiled in self._compiled:
+            text, n = compiled.subn(rule.replacement, text)
+            if n:
+                counts[rule.name] = counts.get(rule.name, 0) + n
+        return RedactionResult(text=text, counts=counts)
+
+    def iter_matches(self, text: str) -> Iterable[re.Match[str]]:
+        """Matches of every rule in ``text`` (rule by rule, possibly overlapping)."""
+
+        return itertools.chain.from_iterable(compiled.finditer(text) for _, compiled in self._compiled)
+
+
+class StreamingRedactor:
+    """Apply a ruleset to text fed in arbitrary pieces.
+
+    The tail of the buffer (``holdback`` chars, extended to the start of any rule's
+    match that reaches into it) is withheld until more text arrives, so secrets split
+    across piece boundaries are still redacted. Call ``flush()`` at the end.
+    """
+
+    def __init__(self, ruleset: Optional[RedactionRuleset] = None, *, holdback: int = 512):
+        self._ruleset = ruleset or default_ruleset()
+        self._holdback = max(1, int(holdback))
+        self._buf = ""
+        self.counts: dict[str, int] = {}
+
+    def _emit(self, final: bool) -> str:
+        buf = self._buf
+        cut = len(buf) if final else max(0, len(buf) - self._holdback)
+        # Move the cut back until no rule's match straddles it.
+        moved = not final
+        while moved:
+            moved = False
+            for m in self._ruleset.iter_matches(buf):
+                if m.start() < cut < m.end():
+                    cut = m.start()
+                    moved = True
+
+        result = self._ruleset.redact(buf[:cut])
+        for k, v in result.counts.items():
+            self.counts[k] = self.counts.get(k, 0) + v
+        self._buf = buf[cut:]
+        return result.text
+
+    def feed(self, piece: str) -> str:
+        self._buf += piece or ""
+        return self._emit(final=False)
+
+    def flush(self) -> str:
+        return self._emit(final=True)
+
+
+_REGISTRY: dict[str, RedactionRule] = {r.name: r for r in DEFAULT_RULES}
+_DEFAULT_RULESET: Optional[RedactionRuleset] = None
+
+
+def register_redaction_rule(rule: RedactionRule, *, replace: bool = False) -> None:
+    """Add a rule to the process-wide default ruleset used by ``sanitize_text``."""
+
+    global _DEFAULT_RULESET
+    if rule.name in _REGISTRY and not replace:
+        raise ValueError(f"Redaction rule already registered: {rule.name!r}")
+    _REGISTRY[rule.name] = rule
+    _DEFAULT_RULESET = None
+
+
+def unregister_redaction_rule(name: str) -> None:
+    global _DEFAULT_RULESET
+    _REGISTRY.pop(name, None)
+    _DEFAULT_RULESET = None
+
+
+def default_ruleset() -> RedactionRuleset:
+    """Return the compiled ruleset for all registered rules (cached until the registry changes)."""
+
+    global _DEFAULT_RULESET
+    if _DEFAULT_RULESET is None:
+        _DEFAULT_RULESET = RedactionRuleset(_REGISTRY.values())
+    return _DEFAULT_RULESET
+
+
+def merge_counts(total: dict[str, int], counts: dict[str, int]) -> dict[str, int]:
+    for k, v in counts.items():
+        total[k] = total.get(k, 0) + int(v)
+    return total
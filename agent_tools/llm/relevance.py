@@ -0,0 +1,97 @@
+"""Local BM25 ranking of chunks for query-focused synthesis.
+
+For "what does this data room say about pricing" runs, most chunks are
+irrelevant to the question but would still go through the full map prompt.
+``select_chunks`` scores a document's chunks against the query with BM25
+(no model calls, no extra dependencies) and keeps:
+
+- the ``top_k`` best-scoring chunks that match at least one query term, and
+- a coverage sample of every ``sample_every``-th chunk (always including the
+  first), so document context and non-keyword phrasing are not lost entirely.
+
+The synthesizers report everything else as skipped pages / chunks in the
+Coverage / Limit Warnings section (``QUERY_FILTERED``).
+
+Tokens are lowercased alphanumeric runs with English stopwords removed and a
+light suffix strip (``prices`` / ``pricing`` / ``price`` -> ``pric``).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SUFFIXES = ("ing", "ed", "es", "s", "e")
+_STOPWORDS = frozenset(
+    "a about an and are as at be by does did do for from has have how in is it its of on or say says "
+    "that the this these those to was were what when where which who why will with".split()
+)
+
+
+@dataclass(frozen=True)
+class FocusOptions:
+    query: str
+    top_k: int = 8  # best-scoring chunks per document
+    sample_every: int = 10  # also send every Nth chunk (0 = no coverage sample)
+
+
+@dataclass(frozen=True)
+class FocusSelection:
+    keep: list[int]  # 0-based chunk indices to send, in document order
+    top: list[int]
+    sample: list[int]
+    scores: list[float]
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(t) for t in _TOKEN.findall((text or "").lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def bm25_scores(query: str, documents: list[str], *, k1: float = 1.2, b: float = 0.75) -> list[float]:
+    """Okapi BM25 score of each document for ``query`` (IDF over ``documents``)."""
+
+    terms = set(tokenize(query))
+    docs = [Counter(tokenize(d)) for d in documents]
+    if not terms or not docs:
+        return [0.0] * len(documents)
+
+    n = len(docs)
+    lengths = [sum(c.values()) for c in docs]
+    avg_len = (sum(lengths) / n) or 1.0
+    idf = {}
+    for t in terms:
+        df = sum(1 for c in docs if t in c)
+        idf[t] = math.log((n - df + 0.5) / (df + 0.5) + 1.0)
+
+    scores = []
+    for counts, length in zip(docs, lengths):
+        s = 0.0
+        for t in terms:
+            tf = counts.get(t, 0)
+            if tf:
+                s += idf[t] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(s)
+    return scores
+
+
+def select_chunks(texts: list[str], focus: FocusOptions) -> FocusSelection:
+    """Chunks to send for ``focus.query``: top-scoring matches plus the coverage sample."""
+
+    scores = bm25_scores(focus.query, texts)
+    ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: (-scores[i], i))
+    top = sorted(ranked[: max(0, int(focus.top_k))])
+    step = int(focus.sample_every)
+    sample = list(range(0, len(texts), step)) if step > 0 else []
+    if not top and not sample and texts:
+        sample = [0]
+    return FocusSelection(keep=sorted(set(top) | set(sample)), top=top, sample=sample, scores=scores)
@@ -0,0 +1,145 @@
+"""Circuit breaking and latency tracking for Azure OpenAI deployments.
+
+``CircuitBreaker`` fast-fails calls to a deployment after
+``failure_threshold`` consecutive failures (timeouts, connection errors, 5xx),
+instead of letting every chunk burn its retries against a degraded endpoint.
+After ``reset_s`` one probe request is let through (half-open); success closes
+the circuit, failure re-opens it. 429s are not failures here: throttling is
+handled by backoff and the adaptive concurrency limiter.
+
+``observe_latency`` / ``latency_percentile`` keep a rolling window of
+successful-call latencies per (deployment, phase); the Responses client uses it
+to pick the hedge delay for reduce calls.
+
+Both are process-wide per deployment so parallel paths share state. Pass
+``endpoint`` (the API URL) so same-named deployments in different resources or
+regions get their own state.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Literal, Optional
+
+from agent_tools.llm.telemetry import percentile, record_retry
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+_LATENCY_WINDOW = 200
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while a deployment's circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, *, failure_threshold: int = 5, reset_s: float = 60.0):
+        self.name = name
+        self.failure_threshold = int(failure_threshold)
+        self.reset_s = float(reset_s)
+        self._lock = threading.Lock()
+        self._state: CircuitState = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def is_open(self) -> bool:
+        """True while requests would be refused (open and not yet due for a probe)."""
+
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            return self._state == "open" and time.monotonic() - self._opened_at < self.reset_s
+
+    def before_request(self) -> bool:
+        """Raise ``CircuitOpenError`` unless a request may be sent now.
+
+        Returns True when the request is the half-open probe; the caller must
+        then end it with ``record_success``, ``record_failure`` or ``release``.
+        """
+
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            if self._state == "closed":
+                return False
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_s:
+                self._state = "half_open"
+                self._probe_in_flight = False
+            if self._state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                record_retry(kind="circuit_probe", error=f"{self.name}: probing after {self.reset_s:.0f}s open")
+                return True
+            retry_in = max(0.0, self.reset_s - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(
+            f"Circuit open for deployment {self.name} after {self._failures} consecutive failures; "
+            f"failing fast (next probe in {retry_in:.0f}s)"
+        )
+
+    def release(self, probe: bool) -> None:
+        """End a request without an outcome (e.g. it raised before an answer); frees the probe slot."""
+
+        if not probe:
+            return
+        with self._lock:
+            if self._state == "half_open":
+                self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                record_retry(kind="circuit_closed", error=f"{self.name}: probe succeeded")
+            self._state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: str = "") -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            reopen = self._state == "half_open"
+            if reopen or (self._state == "closed" and self._failures >= self.failure_threshold):
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+                record_retry(kind="circuit_open", error=f"{self.name}: {error}")
+
+
+_breakers: dict[tuple[str, str], CircuitBreaker] = {}
+_latencies: dict[tuple[str, str], deque[float]] = {}
+_lock = threading.Lock()
+
+
+def deployment_breaker(
+    deployment_name: str, *, failure_threshold: int, reset_s: float, endpoint: str = ""
+) -> CircuitBreaker:
+    key = (endpoint, deployment_name)
+    with _lock:
+        b = _breakers.get(key)
+        if b is None or (b.failure_threshold, b.reset_s) != (int(failure_threshold), float(reset_s)):
+            b = CircuitBreaker(deployment_name, failure_threshold=failure_threshold, reset_s=reset_s)
+            _breakers[key] = b
+        return b
+
+
+def observe_latency(deployment_name: str, phase: str, latency_s: float) -> None:
+    with _lock:
+        window = _latencies.setdefault((deployment_name, phase), deque(maxlen=_LATENCY_WINDOW))
+        window.append(float(latency_s))
+
+
+def latency_percentile(deployment_name: str, phase: str, pct: float, *, min_samples: int = 5) -> Optional[float]:
+    """Nearest-rank percentile of recent latencies, or None with too few samples."""
+
+    with _lock:
+        values = list(_latencies.get((deployment_name, phase), ()))
+    if len(values) < max(1, min_samples):
+        return None
+    return percentile(values, pct)
@@ -0,0 +1,292 @@
+"""Structural segmentation of extracted text into headings, paragraphs and tables.
+
+Chunkers that cut on page boundaries or raw character offsets split sections
+and tables mid-way, which is what ``overlap_pages`` papers over (at the cost
+of sending the overlap twice). ``segment_text`` / ``segment_pages`` turn
+extracted text into ``Block`` units using layout heuristics that work on
+PyPDF2 / plain-text output:
+
+- heading: a short line (<= 12 words, no trailing ``.``/``,``/``;``) that is a
+  markdown heading, numbered (``3.2 Scope``), prefixed with
+  Chapter/Section/Appendix/Part, ALL CAPS, or Title Case;
+- table: two or more consecutive rows with 3+ cells (tabs, runs of spaces or
+  ``|``) or mostly-numeric tokens;
+- paragraph: everything else, ending at a blank line or at a short line that
+  ends a sentence.
+
+``pack_blocks`` then fills chunks up to a target size on block boundaries:
+a new section starts a new chunk when it would not fit, a chunk never ends on
+a heading, and a section continued in the next chunk is re-labelled
+``<heading> (continued)`` instead of repeating earlier text. Blocks larger
+than a chunk are split by table rows (repeating the header row) or sentences.
+"""
+
+from __future__ import annotations
+
+import re
+import statistics
+from dataclasses import dataclass, replace
+from typing import Iterable, Literal, Optional
+
+BlockKind = Literal["heading", "paragraph", "table"]
+
+
+@dataclass(frozen=True)
+class Block:
+    kind: BlockKind
+    text: str
+    page_number: Optional[int] = None  # 1-based; None for non-paged text
+
+
+_MAX_HEADING_WORDS = 12
+_MAX_HEADING_CHARS = 100
+_SECTION_PREFIX = re.compile(r"^(chapter|section|appendix|part|article|schedule|exhibit)\s+[\dIVXLC]+\b", re.I)
+_NUMBERED = re.compile(r"^(\d+(\.\d+)*\.?|[A-Z]\.|[IVXLC]+\.)\s+\S")
+_CELL_SPLIT = re.compile(r"\t+|\s{2,}|\s*\|\s*")
+_NUMERIC = re.compile(r"^[(\-+$€£]?[\d.,:/%]+[)%]?$")
+_SENTENCE_END = re.compile(r"[.!?:][\"')\]]*$")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_SMALL_WORDS = {"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "vs", "with"}
+
+_PAGE_NUMBER = re.compile(r"^(page\s+)?\d{1,4}(\s+(of|/)\s+\d{1,4})?$", re.I)
+
+_PAGE_MARKER_COST = len("--- Page 0000 ---") + 2
+
+
+def _is_heading(line: str) -> bool:
+    s = line.strip()
+    if not s or len(s) > _MAX_HEADING_CHARS or s[-1] in ".,;":
+        return False
+    if s.startswith("#"):
+        return True
+    words = s.split()
+    if len(words) > _MAX_HEADING_WORDS:
+        return False
+    if _SECTION_PREFIX.match(s) or _NUMBERED.match(s):
+        return True
+    letters = [c for c in s if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        return True
+    alpha_words = [w for w in words if w[0].isalpha()]
+    if len(alpha_words) < 2 or len(words) > 8:
+        return False
+    capitalized = [w for w in alpha_words if w[0].isupper() or w.lower() in _SMALL_WORDS]
+    return len(capitalized) == len(alpha_words) and alpha_words[0][0].isupper()
+
+
+def _is_table_row(line: str) -> bool:
+    s = line.strip()
+    if not s:
+        return False
+    if s.count("|") >= 2:
+        return True
+    if len([c for c in _CELL_SPLIT.split(s) if c]) >= 3:
+        return True
+    tokens = s.split()
+    numeric = sum(1 for t in tokens if _NUMERIC.match(t))
+    return numeric >= 3 and numeric * 2 > len(tokens)
+
+
+def segment_text(text: str, *, page_number: Optional[int] = None) -> list[Block]:
+    """Split extracted text into heading / paragraph / table blocks (in order)."""
+
+    lines = (text or "").splitlines()
+    widths = [len(line.rstrip()) for line in lines if line.strip()]
+    # Lines well short of the typical width that end a sentence close a paragraph.
+    short_line = 0.75 * statistics.median(widths) if widths else 0
+
+    blocks: list[Block] = []
+    para: list[str] = []
+    rows: list[str] = []
+
+    def flush_para() -> None:
+        if para:
+            blocks.append(Block("paragraph", "\n".join(para), page_number))
+            para.clear()
+
+    def flush_rows() -> None:
+        if len(rows) >= 2:
+            flush_para()
+            blocks.append(Block("table", "\n".join(rows), page_number))
+        else:
+            para.extend(rows)
+        rows.clear()
+
+    for raw in lines:
+        line = raw.rstrip()
+        if not line.strip():
+            flush_rows()
+            flush_para()
+            continue
+
+        if _is_table_row(line):
+            rows.append(line)
+            continue
+        flush_rows()
+
+        # A heading-looking line that continues a wrapped sentence is not a heading.
+        prev = para[-1] if para else ""
+        continues = bool(prev) and not _SENTENCE_END.search(prev) and len(prev) >= short_line
+        if _is_heading(line) and not continues:
+            flush_para()
+            blocks.append(Block("heading", line.strip(), page_number))
+            continue
+
+        para.append(line)
+        if _SENTENCE_END.search(line) and len(line) < short_line:
+            flush_para()
+
+    flush_rows()
+    flush_para()
+    return blocks
+
+
+def segment_pages(pages: Iterable[tuple[int, str]]) -> list[Block]:
+    """``segment_text`` over ``(page_number, text)`` pairs, tagging each block with its page.
+
+    Running headers/footers (short blocks repeated on at least half of 3+ pages)
+    are kept only where they first appear, and bare page numbers at the top or
+    bottom of a page are dropped: they are not section headings and would
+    otherwise be sent once per page.
+    """
+
+    per_page = [segment_text(text, page_number=page_number) for page_number, text in pages]
+
+    seen_on: dict[str, int] = {}
+    for blocks in per_page:
+        for text in {b.text for b in blocks if len(b.text) <= _MAX_HEADING_CHARS}:
+            seen_on[text] = seen_on.get(text, 0) + 1
+    threshold = max(3, (len(per_page) + 1) // 2)
+    furniture = {text for text, n in seen_on.items() if n >= threshold}
+
+    out: list[Block] = []
+    emitted: set[str] = set()
+    for blocks in per_page:
+        for i, b in enumerate(blocks):
+            if b.text in furniture:
+                if b.text in emitted:
+                    continue
+                emitted.add(b.text)
+            if (i == 0 or i == len(blocks) - 1) and _PAGE_NUMBER.match(b.text):
+                continue
+            out.append(b)
+    return out
+
+
+def _hard_split(text: str, limit: int) -> list[str]:
+    return [text[i : i + limit] for i in range(0, len(text), limit)]
+
+
+def _split_block(block: Block, limit: int) -> list[Block]:
+    """Split a block larger than ``limit`` on rows (tables) or sentences (everything else)."""
+
+    if len(block.text) <= limit:
+        return [block]
+
+    if block.kind == "table":
+        header, *body = block.text.splitlines()
+        parts: list[str] = []
+        current = [header]
+        for row in body:
+            if len(current) > 1 and sum(len(r) + 1 for r in current) + len(row) > limit:
+                parts.append("\n".join(current))
+                current = [header]
+            current.append(row)
+        parts.append("\n".join(current))
+        pieces = [p for part in parts for p in _hard_split(part, limit)]
+    else:
+        pieces = []
+        current_text = ""
+        for sentence in _SENTENCE_SPLIT.split(block.text):
+            if current_text and len(current_text) + 1 + len(sentence) > limit:
+                pieces.append(current_text)
+                current_text = ""
+            current_text = f"{current_text} {sentence}" if current_text else sentence
+            if len(current_text) > limit:
+                *full, current_text = _hard_split(current_text, limit)
+                pieces.extend(full)
+        if current_text:
+            pieces.append(current_text)
+
+    return [replace(block, text=p) for p in pieces if p.strip()]
+
+
+def render_blocks(blocks: list[Block], *, page_markers: bool = False) -> str:
+    """Chunk text for ``blocks``; with ``page_markers``, emit ``--- Page N ---`` when the page changes."""
+
+    parts: list[str] = []
+    page: Optional[int] = None
+    for b in blocks:
+        if page_markers and b.page_number is not None and b.page_number != page:
+            parts.append(f"--- Page {b.page_number} ---")
+            page = b.page_number
+        parts.append(b.text)
+    return "\n\n".join(parts).strip()
+
+
+def pack_blocks(
+    blocks: list[Block],
+    *,
+    target_chars: int,
+    max_chars: int,
+    page_markers: bool = False,
+) -> list[list[Block]]:
+    """Group blocks into chunks of about ``target_chars`` (never more than ``max_chars``) on block boundaries."""
+
+    # Headroom for a "(continued)" heading and page marker added to a chunk start.
+    reserve = min(_MAX_HEADING_CHARS + 2 * _PAGE_MARKER_COST, max_chars // 4)
+    pieces = [p for b in blocks for p in _split_block(b, max(1, max_chars - reserve))]
+
+    def cost(b: Block, prev: Optional[Block]) -> int:
+        marker = page_markers and b.page_number is not None and (prev is None or prev.page_number != b.page_number)
+        return len(b.text) + 2 + (_PAGE_MARKER_COST if marker else 0)
+
+    # Size of the section each heading opens (heading through the block before the next heading).
+    section_chars: dict[int, int] = {}
+    open_heading: Optional[int] = None
+    for i, b in enumerate(pieces):
+        if b.kind == "heading":
+            open_heading = i
+            section_chars[i] = 0
+        if open_heading is not None:
+            section_chars[open_heading] += len(b.text) + 2
+
+    groups: list[list[Block]] = []
+    current: list[Block] = []
+    current_chars = 0
+    section: Optional[Block] = None  # heading of the section being packed
+
+    def start_chunk(carry: list[Block], first: Block) -> None:
+        nonlocal current, current_chars
+        current = list(carry)
+        if not carry and section is not None and first.kind != "heading":
+            current.append(Block("heading", f"{section.text} (continued)", first.page_number))
+        current_chars = sum(cost(b, p) for b, p in zip(current, [None, *current[:-1]]))
+
+    for i, b in enumerate(pieces):
+        c = cost(b, current[-1] if current else None)
+        if current:
+            overflow = current_chars + c > target_chars
+            # Start a section on a fresh chunk when it would not fit in the rest of this one.
+            section_break = (
+                b.kind == "heading"
+                and current_chars >= target_chars // 2
+                and current_chars + section_chars.get(i, 0) > target_chars
+            )
+            if overflow or section_break:
+                # Never end a chunk on a heading: carry trailing headings into the next chunk.
+                carry: list[Block] = []
+                while current and current[-1].kind == "heading" and len(carry) < len(current) - 1:
+                    carry.insert(0, current.pop())
+                groups.append(current)
+                start_chunk(carry, carry[0] if carry else b)
+                c = cost(b, current[-1] if current else None)
+
+        if b.kind == "heading" and not b.text.endswith("(continued)"):
+            section = b
+        current.append(b)
+        current_chars += c
+
+    if current:
+        groups.append(current)
+    return groups
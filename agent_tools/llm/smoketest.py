@@ -59,6 +59,7 @@ def _resolve_azure_config(*, model_name: str) -> AzureResponsesClientConfig:
         deployment_name=deployment_name,
         max_output_tokens=int(max_output_tokens),
         reasoning_effort=reasoning_effort,  # type: ignore[arg-type]
+        **(model.resilience_overrides() if model else {}),
     )
 
 
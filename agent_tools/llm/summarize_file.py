@@ -7,15 +7,25 @@ import time
 from dataclasses import asdict, dataclass
 from datetime import date
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Literal, Optional
 
-from agent_tools.llm.azure_openai_responses import (
-    AzureOpenAIResponsesClient,
-    AzureResponsesClientConfig,
-)
-from agent_tools.llm.document_extraction import PdfPageExtraction, extract_pdf_pages, sanitize_text
-from agent_tools.llm.env import load_repo_dotenv, read_azure_openai_env
-from agent_tools.llm.model_registry import load_models_config
+from agent_tools.llm.azure_openai_responses import AzureOpenAIResponsesClient
+from agent_tools.llm.batch import BatchOptions, BatchRequest, make_batch_backend, run_batch_map
+from agent_tools.llm.client_factory import get_client, resolve_azure_config
+from agent_tools.llm.concurrency import run_concurrently
+from agent_tools.llm.document_extraction import PdfPageExtraction, extract_pdf_pages_sanitized, peak_rss_bytes
+from agent_tools.llm.prompts import PromptSplit, map_pdf_prompt, map_text_prompt, prefix_split_record, reduce_prompt
+from agent_tools.llm.redaction import default_ruleset
+from agent_tools.llm.relevance import FocusOptions, FocusSelection, select_chunks
+from agent_tools.llm.resilience import CircuitOpenError
+from agent_tools.llm.segmentation import pack_blocks, render_blocks, segment_pages, segment_text
+from agent_tools.llm.telemetry import configure_ledger, record_retry, telemetry_context
+
+
+# "semantic": chunks follow headings/paragraphs/tables (see segmentation.py);
+# "pages": legacy packing on page boundaries with ``overlap_pages`` overlap.
+ChunkingMode = Literal["semantic", "pages"]
+CHUNKING_MODES: tuple[str, ...] = ("semantic", "pages")
 
 
 @dataclass(frozen=True)
@@ -42,41 +52,6 @@ class SynthesisManifest:
     warnings: list[CoverageWarning]
 
 
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[2]
-
-
-def _resolve_azure_config(*, model_name: str = "azure-gpt-5.4") -> AzureResponsesClientConfig:
-    repo_root = _repo_root()
-    load_repo_dotenv(repo_root)
-
-    env = read_azure_openai_env()
-    if not env.api_key:
-        raise RuntimeError("Missing AZURE_OPENAI_KEY in environment (.env)")
-
-    models = load_models_config(repo_root)
-    model = models.get(model_name)
-
-    deployment_name = (model.deployment_name if model else None) or env.deployment_name
-    candidate_url = (model.api_url if model else None) or env.responses_api_url or env.api_url
-
-    if not deployment_name:
-        raise RuntimeError("Missing deployment name (AZURE_OPENAI_DEPLOYMENT or config/models.json)")
-    if not candidate_url:
-        raise RuntimeError("Missing Responses API URL (AZURE_OPENAI_RESPONSES_URL or config/models.json)")
-
-    max_output_tokens = (model.max_output_tokens if model else None) or 8192
-    reasoning_effort = (model.reasoning_effort if model else None) or "medium"
-
-    return AzureResponsesClientConfig(
-        api_key=env.api_key,
-        responses_api_url=candidate_url,
-        deployment_name=deployment_name,
-        max_output_tokens=int(max_output_tokens),
-        reasoning_effort=reasoning_effort,  # type: ignore[arg-type]
-    )
-
-
 def _hash_page_fingerprint(text: str, *, head_chars: int = 2500, tail_chars: int = 2500) -> str:
     """Create a conservative page fingerprint.
 
@@ -286,6 +261,154 @@ def _pack_pages_into_chunks(
     return chunks, warnings
 
 
+def _pack_pages_semantic(
+    pages: list[PdfPageExtraction],
+    *,
+    target_chunk_chars: int,
+    max_chunk_chars: int,
+    max_chunks: Optional[int],
+) -> tuple[list[Chunk], list[CoverageWarning]]:
+    """Pack pages into chunks on heading/paragraph/table boundaries (no page overlap).
+
+    Page markers are kept wherever the page changes inside a chunk. Chunk page
+    ranges are widened over text-less pages so they still count as covered.
+    """
+
+    warnings: list[CoverageWarning] = [
+        CoverageWarning(code="PAGE_EXTRACTION_ERROR", message=f"Page {p.page_number} extraction error: {p.error}")
+        for p in pages
+        if p.error
+    ]
+
+    blocks = segment_pages((p.page_number, p.text or "") for p in pages)
+    if not blocks:
+        return _pack_pages_into_chunks(
+            pages,
+            target_chunk_chars=target_chunk_chars,
+            max_chunk_chars=max_chunk_chars,
+            overlap_pages=0,
+            max_chunks=max_chunks,
+        )
+
+    groups = pack_blocks(blocks, target_chars=target_chunk_chars, max_chars=max_chunk_chars, page_markers=True)
+    complete = max_chunks is None or len(groups) <= max_chunks
+    if not complete:
+        warnings.append(
+            CoverageWarning(
+                code="MAX_CHUNKS_REACHED",
+                message=(
+                    f"Reached max_chunks={max_chunks}; remaining pages were not synthesized. "
+                    "Increase max_chunks to ensure full coverage."
+                ),
+            )
+        )
+        groups = groups[:max_chunks]
+
+    ranges = [
+        [min(b.page_number for b in g if b.page_number is not None), max(b.page_number for b in g if b.page_number is not None)]
+        for g in groups
+    ]
+    ranges[0][0] = min(ranges[0][0], pages[0].page_number)
+    for prev, nxt in zip(ranges, ranges[1:]):
+        prev[1] = max(prev[1], nxt[0] - 1)
+    if complete:
+        ranges[-1][1] = max(ranges[-1][1], pages[-1].page_number)
+
+    chunks: list[Chunk] = []
+    for group, (start_page, end_page) in zip(groups, ranges):
+        text = render_blocks(group, page_markers=True)
+        if len(text) > max_chunk_chars:
+            warnings.append(
+                CoverageWarning(
+                    code="CHUNK_TRUNCATED",
+                    message=(
+                        f"Chunk {len(chunks)+1} exceeded max_chunk_chars ({max_chunk_chars}); "
+                        "truncated chunk text before sending to the model."
+                    ),
+                )
+            )
+            text = text[:max_chunk_chars]
+        chunks.append(
+            Chunk(chunk_index=len(chunks) + 1, start_page=start_page, end_page=end_page, text=text, chars=len(text))
+        )
+    return chunks, warnings
+
+
+def _chunk_pages(
+    pages: list[PdfPageExtraction],
+    *,
+    chunking: ChunkingMode,
+    target_chunk_chars: int,
+    max_chunk_chars: int,
+    overlap_pages: int,
+    max_chunks: Optional[int],
+) -> tuple[list[Chunk], list[CoverageWarning]]:
+    if chunking == "pages":
+        return _pack_pages_into_chunks(
+            pages,
+            target_chunk_chars=target_chunk_chars,
+            max_chunk_chars=max_chunk_chars,
+            overlap_pages=overlap_pages,
+            max_chunks=max_chunks,
+        )
+    return _pack_pages_semantic(
+        pages, target_chunk_chars=target_chunk_chars, max_chunk_chars=max_chunk_chars, max_chunks=max_chunks
+    )
+
+
+def _page_ranges(pages: Iterable[int]) -> str:
+    """``[3, 4, 5, 9]`` -> ``"3-5, 9"``."""
+
+    ranges: list[list[int]] = []
+    for p in sorted(set(pages)):
+        if ranges and p == ranges[-1][1] + 1:
+            ranges[-1][1] = p
+        else:
+            ranges.append([p, p])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def _focus_warning(focus: FocusOptions, selection: FocusSelection, total: int, skipped: str) -> CoverageWarning:
+    sample = f"coverage sample of every {focus.sample_every}th chunk" if focus.sample_every > 0 else "no coverage sample"
+    return CoverageWarning(
+        code="QUERY_FILTERED",
+        message=(
+            f"Query-focused mode ({focus.query!r}): sent {len(selection.keep)} of {total} chunks "
+            f"({len(selection.top)} top-scoring BM25 matches + {sample}); "
+            f"skipped {skipped}. Rerun without --query for full coverage."
+        ),
+    )
+
+
+def _focus_pdf_chunks(chunks: list[Chunk], focus: Optional[FocusOptions]) -> tuple[list[Chunk], Optional[CoverageWarning]]:
+    if focus is None or not chunks:
+        return chunks, None
+    selection = select_chunks([c.text for c in chunks], focus)
+    if len(selection.keep) == len(chunks):
+        return chunks, None
+
+    kept = [chunks[i] for i in selection.keep]
+    sent_pages = {p for c in kept for p in range(c.start_page, c.end_page + 1)}
+    skipped_pages = {p for c in chunks for p in range(c.start_page, c.end_page + 1)} - sent_pages
+    skipped = f"pages {_page_ranges(skipped_pages)}" if skipped_pages else "no whole pages"
+    return kept, _focus_warning(focus, selection, len(chunks), skipped)
+
+
+def _focus_text_chunks(packed: list[str], focus: Optional[FocusOptions]) -> tuple[list[int], Optional[CoverageWarning]]:
+    """1-based indices of ``packed`` chunks to map, plus the warning for skipped ones."""
+
+    everything = list(range(1, len(packed) + 1))
+    if focus is None or not packed:
+        return everything, None
+    selection = select_chunks(packed, focus)
+    if len(selection.keep) == len(packed):
+        return everything, None
+
+    keep = [i + 1 for i in selection.keep]
+    skipped = f"chunks {_page_ranges(set(everything) - set(keep))}"
+    return keep, _focus_warning(focus, selection, len(packed), skipped)
+
+
 def _split_text(text: str, max_chars: int) -> list[str]:
     if len(text) <= max_chars:
         return [text]
@@ -306,23 +429,20 @@ def _split_text(text: str, max_chars: int) -> list[str]:
     return [c for c in chunks if c]
 
 
-def synthesize_text(
-    *,
-    title: str,
+def _pack_text_chunks(
     text: str,
-    out_md_path: Path,
-    manifest_path: Optional[Path] = None,
-    model_name: str = "azure-gpt-5.4",
-    target_chunk_chars: int = 30_000,
-    max_chunk_chars: int = 45_000,
-    max_reduction_passes: int = 3,
-) -> None:
-    """Chunked map-reduce synthesis for non-PDF text (EML, TXT, MD, etc.)."""
-
-    safe = sanitize_text(text or "")
+    *,
+    target_chunk_chars: int,
+    max_chunk_chars: int,
+    chunking: ChunkingMode = "semantic",
+) -> list[str]:
+    if chunking == "semantic":
+        groups = pack_blocks(segment_text(text), target_chars=target_chunk_chars, max_chars=max_chunk_chars)
+        if groups:
+            return [render_blocks(g) for g in groups]
 
     # First split into hard-bounded pieces, then pack into target-ish chunks.
-    parts = _split_text(safe, max_chunk_chars)
+    parts = _split_text(text, max_chunk_chars)
 
     packed: list[str] = []
     buf: list[str] = []
@@ -337,6 +457,47 @@ def synthesize_text(
             buf_chars += len(p)
     if buf:
         packed.append("\n\n".join(buf).strip())
+    return packed
+
+
+def synthesize_text(
+    *,
+    title: str,
+    text: str,
+    out_md_path: Path,
+    manifest_path: Optional[Path] = None,
+    model_name: str = "azure-gpt-5.4",
+    target_chunk_chars: int = 30_000,
+    max_chunk_chars: int = 45_000,
+    max_reduction_passes: int = 3,
+    map_key: Optional[str] = None,
+    map_outputs: Optional[dict[str, str]] = None,
+    batch: Optional[BatchOptions] = None,
+    max_concurrency: int = 1,
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> None:
+    """Chunked map-reduce synthesis for non-PDF text (EML, TXT, MD, etc.).
+
+    Map outputs can come from a batch run: pass ``batch`` to submit this
+    document's map requests as one batch, or ``map_outputs`` (keyed by
+    ``custom_id``, see ``text_batch_requests``) when a caller already batched
+    several documents. Chunks without a batch result are mapped synchronously.
+
+    ``max_concurrency`` > 1 runs map calls on worker threads behind an adaptive
+    (AIMD) per-deployment limit that starts low and grows while healthy.
+
+    With ``focus``, only the chunks ``relevance.select_chunks`` picks for the
+    query are mapped; the rest are listed in a ``QUERY_FILTERED`` warning.
+    """
+
+    # Sanitize once up front; chunks are slices of already-redacted text.
+    redaction = default_ruleset().redact(text or "")
+    safe = redaction.text
+
+    packed = _pack_text_chunks(
+        safe, target_chunk_chars=target_chunk_chars, max_chunk_chars=max_chunk_chars, chunking=chunking
+    )
 
     warnings: list[CoverageWarning] = []
     if len(packed) > 1:
@@ -347,62 +508,47 @@ def synthesize_text(
             )
         )
 
-    cfg = _resolve_azure_config(model_name=model_name)
-    client = AzureOpenAIResponsesClient(cfg)
+    keep, focus_warn = _focus_text_chunks(packed, focus)
+    if focus_warn:
+        warnings.append(focus_warn)
 
-    system_map = "You extract accurate notes from provided document text."
-    system_reduce = "You synthesize multiple chunk summaries into a single accurate memo."
+    client = get_client(model_name, max_concurrency=max_concurrency)
 
-    chunk_summaries: list[str] = []
-    for i, chunk in enumerate(packed, start=1):
-        user_prompt = (
-            f"Summarize this chunk of a document titled: {title}.\n\n"
-            "Return Markdown with:\n"
-            "- Key points (bullets)\n"
-            "- Decisions / confirmations\n"
-            "- Open questions\n"
-            "- Action items (with owners if present)\n"
-            "- Notable metrics/claims (quote exact phrases when possible)\n\n"
-            "Do not invent details. If uncertain, say 'unknown'.\n\n"
-            f"CHUNK {i}/{len(packed)}:\n{sanitize_text(chunk)}"
-        )
+    key = map_key or title
+    map_requests = _text_map_requests(title, packed, key=key, keep=keep)
+    prompt_splits: list[PromptSplit] = [
+        PromptSplit(kind="map", instructions=r.instructions, user_prompt=r.user_prompt) for r in map_requests
+    ]
+    if batch is not None and map_outputs is None:
+        with telemetry_context(caller="summarize_file.synthesize_text"):
+            map_outputs = run_batch_map(map_requests, options=batch, client=client)
 
-        summary = _call_llm(
-            client,
-            user_prompt=user_prompt,
-            system_prompt=system_map,
-            timeout_s=300.0,
-            max_retries=6,
-        ).strip()
+    with telemetry_context(caller="summarize_file.synthesize_text", phase="map"):
+        summaries, batch_fallbacks = _run_map_requests(
+            client, map_requests, map_outputs=map_outputs, max_concurrency=max_concurrency
+        )
+    if batch_fallbacks:
+        warnings.append(_batch_fallback_warning(batch_fallbacks, len(map_requests)))
 
-        chunk_summaries.append(f"## Chunk {i}\n\n{summary}")
-        time.sleep(0.5)
+    chunk_summaries = [f"## Chunk {i}\n\n{summary}" for i, summary in zip(keep, summaries)]
 
     combined = "\n\n".join(chunk_summaries)
 
     reduction_pass = 0
     while True:
         reduction_pass += 1
-        user_prompt = (
-            f"Given the following chunk summaries from a single document titled: {title}, produce a consolidated, client-ready synthesis.\n\n"
-            "Output Markdown with:\n"
-            "1) Executive Summary (6-10 bullets)\n"
-            "2) Meeting Context\n"
-            "3) Key Decisions / Confirmations\n"
-            "4) Open Questions / Follow-ups\n"
-            "5) Risks / Dependencies\n"
-            "6) Suggested Next-Step Email (short draft)\n\n"
-            "Be faithful to the chunk summaries; do not invent. If something is unclear, mark as unknown.\n\n"
-            f"CHUNK SUMMARIES:\n{combined}"
-        )
-
-        final = _call_llm(
-            client,
-            user_prompt=user_prompt,
-            system_prompt=system_reduce,
-            timeout_s=300.0,
-            max_retries=6,
-        ).strip()
+        split = reduce_prompt(summaries=combined, title=title)
+        prompt_splits.append(split)
+
+        with telemetry_context(caller="summarize_file.synthesize_text", phase="reduce"):
+            final = _call_llm(
+                client,
+                user_prompt=split.user_prompt,
+                system_prompt=split.instructions,
+                timeout_s=300.0,
+                max_retries=6,
+                hedge=True,
+            ).strip()
 
         if len(final) <= max_chunk_chars or reduction_pass >= max_reduction_passes:
             if reduction_pass >= max_reduction_passes and len(final) > max_chunk_chars:
@@ -433,8 +579,12 @@ def synthesize_text(
             "## Extraction/Chunking Stats",
             f"- chars_input: {len(safe)}",
             f"- chunks: {len(packed)}",
+            f"- chunking: {chunking}",
+            f"- chunks_sent: {len(keep)}",
+            f"- chars_sent: {sum(len(packed[i - 1]) for i in keep)}",
             f"- target_chunk_chars: {target_chunk_chars}",
             f"- max_chunk_chars: {max_chunk_chars}",
+            f"- redactions: {sum(redaction.counts.values())}",
             "",
             "---",
             "",
@@ -451,9 +601,17 @@ def synthesize_text(
                     "title": title,
                     "generated_on": date.today().isoformat(),
                     "chars_input": len(safe),
+                    "redactions": redaction.counts,
                     "chunks": len(packed),
+                    "chunking": chunking,
+                    "chunks_sent": len(keep),
+                    "chars_sent": sum(len(packed[i - 1]) for i in keep),
+                    "focus": asdict(focus) if focus else None,
                     "target_chunk_chars": target_chunk_chars,
                     "max_chunk_chars": max_chunk_chars,
+                    "map_mode": "sync" if map_outputs is None else "batch",
+                    "batch_fallbacks": batch_fallbacks,
+                    "prompt_prefix": prefix_split_record(prompt_splits),
                     "warnings": [asdict(w) for w in warnings],
                 },
                 indent=2,
@@ -470,6 +628,7 @@ def _call_llm(
     system_prompt: str,
     timeout_s: float,
     max_retries: int,
+    hedge: bool = False,
 ) -> str:
     messages = [
         {"role": "system", "content": system_prompt},
@@ -482,19 +641,25 @@ def _call_llm(
     delay = 2.0
     for attempt in range(max_retries):
         try:
-            result = client.create_response(
+            # Hedging only kicks in when the model config enables it and reduce latency history exists.
+            result = client.create_response_hedged(
+                hedge_after_s=client.hedge_delay_s("reduce") if hedge else None,
                 input_data=input_data,
                 instructions=instructions,
                 timeout_s=timeout_s,
             )
             return client.extract_output_text(result)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             msg = str(e)
             if "429" in msg or "Too Many Requests" in msg:
+                record_retry(kind="rate_limited", wait_s=delay, error=msg)
                 time.sleep(delay)
                 delay *= 2
                 continue
             if "timed out" in msg.lower():
+                record_retry(kind="timeout", error=msg)
                 timeout_s += 60
                 continue
             raise
@@ -502,27 +667,137 @@ def _call_llm(
     raise RuntimeError(f"Max retries exceeded ({max_retries})")
 
 
-def synthesize_pdf(
+def _map_custom_id(key: str, index: int) -> str:
+    return f"{key}:{index:04d}"
+
+
+def _batch_request(custom_id: str, split: PromptSplit) -> BatchRequest:
+    return BatchRequest(custom_id=custom_id, instructions=split.instructions, user_prompt=split.user_prompt)
+
+
+def _text_map_requests(
+    title: str, packed: list[str], *, key: str, keep: Optional[list[int]] = None
+) -> list[BatchRequest]:
+    """Map requests for ``packed`` (only the 1-based ``keep`` indices when given; ids stay positional)."""
+
+    return [
+        _batch_request(
+            _map_custom_id(key, i),
+            map_text_prompt(title=title, index=i, total=len(packed), text=packed[i - 1]),
+        )
+        for i in (keep or range(1, len(packed) + 1))
+    ]
+
+
+def _pdf_map_requests(chunks: list[Chunk], *, key: str, title: str) -> list[BatchRequest]:
+    return [
+        _batch_request(
+            _map_custom_id(key, c.chunk_index),
+            map_pdf_prompt(title=title, start_page=c.start_page, end_page=c.end_page, text=c.text),
+        )
+        for c in chunks
+    ]
+
+
+def _run_map_requests(
+    client: AzureOpenAIResponsesClient,
+    map_requests: list[BatchRequest],
     *,
-    pdf_path: Path,
-    out_md_path: Path,
-    manifest_path: Optional[Path] = None,
-    model_name: str = "azure-gpt-5.4",
+    map_outputs: Optional[dict[str, str]] = None,
+    max_concurrency: int = 1,
+) -> tuple[list[str], int]:
+    """Return one summary per request, taking batch outputs where present.
+
+    The second value counts requests that were called synchronously even though
+    batch outputs were supplied (missing or failed batch items).
+    """
+
+    pending = [r for r in map_requests if map_outputs is None or r.custom_id not in map_outputs]
+
+    def _map(r: BatchRequest) -> str:
+        summary = _call_llm(
+            client,
+            user_prompt=r.user_prompt,
+            system_prompt=r.instructions,
+            timeout_s=300.0,
+            max_retries=6,
+        )
+        if max_concurrency <= 1:
+            time.sleep(0.5)  # Sequential pacing; concurrent runs are paced by the limiter.
+        return summary
+
+    called = dict(zip((r.custom_id for r in pending), run_concurrently(_map, pending, max_workers=max_concurrency)))
+    outputs = {**(map_outputs or {}), **called}
+    summaries = [outputs[r.custom_id].strip() for r in map_requests]
+    fallbacks = len(pending) if map_outputs is not None else 0
+    return summaries, fallbacks
+
+
+def _batch_fallback_warning(fallbacks: int, total: int) -> CoverageWarning:
+    return CoverageWarning(
+        code="BATCH_MAP_FALLBACK",
+        message=f"{fallbacks} of {total} map requests had no batch result and were called synchronously.",
+    )
+
+
+def text_batch_requests(
+    *,
+    title: str,
+    text: str,
+    map_key: Optional[str] = None,
     target_chunk_chars: int = 30_000,
     max_chunk_chars: int = 45_000,
-    overlap_pages: int = 1,
-    max_chunks: Optional[int] = None,
-    page_timeout_s: Optional[int] = 15,
-    max_reduction_passes: int = 3,
-    save_chunk_summaries_dir: Optional[Path] = None,
-) -> None:
-    pages_raw = extract_pdf_pages(pdf_path, page_timeout_s=page_timeout_s)
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> list[BatchRequest]:
+    """Map requests ``synthesize_text`` would issue for this text (same chunking and ids)."""
+
+    safe = default_ruleset().redact(text or "").text
+    packed = _pack_text_chunks(
+        safe, target_chunk_chars=target_chunk_chars, max_chunk_chars=max_chunk_chars, chunking=chunking
+    )
+    keep, _ = _focus_text_chunks(packed, focus)
+    return _text_map_requests(title, packed, key=map_key or title, keep=keep)
+
+
+@dataclass(frozen=True)
+class _PreparedPdf:
+    pages_raw: list[PdfPageExtraction]
+    chunks: list[Chunk]  # chunks to map (after query filtering)
+    chunks_total: int
+    warnings: list[CoverageWarning]
+    extraction_stats: dict[str, Any]
+    deduped_page_numbers: list[int]
+    redaction_counts: dict[str, int]
+
+
+def _prepare_pdf(
+    pdf_path: Path,
+    *,
+    target_chunk_chars: int,
+    max_chunk_chars: int,
+    overlap_pages: int,
+    max_chunks: Optional[int],
+    page_timeout_s: Optional[int],
+    extraction_cache_dir: Optional[Path],
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> _PreparedPdf:
+    # Pages are sanitized once here (and cached with the extraction when a cache
+    # dir is given); chunk text is built from already-redacted pages.
+    pages_raw, redaction_counts, extraction_cache_hit = extract_pdf_pages_sanitized(
+        pdf_path,
+        cache_dir=extraction_cache_dir,
+        page_timeout_s=page_timeout_s,
+    )
 
     extraction_stats = {
         "pages_total": len(pages_raw),
         "pages_with_text": sum(1 for p in pages_raw if (p.text or "").strip()),
         "pages_with_error": sum(1 for p in pages_raw if p.error),
         "total_extracted_chars": sum(len(p.text or "") for p in pages_raw),
+        "redactions": redaction_counts,
+        "cache_hit": extraction_cache_hit,
     }
 
     pages, dedupe_warn = _dedupe_redundant_pages(pages_raw)
@@ -535,14 +810,16 @@ def synthesize_pdf(
     if dedupe_warn:
         warnings.append(dedupe_warn)
 
-    chunks, chunk_warnings = _pack_pages_into_chunks(
+    chunks, chunk_warnings = _chunk_pages(
         pages,
+        chunking=chunking,
         target_chunk_chars=target_chunk_chars,
         max_chunk_chars=max_chunk_chars,
         overlap_pages=overlap_pages,
         max_chunks=max_chunks,
     )
     warnings.extend(chunk_warnings)
+    extraction_stats["peak_rss_bytes"] = peak_rss_bytes()
 
     # If max_chunks truncated, compute omitted pages (excluding pages dropped due to dedupe).
     processed_pages = set()
@@ -565,38 +842,119 @@ def synthesize_pdf(
             )
         )
 
-    cfg = _resolve_azure_config(model_name=model_name)
-    client = AzureOpenAIResponsesClient(cfg)
+    chunks_total = len(chunks)
+    chunks, focus_warn = _focus_pdf_chunks(chunks, focus)
+    if focus_warn:
+        warnings.append(focus_warn)
+
+    return _PreparedPdf(
+        pages_raw=pages_raw,
+        chunks=chunks,
+        chunks_total=chunks_total,
+        warnings=warnings,
+        extraction_stats=extraction_stats,
+        deduped_page_numbers=deduped_page_numbers,
+        redaction_counts=redaction_counts,
+    )
+
+
+def pdf_batch_requests(
+    *,
+    pdf_path: Path,
+    map_key: Optional[str] = None,
+    target_chunk_chars: int = 30_000,
+    max_chunk_chars: int = 45_000,
+    overlap_pages: int = 1,
+    max_chunks: Optional[int] = None,
+    page_timeout_s: Optional[int] = 15,
+    extraction_cache_dir: Optional[Path] = None,
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> list[BatchRequest]:
+    """Map requests ``synthesize_pdf`` would issue for this PDF (same chunking and ids)."""
+
+    prepared = _prepare_pdf(
+        pdf_path,
+        target_chunk_chars=target_chunk_chars,
+        max_chunk_chars=max_chunk_chars,
+        overlap_pages=overlap_pages,
+        max_chunks=max_chunks,
+        page_timeout_s=page_timeout_s,
+        extraction_cache_dir=extraction_cache_dir,
+        chunking=chunking,
+        focus=focus,
+    )
+    return _pdf_map_requests(prepared.chunks, key=map_key or pdf_path.stem, title=pdf_path.name)
+
+
+def synthesize_pdf(
+    *,
+    pdf_path: Path,
+    out_md_path: Path,
+    manifest_path: Optional[Path] = None,
+    model_name: str = "azure-gpt-5.4",
+    target_chunk_chars: int = 30_000,
+    max_chunk_chars: int = 45_000,
+    overlap_pages: int = 1,
+    max_chunks: Optional[int] = None,
+    page_timeout_s: Optional[int] = 15,
+    max_reduction_passes: int = 3,
+    save_chunk_summaries_dir: Optional[Path] = None,
+    extraction_cache_dir: Optional[Path] = None,
+    map_key: Optional[str] = None,
+    map_outputs: Optional[dict[str, str]] = None,
+    batch: Optional[BatchOptions] = None,
+    max_concurrency: int = 1,
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> None:
+    """Chunked map-reduce synthesis for a PDF.
+
+    ``map_key`` / ``map_outputs`` / ``batch`` / ``max_concurrency`` / ``focus``
+    behave as in ``synthesize_text``; ids match ``pdf_batch_requests``. ``overlap_pages`` only
+    applies to ``chunking="pages"``; semantic chunks do not overlap.
+    """
+
+    prepared = _prepare_pdf(
+        pdf_path,
+        target_chunk_chars=target_chunk_chars,
+        max_chunk_chars=max_chunk_chars,
+        overlap_pages=overlap_pages,
+        max_chunks=max_chunks,
+        page_timeout_s=page_timeout_s,
+        extraction_cache_dir=extraction_cache_dir,
+        chunking=chunking,
+        focus=focus,
+    )
+    chunks = prepared.chunks
+    warnings = prepared.warnings
+    extraction_stats = prepared.extraction_stats
+    deduped_page_numbers = prepared.deduped_page_numbers
+    redaction_counts = prepared.redaction_counts
+
+    client = get_client(model_name, max_concurrency=max_concurrency)
 
     if save_chunk_summaries_dir:
         save_chunk_summaries_dir.mkdir(parents=True, exist_ok=True)
 
-    system_map = "You extract accurate notes from provided document text."
-    system_reduce = "You synthesize multiple chunk summaries into a single accurate memo."
+    key = map_key or pdf_path.stem
+    map_requests = _pdf_map_requests(chunks, key=key, title=pdf_path.name)
+    prompt_splits: list[PromptSplit] = [
+        PromptSplit(kind="map", instructions=r.instructions, user_prompt=r.user_prompt) for r in map_requests
+    ]
+    if batch is not None and map_outputs is None:
+        with telemetry_context(caller="summarize_file.synthesize_pdf"):
+            map_outputs = run_batch_map(map_requests, options=batch, client=client)
 
-    chunk_summaries: list[str] = []
-    for c in chunks:
-        user_prompt = (
-            "Summarize this chunk of a PDF.\n\n"
-            "Return Markdown with:\n"
-            "- Key points (bullets)\n"
-            "- Decisions / confirmations\n"
-            "- Open questions\n"
-            "- Action items (with owners if present)\n"
-            "- Notable metrics/claims (quote exact phrases when possible)\n\n"
-            "Do not invent details. If uncertain, say 'unknown'.\n\n"
-            f"Chunk pages: {c.start_page}-{c.end_page}\n\n"
-            f"TEXT:\n{sanitize_text(c.text)}"
+    with telemetry_context(caller="summarize_file.synthesize_pdf", phase="map"):
+        summaries, batch_fallbacks = _run_map_requests(
+            client, map_requests, map_outputs=map_outputs, max_concurrency=max_concurrency
         )
+    if batch_fallbacks:
+        warnings.append(_batch_fallback_warning(batch_fallbacks, len(map_requests)))
 
-        summary = _call_llm(
-            client,
-            user_prompt=user_prompt,
-            system_prompt=system_map,
-            timeout_s=300.0,
-            max_retries=6,
-        ).strip()
-
+    chunk_summaries: list[str] = []
+    for c, summary in zip(chunks, summaries):
         labeled = f"## Chunk {c.chunk_index} (pages {c.start_page}-{c.end_page})\n\n{summary}"
         chunk_summaries.append(labeled)
 
@@ -605,34 +963,24 @@ def synthesize_pdf(
                 labeled + "\n", encoding="utf-8"
             )
 
-        time.sleep(0.5)
-
     combined = "\n\n".join(chunk_summaries)
 
     # Reduce pass(es)
     reduction_pass = 0
     while True:
         reduction_pass += 1
-        user_prompt = (
-            "Given the following chunk summaries from a single document, produce a consolidated, client-ready synthesis.\n\n"
-            "Output Markdown with:\n"
-            "1) Executive Summary (6-10 bullets)\n"
-            "2) Meeting Context\n"
-            "3) Key Decisions / Confirmations\n"
-            "4) Open Questions / Follow-ups\n"
-            "5) Risks / Dependencies\n"
-            "6) Suggested Next-Step Email (short draft)\n\n"
-            "Be faithful to the chunk summaries; do not invent. If something is unclear, mark as unknown.\n\n"
-            f"CHUNK SUMMARIES:\n{combined}"
-        )
-
-        final = _call_llm(
-            client,
-            user_prompt=user_prompt,
-            system_prompt=system_reduce,
-            timeout_s=300.0,
-            max_retries=6,
-        ).strip()
+        split = reduce_prompt(summaries=combined, title=pdf_path.name)
+        prompt_splits.append(split)
+
+        with telemetry_context(caller="summarize_file.synthesize_pdf", phase="reduce"):
+            final = _call_llm(
+                client,
+                user_prompt=split.user_prompt,
+                system_prompt=split.instructions,
+                timeout_s=300.0,
+                max_retries=6,
+                hedge=True,
+            ).strip()
 
         # If the reduce output is still huge, do another pass (summary-of-summary).
         if len(final) <= max_chunk_chars or reduction_pass >= max_reduction_passes:
@@ -668,12 +1016,15 @@ def synthesize_pdf(
             f"- Pages with text: {extraction_stats['pages_with_text']}",
             f"- Pages with extraction errors: {extraction_stats['pages_with_error']}",
             f"- Total extracted chars: {extraction_stats['total_extracted_chars']}",
+            f"- Redactions: {sum(redaction_counts.values())}",
             "",
             "## Chunking Stats",
-            f"- Chunks: {len(chunks)}",
+            f"- Chunks: {len(chunks)}" + (f" of {prepared.chunks_total} (query-focused)" if focus else ""),
+            f"- Chunking: {chunking}",
+            f"- Chars sent: {sum(c.chars for c in chunks)}",
             f"- target_chunk_chars: {target_chunk_chars}",
             f"- max_chunk_chars: {max_chunk_chars}",
-            f"- overlap_pages: {overlap_pages}",
+            f"- overlap_pages: {overlap_pages if chunking == 'pages' else 0}",
             f"- max_chunks: {max_chunks}",
             f"- page_timeout_s: {page_timeout_s}",
             "",
@@ -692,11 +1043,18 @@ def synthesize_pdf(
             extraction=extraction_stats,
             chunking={
                 "chunks": len(chunks),
+                "chunks_total": prepared.chunks_total,
+                "mode": chunking,
+                "focus": asdict(focus) if focus else None,
+                "chars_sent": sum(c.chars for c in chunks),
                 "target_chunk_chars": target_chunk_chars,
                 "max_chunk_chars": max_chunk_chars,
-                "overlap_pages": overlap_pages,
+                "overlap_pages": overlap_pages if chunking == "pages" else 0,
                 "max_chunks": max_chunks,
                 "page_timeout_s": page_timeout_s,
+                "map_mode": "sync" if map_outputs is None else "batch",
+                "batch_fallbacks": batch_fallbacks,
+                "prompt_prefix": prefix_split_record(prompt_splits),
             },
             warnings=warnings,
         )
@@ -713,6 +1071,18 @@ def synthesize_pdf(
         )
 
 
+def focus_options_from_args(args: argparse.Namespace) -> Optional[FocusOptions]:
+    """``FocusOptions`` from ``--query`` / ``--query-top-k`` / ``--query-sample-every`` (None without a query)."""
+
+    if not (args.query or "").strip():
+        return None
+    return FocusOptions(
+        query=args.query.strip(),
+        top_k=max(1, int(args.query_top_k)),
+        sample_every=max(0, int(args.query_sample_every)),
+    )
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Chunked PDF synthesizer (local-first)")
     parser.add_argument("--pdf", required=True, help="Path to a PDF to synthesize")
@@ -721,13 +1091,53 @@ def main(argv: Optional[list[str]] = None) -> int:
     parser.add_argument("--model", default="azure-gpt-5.4", help="Model name from config/models.json")
     parser.add_argument("--target-chunk-chars", type=int, default=30000)
     parser.add_argument("--max-chunk-chars", type=int, default=45000)
-    parser.add_argument("--overlap-pages", type=int, default=1)
+    parser.add_argument(
+        "--chunking",
+        choices=CHUNKING_MODES,
+        default="semantic",
+        help="semantic = chunk on headings/paragraphs/tables; pages = legacy page packing with --overlap-pages",
+    )
+    parser.add_argument("--overlap-pages", type=int, default=1, help="Pages repeated between chunks (--chunking pages)")
     parser.add_argument("--max-chunks", type=int, default=0)
     parser.add_argument("--page-timeout-s", type=int, default=15)
     parser.add_argument("--max-reduction-passes", type=int, default=3)
+    parser.add_argument(
+        "--query",
+        default="",
+        help="Query-focused mode: only map chunks that rank highest for this query (BM25) plus a coverage sample",
+    )
+    parser.add_argument("--query-top-k", type=int, default=8, help="Top-scoring chunks to map per document (--query)")
+    parser.add_argument(
+        "--query-sample-every",
+        type=int,
+        default=10,
+        help="Also map every Nth chunk for coverage (--query; 0 = top-scoring only)",
+    )
     parser.add_argument("--chunk-summaries-dir", default="", help="Optional directory to write per-chunk summaries")
+    parser.add_argument("--run-id", default="", help="Record per-call telemetry under runs/<RUN_ID>/exports/llm/")
+    parser.add_argument(
+        "--extraction-cache-dir",
+        default="",
+        help="Optional directory to cache sanitized page extraction across runs",
+    )
+    parser.add_argument(
+        "--batch",
+        choices=["azure", "local"],
+        default="",
+        help="Run the map phase as an offline batch (azure = Batch API; local = in-process stand-in)",
+    )
+    parser.add_argument("--batch-dir", default="", help="Batch work directory (default: <out>.batch/ next to --out)")
+    parser.add_argument("--batch-poll-s", type=float, default=60.0, help="Seconds between batch status polls")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Max in-flight map calls (adaptive AIMD limit up to this value; 1 = sequential)",
+    )
 
     args = parser.parse_args(argv)
+    if args.run_id:
+        configure_ledger(run_id=args.run_id)
 
     pdf_path = Path(args.pdf)
     out_path = Path(args.out)
@@ -735,6 +1145,18 @@ def main(argv: Optional[list[str]] = None) -> int:
     max_chunks = None if args.max_chunks <= 0 else int(args.max_chunks)
     page_timeout_s = None if args.page_timeout_s <= 0 else int(args.page_timeout_s)
     chunk_dir = Path(args.chunk_summaries_dir) if args.chunk_summaries_dir else None
+    extraction_cache_dir = Path(args.extraction_cache_dir) if args.extraction_cache_dir else None
+    batch = None
+    if args.batch:
+        batch = BatchOptions(
+            backend=make_batch_backend(
+                args.batch,
+                resolve_azure_config(args.model),
+                max_concurrency=max(1, int(args.concurrency)),
+            ),
+            work_dir=Path(args.batch_dir) if args.batch_dir else out_path.with_suffix(".batch"),
+            poll_interval_s=float(args.batch_poll_s),
+        )
 
     synthesize_pdf(
         pdf_path=pdf_path,
@@ -748,6 +1170,11 @@ def main(argv: Optional[list[str]] = None) -> int:
         page_timeout_s=page_timeout_s,
         max_reduction_passes=int(args.max_reduction_passes),
         save_chunk_summaries_dir=chunk_dir,
+        extraction_cache_dir=extraction_cache_dir,
+        batch=batch,
+        max_concurrency=max(1, int(args.concurrency)),
+        chunking=args.chunking,
+        focus=focus_options_from_args(args),
     )
 
     print(f"Wrote: {out_path}")
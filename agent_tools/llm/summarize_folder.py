@@ -10,51 +10,28 @@ from datetime import date
 from pathlib import Path
 from typing import Any, Optional
 
-from agent_tools.llm.azure_openai_responses import (
-    AzureOpenAIResponsesClient,
-    AzureResponsesClientConfig,
-)
+from agent_tools.llm.batch import BatchOptions, BatchRequest, make_batch_backend, run_batch_map
+from agent_tools.llm.client_factory import get_client, resolve_azure_config
 from agent_tools.llm.document_extraction import call_with_retry, extract_eml_text
-from agent_tools.llm.env import load_repo_dotenv, read_azure_openai_env
-from agent_tools.llm.model_registry import load_models_config
-from agent_tools.llm.summarize_file import synthesize_pdf, synthesize_text
+from agent_tools.llm.prompts import combined_prompt, prefix_split_record
+from agent_tools.llm.relevance import FocusOptions
+from agent_tools.llm.summarize_file import (
+    CHUNKING_MODES,
+    ChunkingMode,
+    focus_options_from_args,
+    pdf_batch_requests,
+    synthesize_pdf,
+    synthesize_text,
+    text_batch_requests,
+)
+from agent_tools.llm.synthesis_plan import PlanAssumptions, build_plan, plan_document, write_plan_report
+from agent_tools.llm.telemetry import configure_ledger, telemetry_context
 
 
 def _repo_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
-def _resolve_azure_config(*, model_name: str = "azure-gpt-5.4") -> AzureResponsesClientConfig:
-    repo_root = _repo_root()
-    load_repo_dotenv(repo_root)
-
-    env = read_azure_openai_env()
-    if not env.api_key:
-        raise RuntimeError("Missing AZURE_OPENAI_KEY in environment (.env)")
-
-    models = load_models_config(repo_root)
-    model = models.get(model_name)
-
-    deployment_name = (model.deployment_name if model else None) or env.deployment_name
-    candidate_url = (model.api_url if model else None) or env.responses_api_url or env.api_url
-
-    if not deployment_name:
-        raise RuntimeError("Missing deployment name (AZURE_OPENAI_DEPLOYMENT or config/models.json)")
-    if not candidate_url:
-        raise RuntimeError("Missing Responses API URL (AZURE_OPENAI_RESPONSES_URL or config/models.json)")
-
-    max_output_tokens = (model.max_output_tokens if model else None) or 8192
-    reasoning_effort = (model.reasoning_effort if model else None) or "medium"
-
-    return AzureResponsesClientConfig(
-        api_key=env.api_key,
-        responses_api_url=candidate_url,
-        deployment_name=deployment_name,
-        max_output_tokens=int(max_output_tokens),
-        reasoning_effort=reasoning_effort,  # type: ignore[arg-type]
-    )
-
-
 def _slugify(name: str) -> str:
     s = name.strip().lower()
     s = re.sub(r"\.[a-z0-9]{1,6}$", "", s)
@@ -80,6 +57,66 @@ def _atomic_write_text(path: Path, content: str) -> None:
     temp_path.replace(path)
 
 
+def _list_candidates(dir_path: Path, include_exts: tuple[str, ...], max_files: int) -> list[Path]:
+    files = [p for p in sorted(dir_path.iterdir()) if p.is_file()]
+    candidates = [p for p in files if p.suffix.lower() in set(include_exts)]
+
+    if max_files and max_files > 0:
+        candidates = candidates[: int(max_files)]
+    return candidates
+
+
+def plan_folder(
+    *,
+    dir_path: Path,
+    out_md_path: Path,
+    tmp_dir: Path,
+    model_name: str = "azure-gpt-5.4",
+    include_exts: tuple[str, ...] = (".pdf", ".eml", ".txt", ".md"),
+    max_files: int = 0,
+    target_chunk_chars: int = 30_000,
+    max_chunk_chars: int = 45_000,
+    overlap_pages: int = 1,
+    max_chunks: Optional[int] = None,
+    page_timeout_s: Optional[int] = 15,
+    assumptions: PlanAssumptions = PlanAssumptions(),
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> dict[str, Any]:
+    """Estimate a ``synthesize_folder`` run without calling the model.
+
+    Writes ``<out>.plan.md`` and ``<out>.plan.json`` next to the folder synthesis path.
+    """
+    if not dir_path.exists() or not dir_path.is_dir():
+        raise RuntimeError(f"Not a directory: {dir_path}")
+
+    docs = []
+    for path in _list_candidates(dir_path, include_exts, max_files):
+        docs.append(
+            plan_document(
+                path,
+                assumptions=assumptions,
+                extraction_cache_dir=(tmp_dir / "_extraction_cache"),
+                target_chunk_chars=target_chunk_chars,
+                max_chunk_chars=max_chunk_chars,
+                overlap_pages=overlap_pages,
+                max_chunks=max_chunks,
+                page_timeout_s=page_timeout_s,
+                chunking=chunking,
+                focus=focus,
+            )
+        )
+
+    plan = build_plan(docs, repo_root=_repo_root(), model_name=model_name, assumptions=assumptions)
+    plan["source_folder"] = str(dir_path)
+    write_plan_report(
+        plan,
+        out_md_path=out_md_path.with_suffix(".plan.md"),
+        out_json_path=out_md_path.with_suffix(".plan.json"),
+    )
+    return plan
+
+
 def synthesize_folder(
     *,
     dir_path: Path,
@@ -95,7 +132,21 @@ def synthesize_folder(
     max_chunks: Optional[int] = None,
     page_timeout_s: Optional[int] = 15,
     max_reduction_passes: int = 3,
+    batch: Optional[BatchOptions] = None,
+    max_concurrency: int = 1,
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
 ) -> dict[str, Any]:
+    """Synthesize each document, then the folder as a whole.
+
+    With ``batch``, the map requests of every document are written to a single
+    batch file and submitted before any reduce runs; per-document reduces and
+    the folder synthesis then run synchronously once the batch completes.
+
+    With ``focus``, each document only maps its chunks that rank highest for
+    the query (BM25) plus a coverage sample; skipped pages are listed in the
+    per-document Coverage / Limit Warnings.
+    """
     if not dir_path.exists() or not dir_path.is_dir():
         raise RuntimeError(f"Not a directory: {dir_path}")
 
@@ -103,22 +154,58 @@ def synthesize_folder(
     tmp_dir.mkdir(parents=True, exist_ok=True)
     out_md_path.parent.mkdir(parents=True, exist_ok=True)
 
-    files = [p for p in sorted(dir_path.iterdir()) if p.is_file()]
-    candidates = [p for p in files if p.suffix.lower() in set(include_exts)]
+    candidates = _list_candidates(dir_path, include_exts, max_files)
 
-    if max_files and max_files > 0:
-        candidates = candidates[: int(max_files)]
+    slugs: list[str] = []
+    slug_counts: dict[str, int] = {}
+    for path in candidates:
+        base_slug = _slugify(path.name)
+        slug_counts[base_slug] = slug_counts.get(base_slug, 0) + 1
+        slugs.append(base_slug if slug_counts[base_slug] == 1 else f"{base_slug}_{slug_counts[base_slug]}")
+
+    map_outputs: Optional[dict[str, str]] = None
+    if batch is not None:
+        batch_requests: list[BatchRequest] = []
+        for path, slug in zip(candidates, slugs):
+            if path.suffix.lower() == ".pdf":
+                batch_requests.extend(
+                    pdf_batch_requests(
+                        pdf_path=path,
+                        map_key=slug,
+                        target_chunk_chars=target_chunk_chars,
+                        max_chunk_chars=max_chunk_chars,
+                        overlap_pages=overlap_pages,
+                        max_chunks=max_chunks,
+                        page_timeout_s=page_timeout_s,
+                        extraction_cache_dir=(tmp_dir / "_extraction_cache"),
+                        chunking=chunking,
+                        focus=focus,
+                    )
+                )
+            else:
+                raw = extract_eml_text(path) if path.suffix.lower() == ".eml" else path.read_text(encoding="utf-8", errors="replace")
+                batch_requests.extend(
+                    text_batch_requests(
+                        title=path.name,
+                        text=raw,
+                        map_key=slug,
+                        target_chunk_chars=target_chunk_chars,
+                        max_chunk_chars=max_chunk_chars,
+                        chunking=chunking,
+                        focus=focus,
+                    )
+                )
+
+        client = get_client(model_name)
+        print(f"Batching {len(batch_requests)} map requests from {len(candidates)} documents")
+        with telemetry_context(caller="summarize_folder.synthesize_folder"):
+            map_outputs = run_batch_map(batch_requests, options=batch, client=client)
 
     # Per-doc syntheses
     source_entries: list[dict[str, Any]] = []
     combined_inputs: list[str] = []
 
-    slug_counts: dict[str, int] = {}
-
-    for idx, path in enumerate(candidates, start=1):
-        base_slug = _slugify(path.name)
-        slug_counts[base_slug] = slug_counts.get(base_slug, 0) + 1
-        slug = base_slug if slug_counts[base_slug] == 1 else f"{base_slug}_{slug_counts[base_slug]}"
+    for idx, (path, slug) in enumerate(zip(candidates, slugs), start=1):
         out_doc_md = per_doc_dir / f"{slug}__synthesis.md"
         out_doc_manifest = per_doc_dir / f"{slug}__synthesis.manifest.json"
 
@@ -137,6 +224,12 @@ def synthesize_folder(
                 page_timeout_s=page_timeout_s,
                 max_reduction_passes=max_reduction_passes,
                 save_chunk_summaries_dir=(tmp_dir / f"{slug}__chunks"),
+                extraction_cache_dir=(tmp_dir / "_extraction_cache"),
+                map_key=slug,
+                map_outputs=map_outputs,
+                max_concurrency=max_concurrency,
+                chunking=chunking,
+                focus=focus,
             )
         elif path.suffix.lower() == ".eml":
             raw = extract_eml_text(path)
@@ -149,6 +242,11 @@ def synthesize_folder(
                 target_chunk_chars=target_chunk_chars,
                 max_chunk_chars=max_chunk_chars,
                 max_reduction_passes=max_reduction_passes,
+                map_key=slug,
+                map_outputs=map_outputs,
+                max_concurrency=max_concurrency,
+                chunking=chunking,
+                focus=focus,
             )
         else:
             raw = path.read_text(encoding="utf-8", errors="replace")
@@ -161,6 +259,11 @@ def synthesize_folder(
                 target_chunk_chars=target_chunk_chars,
                 max_chunk_chars=max_chunk_chars,
                 max_reduction_passes=max_reduction_passes,
+                map_key=slug,
+                map_outputs=map_outputs,
+                max_concurrency=max_concurrency,
+                chunking=chunking,
+                focus=focus,
             )
 
         md = out_doc_md.read_text(encoding="utf-8")
@@ -182,30 +285,18 @@ def synthesize_folder(
     # Folder-level synthesis
     combined = "\n\n".join(combined_inputs)
 
-    final_prompt = (
-        "I have the following per-document syntheses from a folder of documents.\n"
-        "Please provide a high-level executive summary and thematic synthesis across all these findings.\n"
-        "Identify key themes, recurring topics, and strategic takeaways.\n\n"
-        "Output Markdown with:\n"
-        "- Executive Summary (8-12 bullets)\n"
-        "- Themes (with evidence references to specific documents)\n"
-        "- Notable Decisions / Confirmations\n"
-        "- Open Questions / Follow-ups\n"
-        "- Recommended Next Actions\n\n"
-        "Be faithful to the sources; do not invent details.\n\n"
-        f"SOURCES:\n{combined}"
-    )
+    split = combined_prompt(sources=combined)
 
-    cfg = _resolve_azure_config(model_name=model_name)
-    client = AzureOpenAIResponsesClient(cfg)
+    client = get_client(model_name)
 
     messages = [
-        {"role": "system", "content": "You are a strategic analyst synthesizing business intelligence documents."},
-        {"role": "user", "content": final_prompt},
+        {"role": "system", "content": split.instructions},
+        {"role": "user", "content": split.user_prompt},
     ]
 
     instructions, input_data = client.conversation_to_responses_input(messages)
-    result = call_with_retry(client, input_data, instructions, max_retries=6, initial_delay=2.0, timeout_s=300.0)
+    with telemetry_context(caller="summarize_folder.synthesize_folder", phase="combined"):
+        result = call_with_retry(client, input_data, instructions, max_retries=6, initial_delay=2.0, timeout_s=300.0)
     synthesis = client.extract_output_text(result).strip()
 
     _atomic_write_text(
@@ -238,11 +329,15 @@ def synthesize_folder(
         "chunking": {
             "target_chunk_chars": target_chunk_chars,
             "max_chunk_chars": max_chunk_chars,
-            "overlap_pages": overlap_pages,
+            "mode": chunking,
+            "overlap_pages": overlap_pages if chunking == "pages" else 0,
             "max_chunks": max_chunks,
             "page_timeout_s": page_timeout_s,
             "max_reduction_passes": max_reduction_passes,
         },
+        "focus": asdict(focus) if focus else None,
+        "map_mode": "sync" if batch is None else f"batch:{batch.backend.name}",
+        "prompt_prefix": prefix_split_record([split]),
     }
 
     return manifest
@@ -261,12 +356,51 @@ def main(argv: Optional[list[str]] = None) -> int:
 
     parser.add_argument("--target-chunk-chars", type=int, default=30000)
     parser.add_argument("--max-chunk-chars", type=int, default=45000)
-    parser.add_argument("--overlap-pages", type=int, default=1)
+    parser.add_argument(
+        "--chunking",
+        choices=CHUNKING_MODES,
+        default="semantic",
+        help="semantic = chunk on headings/paragraphs/tables; pages = legacy page packing with --overlap-pages",
+    )
+    parser.add_argument("--overlap-pages", type=int, default=1, help="Pages repeated between chunks (--chunking pages)")
     parser.add_argument("--max-chunks", type=int, default=0)
     parser.add_argument("--page-timeout-s", type=int, default=15)
     parser.add_argument("--max-reduction-passes", type=int, default=3)
+    parser.add_argument(
+        "--query",
+        default="",
+        help="Query-focused mode: per document, only map chunks that rank highest for this query (BM25) plus a coverage sample",
+    )
+    parser.add_argument("--query-top-k", type=int, default=8, help="Top-scoring chunks to map per document (--query)")
+    parser.add_argument(
+        "--query-sample-every",
+        type=int,
+        default=10,
+        help="Also map every Nth chunk for coverage (--query; 0 = top-scoring only)",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Extract + chunk only and write <out>.plan.md/.plan.json estimates (no model calls)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Max in-flight map calls (adaptive AIMD limit up to this value; 1 = sequential); also used by --plan",
+    )
+    parser.add_argument("--run-id", default="", help="Record per-call telemetry under runs/<RUN_ID>/exports/llm/")
+    parser.add_argument(
+        "--batch",
+        choices=["azure", "local"],
+        default="",
+        help="Run all map requests as one offline batch (azure = Batch API; local = in-process stand-in)",
+    )
+    parser.add_argument("--batch-poll-s", type=float, default=60.0, help="Seconds between batch status polls")
 
     args = parser.parse_args(argv)
+    if args.run_id:
+        configure_ledger(run_id=args.run_id)
 
     dir_path = Path(args.dir)
     out_md = Path(args.out)
@@ -278,6 +412,32 @@ def main(argv: Optional[list[str]] = None) -> int:
     max_chunks = None if args.max_chunks <= 0 else int(args.max_chunks)
     page_timeout_s = None if args.page_timeout_s <= 0 else int(args.page_timeout_s)
 
+    if args.plan:
+        plan = plan_folder(
+            dir_path=dir_path,
+            out_md_path=out_md,
+            tmp_dir=tmp_dir,
+            model_name=args.model,
+            include_exts=include_exts,
+            max_files=int(args.max_files),
+            target_chunk_chars=int(args.target_chunk_chars),
+            max_chunk_chars=int(args.max_chunk_chars),
+            overlap_pages=int(args.overlap_pages),
+            max_chunks=max_chunks,
+            page_timeout_s=page_timeout_s,
+            assumptions=PlanAssumptions(concurrency=max(1, int(args.concurrency))),
+            chunking=args.chunking,
+            focus=focus_options_from_args(args),
+        )
+        t = plan["totals"]
+        print(
+            f"Plan: {t['documents']} docs, {t['calls']} calls, ~{t['input_tokens']:,} in / "
+            f"~{t['output_tokens']:,} out tokens, ~{t['estimated_wall_time_s'] / 60:.1f} min"
+        )
+        print(f"Wrote: {out_md.with_suffix('.plan.md')}")
+        print(f"Wrote: {out_md.with_suffix('.plan.json')}")
+        return 0
+
     manifest = synthesize_folder(
         dir_path=dir_path,
         out_md_path=out_md,
@@ -292,6 +452,22 @@ def main(argv: Optional[list[str]] = None) -> int:
         max_chunks=max_chunks,
         page_timeout_s=page_timeout_s,
         max_reduction_passes=int(args.max_reduction_passes),
+        batch=(
+            BatchOptions(
+                backend=make_batch_backend(
+                    args.batch,
+                    resolve_azure_config(args.model),
+                    max_concurrency=max(1, int(args.concurrency)),
+                ),
+                work_dir=tmp_dir / "_batch",
+                poll_interval_s=float(args.batch_poll_s),
+            )
+            if args.batch
+            else None
+        ),
+        max_concurrency=max(1, int(args.concurrency)),
+        chunking=args.chunking,
+        focus=focus_options_from_args(args),
     )
 
     if manifest_path:
@@ -14,14 +14,12 @@ from pathlib import Path
 from shutil import which
 from typing import Any, Literal, Optional
 
-from agent_tools.llm.azure_openai_responses import (
-    AzureOpenAIResponsesClient,
-    AzureResponsesClientConfig,
-)
+from agent_tools.llm.client_factory import get_client
 from agent_tools.llm.document_extraction import call_with_retry, extract_eml_text, sanitize_text
-from agent_tools.llm.env import load_repo_dotenv, read_azure_openai_env
-from agent_tools.llm.model_registry import load_models_config
+from agent_tools.llm.prompts import combined_prompt, prefix_split_record
 from agent_tools.llm.summarize_file import synthesize_pdf, synthesize_text
+from agent_tools.llm.synthesis_plan import PlanAssumptions, DocPlan, build_plan, plan_document, write_plan_report
+from agent_tools.llm.telemetry import configure_ledger, telemetry_context
 
 
 DetectMode = Literal["mtime-size", "content-hash"]
@@ -86,6 +84,44 @@ def _fingerprint(source_dir: Path, path: Path, *, detect_mode: DetectMode) -> Fi
     return fp
 
 
+def _has_changed(prev: Any, fp: FileFingerprint, *, detect_mode: DetectMode) -> bool:
+    prev_fp = (prev or {}).get("source") if isinstance(prev, dict) else None
+
+    if prev_fp is None or not isinstance(prev_fp, dict):
+        return True
+
+    prev_size = int(prev_fp.get("size", -1))
+    prev_mtime_ns = int(prev_fp.get("mtime_ns", -1))
+    prev_hash = prev_fp.get("content_hash_sha256")
+
+    has_changed = (prev_size != fp.size) or (prev_mtime_ns != fp.mtime_ns)
+    if detect_mode == "content-hash":
+        has_changed = has_changed or (prev_hash != fp.content_hash_sha256)
+    return has_changed
+
+
+def _list_source_files(source_dir: Path) -> list[Path]:
+    current_files: list[Path] = []
+    for p in sorted(source_dir.iterdir()):
+        if not p.is_file():
+            continue
+        if p.name.startswith("."):
+            continue
+        if p.suffix.lower() not in INCLUDE_EXTS:
+            continue
+        current_files.append(p)
+    return current_files
+
+
+def _per_doc_paths(per_doc_dir: Path, tmp_dir: Path, p: Path, rel_path: str) -> tuple[Path, Path, Path]:
+    out_prefix = f"{_slugify(p.name)}__{_stable_id_for_relpath(rel_path)}"
+    return (
+        per_doc_dir / f"{out_prefix}__synthesis.md",
+        per_doc_dir / f"{out_prefix}__synthesis.manifest.json",
+        tmp_dir / f"{out_prefix}__chunks",
+    )
+
+
 def _load_index(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {"generated_on": None, "source_dir": None, "entries": {}}
@@ -147,37 +183,6 @@ def _build_index_payload(
     return payload
 
 
-def _resolve_azure_config(*, model_name: str = "azure-gpt-5.4") -> AzureResponsesClientConfig:
-    repo_root = Path(__file__).resolve().parents[2]
-    load_repo_dotenv(repo_root)
-
-    env = read_azure_openai_env()
-    if not env.api_key:
-        raise RuntimeError("Missing AZURE_OPENAI_KEY in environment (.env)")
-
-    models = load_models_config(repo_root)
-    model = models.get(model_name)
-
-    deployment_name = (model.deployment_name if model else None) or env.deployment_name
-    candidate_url = (model.api_url if model else None) or env.responses_api_url or env.api_url
-
-    if not deployment_name:
-        raise RuntimeError("Missing deployment name (AZURE_OPENAI_DEPLOYMENT or config/models.json)")
-    if not candidate_url:
-        raise RuntimeError("Missing Responses API URL (AZURE_OPENAI_RESPONSES_URL or config/models.json)")
-
-    max_output_tokens = (model.max_output_tokens if model else None) or 8192
-    reasoning_effort = (model.reasoning_effort if model else None) or "medium"
-
-    return AzureResponsesClientConfig(
-        api_key=env.api_key,
-        responses_api_url=candidate_url,
-        deployment_name=deployment_name,
-        max_output_tokens=int(max_output_tokens),
-        reasoning_effort=reasoning_effort,  # type: ignore[arg-type]
-    )
-
-
 def _textutil_docx_to_text(docx_path: Path) -> str:
     if which("textutil") is None:
         raise RuntimeError(
@@ -249,30 +254,18 @@ def _build_combined_synthesis(
 
     combined = "\n\n".join(combined_inputs)
 
-    final_prompt = (
-        "I have the following per-document syntheses from a folder of documents.\n"
-        "Provide a high-level executive summary and thematic synthesis across all these findings.\n"
-        "Identify key themes, recurring topics, and strategic takeaways.\n\n"
-        "Output Markdown with:\n"
-        "- Executive Summary (8-12 bullets)\n"
-        "- Themes (with evidence references to specific documents)\n"
-        "- Notable Decisions / Confirmations\n"
-        "- Open Questions / Follow-ups\n"
-        "- Recommended Next Actions\n\n"
-        "Be faithful to the sources; do not invent details.\n\n"
-        f"SOURCES:\n{combined}"
-    )
+    split = combined_prompt(sources=combined)
 
-    cfg = _resolve_azure_config(model_name=model_name)
-    client = AzureOpenAIResponsesClient(cfg)
+    client = get_client(model_name)
 
     messages = [
-        {"role": "system", "content": "You are a strategic analyst synthesizing business intelligence documents."},
-        {"role": "user", "content": final_prompt},
+        {"role": "system", "content": split.instructions},
+        {"role": "user", "content": split.user_prompt},
     ]
 
     instructions, input_data = client.conversation_to_responses_input(messages)
-    result = call_with_retry(client, input_data, instructions, max_retries=6, initial_delay=2.0, timeout_s=300.0)
+    with telemetry_context(caller="summarize_incremental.combined", phase="combined"):
+        result = call_with_retry(client, input_data, instructions, max_retries=6, initial_delay=2.0, timeout_s=300.0)
     synthesis = client.extract_output_text(result).strip()
 
     out_md_content = "\n".join(
@@ -299,6 +292,7 @@ def _build_combined_synthesis(
         "model": model_name,
         "documents_included": len(docs_included),
         "documents": [asdict(e) for e in docs_included],
+        "prompt_prefix": prefix_split_record([split]),
     }
     _atomic_write_text(manifest_path, json.dumps(manifest, indent=2) + "\n")
 
@@ -315,6 +309,7 @@ def sync_incremental_synthesis(
     model_name: str,
     detect_mode: DetectMode,
     rebuild_if_no_changes: bool,
+    max_concurrency: int = 1,
 ) -> dict[str, Any]:
     if not source_dir.exists() or not source_dir.is_dir():
         raise RuntimeError(f"Not a directory: {source_dir}")
@@ -326,15 +321,7 @@ def sync_incremental_synthesis(
     index = _load_index(index_path)
     prior_entries: dict[str, Any] = index.get("entries", {}) if isinstance(index.get("entries"), dict) else {}
 
-    current_files: list[Path] = []
-    for p in sorted(source_dir.iterdir()):
-        if not p.is_file():
-            continue
-        if p.name.startswith("."):
-            continue
-        if p.suffix.lower() not in INCLUDE_EXTS:
-            continue
-        current_files.append(p)
+    current_files = _list_source_files(source_dir)
 
     entries: dict[str, Any] = dict(prior_entries)
     changed = 0
@@ -346,27 +333,10 @@ def sync_incremental_synthesis(
         key = fp.rel_path
 
         prev = prior_entries.get(key)
-        prev_fp = (prev or {}).get("source") if isinstance(prev, dict) else None
-
-        if prev_fp is None or not isinstance(prev_fp, dict):
-            has_changed = True
-        else:
-            prev_size = int(prev_fp.get("size", -1))
-            prev_mtime_ns = int(prev_fp.get("mtime_ns", -1))
-            prev_hash = prev_fp.get("content_hash_sha256")
-
-            has_changed = (prev_size != fp.size) or (prev_mtime_ns != fp.mtime_ns)
-            if detect_mode == "content-hash":
-                has_changed = has_changed or (prev_hash != fp.content_hash_sha256)
+        has_changed = _has_changed(prev, fp, detect_mode=detect_mode)
 
         kind = p.suffix.lower().lstrip(".")
-        stable_id = _stable_id_for_relpath(fp.rel_path)
-        slug = _slugify(p.name)
-        out_prefix = f"{slug}__{stable_id}"
-
-        out_md = per_doc_dir / f"{out_prefix}__synthesis.md"
-        out_manifest = per_doc_dir / f"{out_prefix}__synthesis.manifest.json"
-        chunk_dir = tmp_dir / f"{out_prefix}__chunks"
+        out_md, out_manifest, chunk_dir = _per_doc_paths(per_doc_dir, tmp_dir, p, fp.rel_path)
 
         staged_path: Path
         if p.suffix.lower() == ".docx":
@@ -402,6 +372,8 @@ def sync_incremental_synthesis(
                     manifest_path=out_manifest,
                     model_name=model_name,
                     save_chunk_summaries_dir=chunk_dir,
+                    extraction_cache_dir=(tmp_dir / "_extraction_cache"),
+                    max_concurrency=max_concurrency,
                 )
             elif p.suffix.lower() == ".eml":
                 raw = extract_eml_text(p)
@@ -411,6 +383,7 @@ def sync_incremental_synthesis(
                     out_md_path=out_md,
                     manifest_path=out_manifest,
                     model_name=model_name,
+                    max_concurrency=max_concurrency,
                 )
             else:
                 raw = staged_path.read_text(encoding="utf-8", errors="replace")
@@ -420,6 +393,7 @@ def sync_incremental_synthesis(
                     out_md_path=out_md,
                     manifest_path=out_manifest,
                     model_name=model_name,
+                    max_concurrency=max_concurrency,
                 )
             synthesized += 1
             time.sleep(0.25)
@@ -508,7 +482,80 @@ def sync_incremental_synthesis(
     return index_out
 
 
-def main() -> int:
+def plan_incremental_synthesis(
+    *,
+    source_dir: Path,
+    staging_dir: Path,
+    per_doc_dir: Path,
+    tmp_dir: Path,
+    index_path: Path,
+    out_md_path: Path,
+    out_manifest_path: Path,
+    model_name: str,
+    detect_mode: DetectMode,
+    rebuild_if_no_changes: bool,
+    assumptions: PlanAssumptions = PlanAssumptions(),
+) -> dict[str, Any]:
+    """Estimate what ``sync_incremental_synthesis`` would do, without model calls.
+
+    Only new/changed documents (per the index) are planned. Nothing under the
+    index, staging or per-doc dirs is modified; ``<out>.plan.md`` and
+    ``<out>.plan.json`` are written next to the combined synthesis path.
+    """
+    if not source_dir.exists() or not source_dir.is_dir():
+        raise RuntimeError(f"Not a directory: {source_dir}")
+
+    index = _load_index(index_path)
+    prior_entries: dict[str, Any] = index.get("entries", {}) if isinstance(index.get("entries"), dict) else {}
+
+    current_files = _list_source_files(source_dir)
+    docs: list[DocPlan] = []
+    for p in current_files:
+        fp = _fingerprint(source_dir, p, detect_mode=detect_mode)
+        has_changed = _has_changed(prior_entries.get(fp.rel_path), fp, detect_mode=detect_mode)
+        out_md, out_manifest, _ = _per_doc_paths(per_doc_dir, tmp_dir, p, fp.rel_path)
+        if not (has_changed or not out_md.exists() or not out_manifest.exists()):
+            continue
+
+        text: Optional[str] = None
+        if p.suffix.lower() == ".docx":
+            staged = staging_dir / f"{p.stem}.txt"
+            try:
+                text = staged.read_text(encoding="utf-8") if (staged.exists() and not has_changed) else _textutil_docx_to_text(p)
+            except RuntimeError as e:
+                docs.append(DocPlan(source=str(p), kind="docx", warnings=[f"PLAN_EXTRACTION_FAILED: {e}"]))
+                continue
+
+        docs.append(
+            plan_document(
+                p,
+                assumptions=assumptions,
+                extraction_cache_dir=(tmp_dir / "_extraction_cache"),
+                text=text,
+            )
+        )
+
+    include_combined = bool(docs) or rebuild_if_no_changes or not (out_md_path.exists() and out_manifest_path.exists())
+    plan = build_plan(
+        docs,
+        repo_root=Path(__file__).resolve().parents[2],
+        model_name=model_name,
+        assumptions=assumptions,
+        include_combined=include_combined,
+        docs_in_combined=len(current_files),
+    )
+    plan["source_dir"] = str(source_dir)
+    plan["files_seen"] = len(current_files)
+    plan["files_changed"] = len(docs)
+    write_plan_report(
+        plan,
+        out_md_path=out_md_path.with_suffix(".plan.md"),
+        out_json_path=out_md_path.with_suffix(".plan.json"),
+    )
+    return plan
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     parser = argparse.ArgumentParser(
         description="Incremental folder synthesis: only reprocess changed/new docs, then rebuild folder synthesis."
     )
@@ -531,8 +578,44 @@ def main() -> int:
         action="store_true",
         help="Rebuild the combined synthesis even if no sources changed",
     )
-
-    args = parser.parse_args()
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Extract + chunk changed docs only and write <out>.plan.md/.plan.json estimates (no model calls)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Max in-flight map calls (adaptive AIMD limit up to this value; 1 = sequential); also used by --plan",
+    )
+    parser.add_argument("--run-id", default="", help="Record per-call telemetry under runs/<RUN_ID>/exports/llm/")
+
+    args = parser.parse_args(argv)
+    if args.run_id:
+        configure_ledger(run_id=args.run_id)
+
+    if args.plan:
+        plan = plan_incremental_synthesis(
+            source_dir=args.source_dir,
+            staging_dir=args.staging_dir,
+            per_doc_dir=args.per_doc_dir,
+            tmp_dir=args.tmp_dir,
+            index_path=args.index,
+            out_md_path=args.out,
+            out_manifest_path=args.manifest,
+            model_name=args.model,
+            detect_mode=args.detect_mode,  # type: ignore[arg-type]
+            rebuild_if_no_changes=bool(args.rebuild_if_no_changes),
+            assumptions=PlanAssumptions(concurrency=max(1, int(args.concurrency))),
+        )
+        t = plan["totals"]
+        print(
+            f"Plan: {plan['files_changed']}/{plan['files_seen']} docs to synthesize, {t['calls']} calls, "
+            f"~{t['input_tokens']:,} in / ~{t['output_tokens']:,} out tokens, ~{t['estimated_wall_time_s'] / 60:.1f} min"
+        )
+        print(f"Wrote: {args.out.with_suffix('.plan.md')}")
+        return 0
 
     sync_incremental_synthesis(
         source_dir=args.source_dir,
@@ -545,6 +628,7 @@ def main() -> int:
         model_name=args.model,
         detect_mode=args.detect_mode,  # type: ignore[arg-type]
         rebuild_if_no_changes=bool(args.rebuild_if_no_changes),
+        max_concurrency=max(1, int(args.concurrency)),
     )
 
     return 0
@@ -0,0 +1,414 @@
+"""Optional persistent worker for repeated synthesis invocations.
+
+Agent runs call ``summarize_file`` (and the folder CLIs) many times per
+session. Each fresh process pays interpreter startup, config parsing, TLS
+handshakes and cold caches. The daemon keeps one process alive behind a Unix
+socket, so the cached Responses clients (``client_factory``), their connection
+pools, the per-deployment limiters and breakers, and an in-memory PDF
+extraction cache stay warm between jobs.
+
+    # once per session (background)
+    python -m agent_tools.llm.synthesis_daemon serve &
+
+    # instead of `python -m agent_tools.llm.summarize_file --pdf ... --out ...`
+    python -m agent_tools.llm.synthesis_daemon run summarize_file -- --pdf ... --out ...
+
+    python -m agent_tools.llm.synthesis_daemon status
+    python -m agent_tools.llm.synthesis_daemon stop
+
+``run`` forwards the job (argv, working directory and ``RUN_ID``) and streams
+the job's stdout/stderr back line by line; its exit code is the job's. If no
+daemon is listening, ``run`` executes the job in-process (``--no-fallback``
+turns that into an error). A job that reached the daemon is never re-run: a
+lost connection or a closed stdout mid-stream just exits non-zero.
+
+Jobs run one at a time on the daemon's main thread (each job chdirs into the
+caller's directory, and signal-based page timeouts keep working); use
+``--concurrency`` inside a job for parallel model calls. The protocol is one
+JSON request line per connection, answered by JSON event lines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO
+
+JOBS = {
+    "summarize_file": "agent_tools.llm.summarize_file",
+    "summarize_folder": "agent_tools.llm.summarize_folder",
+    "summarize_incremental": "agent_tools.llm.summarize_incremental",
+}
+
+# Environment forwarded from the caller for the duration of a job.
+FORWARDED_ENV = ("RUN_ID",)
+
+SOCKET_ENV = "AGENT_TOOLS_SYNTHESIS_SOCKET"
+
+Send = Callable[[dict[str, Any]], None]
+
+
+def default_socket_path() -> Path:
+    override = (os.getenv(SOCKET_ENV) or "").strip()
+    if override:
+        return Path(override)
+    return Path(tempfile.gettempdir()) / f"agent_tools_synthesis-{os.getuid()}.sock"
+
+
+def _exit_code(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    return 1
+
+
+class _LineWriter(io.TextIOBase):
+    """File-like sink that forwards each complete line as a ``log`` event."""
+
+    def __init__(self, send: Send, stream: str):
+        self._send = send
+        self._stream = stream
+        self._buffer = ""
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._buffer += text
+            *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._send({"event": "log", "stream": self._stream, "line": line})
+        return len(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            line, self._buffer = self._buffer, ""
+        if line:
+            self._send({"event": "log", "stream": self._stream, "line": line})
+
+
+class SynthesisDaemon:
+    def __init__(self, socket_path: Path, *, memory_cache_chars: int = 64_000_000):
+        self.socket_path = socket_path
+        self.memory_cache_chars = int(memory_cache_chars)
+        self.started_at = time.time()
+        self.jobs_served = 0
+        self.current_job: Optional[str] = None
+        self._jobs: queue.Queue[Optional[tuple[dict[str, Any], Send, queue.Queue[int]]]] = queue.Queue()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "socket": str(self.socket_path),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "jobs_served": self.jobs_served,
+            "current_job": self.current_job,
+            "queued_jobs": self._jobs.qsize(),
+        }
+
+    def submit_job(self, request: dict[str, Any], send: Send) -> int:
+        """Queue a job for the main thread and wait for its exit code."""
+
+        done: queue.Queue[int] = queue.Queue(maxsize=1)
+        self._jobs.put((request, send, done))
+        return done.get()
+
+    def run_job(self, request: dict[str, Any], send: Send) -> int:
+        """Run one job in this thread with its cwd/env and output redirected to ``send``."""
+
+        job = str(request.get("job") or "")
+        if job not in JOBS:
+            send({"event": "log", "stream": "stderr", "line": f"Unknown job {job!r}; expected one of {sorted(JOBS)}"})
+            return 2
+        argv = [str(a) for a in request.get("argv") or []]
+        env = {k: str(v) for k, v in (request.get("env") or {}).items() if k in FORWARDED_ENV}
+
+        from agent_tools.llm.telemetry import configure_ledger
+
+        module = importlib.import_module(JOBS[job])
+        self.current_job = " ".join([job, *argv])
+        saved_cwd = os.getcwd()
+        saved_env = {k: os.environ.get(k) for k in FORWARDED_ENV}
+        out, err = _LineWriter(send, "stdout"), _LineWriter(send, "stderr")
+        try:
+            os.chdir(str(request.get("cwd") or saved_cwd))
+            for k in FORWARDED_ENV:
+                if k in env:
+                    os.environ[k] = env[k]
+                else:
+                    os.environ.pop(k, None)
+            # The ledger is process-wide; point it at this job's run (or nowhere).
+            configure_ledger(run_id=env.get("RUN_ID"))
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                try:
+                    code = _exit_code(module.main(argv))
+                except SystemExit as e:
+                    code = _exit_code(e.code)
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+                out.flush()
+                err.flush()
+            return code
+        finally:
+            os.chdir(saved_cwd)
+            for k, v in saved_env.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+            self.jobs_served += 1
+            self.current_job = None
+
+    def serve_forever(self) -> None:
+        from agent_tools.llm.document_extraction import enable_memory_cache
+
+        if self.socket_path.exists():
+            if _ping(self.socket_path):
+                raise RuntimeError(f"A synthesis daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()  # Stale socket from a previous daemon.
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        enable_memory_cache(self.memory_cache_chars)
+        # Import the job modules up front so the first job starts warm too.
+        for name in JOBS.values():
+            importlib.import_module(name)
+
+        daemon = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                send_lock = threading.Lock()
+                connected = True
+
+                def send(event: dict[str, Any]) -> None:
+                    nonlocal connected
+                    if not connected:
+                        return
+                    data = (json.dumps(event) + "\n").encode("utf-8")
+                    with send_lock:
+                        try:
+                            self.wfile.write(data)
+                            self.wfile.flush()
+                        except OSError:
+                            connected = False  # Caller went away; let the job finish.
+
+                try:
+                    request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+                except ValueError:
+                    send({"event": "error", "message": "invalid request"})
+                    return
+
+                op = request.get("op")
+                if op == "ping":
+                    send({"event": "pong"})
+                elif op == "status":
+                    send({"event": "status", **daemon.status()})
+                elif op == "stop":
+                    send({"event": "stopping"})
+                    daemon.shutdown()
+                elif op == "run":
+                    send({"event": "accepted", "queued": daemon.current_job is not None})
+                    send({"event": "exit", "code": daemon.submit_job(request, send)})
+                else:
+                    send({"event": "error", "message": f"unknown op {op!r}"})
+
+        class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self._server = _Server(str(self.socket_path), _Handler)
+        os.chmod(self.socket_path, 0o600)
+        print(f"Synthesis daemon listening on {self.socket_path} (pid {os.getpid()})", flush=True)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        try:
+            while True:
+                item = self._jobs.get()
+                if item is None:
+                    break
+                request, send, done = item
+                try:
+                    code = self.run_job(request, send)
+                except Exception:
+                    code = 1
+                done.put(code)
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+
+    def shutdown(self) -> None:
+        """Stop after the current job; queued jobs still run first."""
+
+        self._jobs.put(None)
+
+
+class DaemonUnavailableError(RuntimeError):
+    """No synthesis daemon is listening on the socket (nothing was sent)."""
+
+
+def _request(socket_path: Path, payload: dict[str, Any], *, timeout_s: Optional[float] = 5.0) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout_s)
+    try:
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _events(sock: socket.socket) -> Any:
+    with sock, sock.makefile("r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _ping(socket_path: Path) -> bool:
+    try:
+        return any(e.get("event") == "pong" for e in _events(_request(socket_path, {"op": "ping"})))
+    except OSError:
+        return False
+
+
+def submit(
+    job: str,
+    argv: list[str],
+    *,
+    socket_path: Optional[Path] = None,
+    stdout: Optional[TextIO] = None,
+    stderr: Optional[TextIO] = None,
+) -> int:
+    """Run ``job`` on the daemon, streaming its output.
+
+    Raises ``DaemonUnavailableError`` only when connecting fails, i.e. before
+    the daemon saw the job. Once it has the job, errors return non-zero.
+    """
+
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    payload = {
+        "op": "run",
+        "job": job,
+        "argv": list(argv),
+        "cwd": os.getcwd(),
+        "env": {k: os.environ[k] for k in FORWARDED_ENV if k in os.environ},
+    }
+    socket_path = socket_path or default_socket_path()
+    try:
+        # No read timeout: a job streams output for as long as it runs.
+        sock = _request(socket_path, payload, timeout_s=None)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise DaemonUnavailableError(f"No synthesis daemon at {socket_path}: {e}") from e
+    except OSError as e:
+        print(f"synthesis daemon: could not send the job: {e}", file=stderr)
+        return 1
+
+    try:
+        for event in _events(sock):
+            kind = event.get("event")
+            if kind == "log":
+                print(event.get("line", ""), file=stderr if event.get("stream") == "stderr" else stdout, flush=True)
+            elif kind == "exit":
+                return _exit_code(event.get("code"))
+            elif kind == "error":
+                print(f"synthesis daemon: {event.get('message')}", file=stderr)
+                return 2
+    except BrokenPipeError:
+        # Our stdout was closed (e.g. piped into `head`). Point it at devnull so
+        # the interpreter's final flush does not fail too.
+        with contextlib.suppress(OSError, ValueError, io.UnsupportedOperation):
+            os.dup2(os.open(os.devnull, os.O_WRONLY), stdout.fileno())
+        return 1
+    except OSError as e:
+        print(f"synthesis daemon: connection lost before the job finished: {e}", file=stderr)
+        return 1
+    print("synthesis daemon: connection closed before the job finished", file=stderr)
+    return 1
+
+
+def _run_in_process(job: str, argv: list[str]) -> int:
+    module = importlib.import_module(JOBS[job])
+    try:
+        return _exit_code(module.main(argv))
+    except SystemExit as e:
+        return _exit_code(e.code)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Persistent worker for repeated synthesis jobs (Unix socket)")
+    parser.add_argument("--socket", type=Path, default=None, help=f"Socket path (default: ${SOCKET_ENV} or a per-user temp path)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_p = sub.add_parser("serve", help="Run the daemon in the foreground")
+    serve_p.add_argument(
+        "--memory-cache-mb",
+        type=int,
+        default=64,
+        help="In-memory PDF extraction cache budget in MB of extracted text (0 disables)",
+    )
+
+    run_p = sub.add_parser("run", help="Forward a synthesis job to the daemon")
+    run_p.add_argument("job", choices=sorted(JOBS))
+    run_p.add_argument(
+        "--no-fallback",
+        action="store_true",
+        help="Fail instead of running in-process without a daemon (must precede the job name)",
+    )
+    run_p.add_argument("job_args", nargs=argparse.REMAINDER, help="Arguments for the job (after --)")
+
+    sub.add_parser("status", help="Print daemon status as JSON")
+    sub.add_parser("stop", help="Stop the daemon")
+
+    args = parser.parse_args(argv)
+    socket_path = args.socket or default_socket_path()
+
+    if args.command == "serve":
+        SynthesisDaemon(socket_path, memory_cache_chars=int(args.memory_cache_mb) * 1_000_000).serve_forever()
+        return 0
+
+    if args.command == "run":
+        job_args = list(args.job_args)
+        if job_args[:1] == ["--"]:
+            job_args = job_args[1:]
+        try:
+            return submit(args.job, job_args, socket_path=socket_path)
+        except DaemonUnavailableError as e:
+            if args.no_fallback:
+                print(e, file=sys.stderr)
+                return 2
+            print(f"No synthesis daemon at {socket_path}; running in-process", file=sys.stderr)
+            return _run_in_process(args.job, job_args)
+
+    op = "status" if args.command == "status" else "stop"
+    try:
+        for event in _events(_request(socket_path, {"op": op})):
+            print(json.dumps(event, indent=2) if op == "status" else f"Daemon {event.get('event')}")
+    except OSError as e:
+        print(f"No synthesis daemon at {socket_path}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
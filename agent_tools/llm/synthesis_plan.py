@@ -0,0 +1,318 @@
+"""Pre-flight planning for synthesis runs (no model calls).
+
+Runs extraction (cached, sanitized) and chunking exactly as the synthesizers
+would, then estimates call count, input/output tokens, wall time, and cost per
+deployment configured in ``config/models.json``.
+
+Used by ``summarize_folder --plan`` and ``summarize_incremental --plan``.
+
+Estimates are deliberately simple and explicit:
+- tokens ~= chars / ``chars_per_token``
+- each call's latency ~= ``base_latency_s`` + output_tokens / ``output_tokens_per_s``
+- wall time is the larger of (total latency / concurrency) and the
+  requests-per-minute / tokens-per-minute floors, plus the fixed pacing sleeps.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from agent_tools.llm.document_extraction import extract_eml_text, extract_pdf_pages_sanitized
+from agent_tools.llm.model_registry import ModelConfig, load_models_config
+from agent_tools.llm.prompts import COMBINED_INSTRUCTIONS, MAP_INSTRUCTIONS, REDUCE_INSTRUCTIONS
+from agent_tools.llm.redaction import default_ruleset
+from agent_tools.llm.relevance import FocusOptions
+from agent_tools.llm.summarize_file import (
+    ChunkingMode,
+    _chunk_pages,
+    _dedupe_redundant_pages,
+    _focus_pdf_chunks,
+    _focus_text_chunks,
+    _pack_text_chunks,
+)
+
+# Fixed instructions plus the short per-call header wrapped around each chunk / summary set.
+_MAP_PROMPT_OVERHEAD_CHARS = len(MAP_INSTRUCTIONS) + 100
+_REDUCE_PROMPT_OVERHEAD_CHARS = len(REDUCE_INSTRUCTIONS) + 100
+_COMBINED_PROMPT_OVERHEAD_CHARS = len(COMBINED_INSTRUCTIONS) + 100
+
+
+@dataclass(frozen=True)
+class PlanAssumptions:
+    chars_per_token: float = 4.0
+    map_output_tokens: int = 1200
+    reduce_output_tokens: int = 2500
+    combined_output_tokens: int = 4000
+    base_latency_s: float = 4.0
+    output_tokens_per_s: float = 60.0
+    concurrency: int = 1
+    # Sleeps the synthesizers insert between calls / documents.
+    map_pacing_s: float = 0.5
+    doc_pacing_s: float = 0.25
+
+
+@dataclass
+class DocPlan:
+    source: str
+    kind: str
+    input_chars: int = 0
+    chunks: int = 0
+    map_calls: int = 0
+    reduce_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    extraction_cache_hit: Optional[bool] = None
+    warnings: list[str] = field(default_factory=list)
+
+
+def estimate_tokens(chars: int, assumptions: PlanAssumptions) -> int:
+    return int(math.ceil(max(0, chars) / max(0.1, assumptions.chars_per_token)))
+
+
+def _fill_call_estimates(doc: DocPlan, chunk_chars: list[int], a: PlanAssumptions) -> DocPlan:
+    doc.chunks = len(chunk_chars)
+    doc.map_calls = len(chunk_chars)
+    doc.reduce_calls = 1 if chunk_chars else 0
+
+    map_in = sum(estimate_tokens(c + _MAP_PROMPT_OVERHEAD_CHARS, a) for c in chunk_chars)
+    reduce_in = doc.reduce_calls * (
+        doc.map_calls * a.map_output_tokens + estimate_tokens(_REDUCE_PROMPT_OVERHEAD_CHARS, a)
+    )
+    doc.input_tokens = map_in + reduce_in
+    doc.output_tokens = doc.map_calls * a.map_output_tokens + doc.reduce_calls * a.reduce_output_tokens
+    return doc
+
+
+def plan_document(
+    path: Path,
+    *,
+    assumptions: PlanAssumptions,
+    extraction_cache_dir: Optional[Path] = None,
+    text: Optional[str] = None,
+    target_chunk_chars: int = 30_000,
+    max_chunk_chars: int = 45_000,
+    overlap_pages: int = 1,
+    max_chunks: Optional[int] = None,
+    page_timeout_s: Optional[int] = 15,
+    chunking: ChunkingMode = "semantic",
+    focus: Optional[FocusOptions] = None,
+) -> DocPlan:
+    """Extract + chunk one document the way the synthesizers do and estimate its calls.
+
+    Pass ``text`` for sources that were already converted (e.g. staged DOCX text).
+    """
+
+    kind = path.suffix.lower().lstrip(".")
+    doc = DocPlan(source=str(path), kind=kind)
+
+    try:
+        if text is None and kind == "pdf":
+            pages_raw, _, cache_hit = extract_pdf_pages_sanitized(
+                path, cache_dir=extraction_cache_dir, page_timeout_s=page_timeout_s
+            )
+            doc.extraction_cache_hit = cache_hit
+            pages, dedupe_warn = _dedupe_redundant_pages(pages_raw)
+            if dedupe_warn:
+                doc.warnings.append(dedupe_warn.code)
+            chunks, chunk_warnings = _chunk_pages(
+                pages,
+                chunking=chunking,
+                target_chunk_chars=target_chunk_chars,
+                max_chunk_chars=max_chunk_chars,
+                overlap_pages=overlap_pages,
+                max_chunks=max_chunks,
+            )
+            doc.warnings.extend(sorted({w.code for w in chunk_warnings}))
+            chunks, focus_warn = _focus_pdf_chunks(chunks, focus)
+            if focus_warn:
+                doc.warnings.append(focus_warn.code)
+            doc.input_chars = sum(len(p.text or "") for p in pages)
+            return _fill_call_estimates(doc, [c.chars for c in chunks], assumptions)
+
+        if text is None:
+            if kind == "eml":
+                text = extract_eml_text(path)
+            else:
+                text = path.read_text(encoding="utf-8", errors="replace")
+
+        safe = default_ruleset().redact(text).text
+        packed = _pack_text_chunks(
+            safe, target_chunk_chars=target_chunk_chars, max_chunk_chars=max_chunk_chars, chunking=chunking
+        )
+        keep, focus_warn = _focus_text_chunks(packed, focus)
+        if focus_warn:
+            doc.warnings.append(focus_warn.code)
+        doc.input_chars = len(safe)
+        return _fill_call_estimates(doc, [len(packed[i - 1]) for i in keep], assumptions)
+    except Exception as e:
+        doc.warnings.append(f"PLAN_EXTRACTION_FAILED: {type(e).__name__}: {e}")
+        return doc
+
+
+def _wall_time_s(
+    *,
+    calls: int,
+    latency_s: float,
+    tokens: int,
+    pacing_s: float,
+    model: Optional[ModelConfig],
+    a: PlanAssumptions,
+) -> float:
+    floors = [latency_s / max(1, a.concurrency)]
+    if model and model.requests_per_minute:
+        floors.append(calls / float(model.requests_per_minute) * 60.0)
+    if model and model.tokens_per_minute:
+        floors.append(tokens / float(model.tokens_per_minute) * 60.0)
+    return max(floors) + pacing_s
+
+
+def build_plan(
+    docs: list[DocPlan],
+    *,
+    repo_root: Path,
+    model_name: str,
+    assumptions: PlanAssumptions,
+    include_combined: bool = True,
+    docs_in_combined: Optional[int] = None,
+) -> dict[str, Any]:
+    """Aggregate per-document plans into a run plan with wall-time and cost per deployment."""
+
+    a = assumptions
+    map_calls = sum(d.map_calls for d in docs)
+    reduce_calls = sum(d.reduce_calls for d in docs)
+    input_tokens = sum(d.input_tokens for d in docs)
+    output_tokens = sum(d.output_tokens for d in docs)
+
+    combined_calls = 0
+    n_combined = len(docs) if docs_in_combined is None else int(docs_in_combined)
+    if include_combined and n_combined > 0:
+        combined_calls = 1
+        input_tokens += n_combined * a.reduce_output_tokens + estimate_tokens(_COMBINED_PROMPT_OVERHEAD_CHARS, a)
+        output_tokens += a.combined_output_tokens
+
+    calls = map_calls + reduce_calls + combined_calls
+    latency_s = (
+        map_calls * (a.base_latency_s + a.map_output_tokens / a.output_tokens_per_s)
+        + reduce_calls * (a.base_latency_s + a.reduce_output_tokens / a.output_tokens_per_s)
+        + combined_calls * (a.base_latency_s + a.combined_output_tokens / a.output_tokens_per_s)
+    )
+    pacing_s = map_calls * a.map_pacing_s + len(docs) * a.doc_pacing_s
+
+    models = load_models_config(repo_root)
+    per_deployment: dict[str, Any] = {}
+    for name, m in models.items():
+        cost: Optional[float] = None
+        if m.input_cost_per_1m_tokens is not None and m.output_cost_per_1m_tokens is not None:
+            cost = round(
+                input_tokens / 1e6 * float(m.input_cost_per_1m_tokens)
+                + output_tokens / 1e6 * float(m.output_cost_per_1m_tokens),
+                4,
+            )
+        per_deployment[name] = {
+            "deployment_name": m.deployment_name,
+            "estimated_cost": cost,
+            "estimated_wall_time_s": round(
+                _wall_time_s(
+                    calls=calls,
+                    latency_s=latency_s,
+                    tokens=input_tokens + output_tokens,
+                    pacing_s=pacing_s,
+                    model=m,
+                    a=a,
+                ),
+                1,
+            ),
+            "requests_per_minute": m.requests_per_minute,
+            "tokens_per_minute": m.tokens_per_minute,
+        }
+
+    selected = models.get(model_name)
+    wall_s = _wall_time_s(
+        calls=calls,
+        latency_s=latency_s,
+        tokens=input_tokens + output_tokens,
+        pacing_s=pacing_s,
+        model=selected,
+        a=a,
+    )
+
+    return {
+        "generated_on": datetime.now().isoformat(timespec="seconds"),
+        "model": model_name,
+        "assumptions": asdict(a),
+        "totals": {
+            "documents": len(docs),
+            "chunks": sum(d.chunks for d in docs),
+            "input_chars": sum(d.input_chars for d in docs),
+            "calls": calls,
+            "map_calls": map_calls,
+            "reduce_calls": reduce_calls,
+            "combined_calls": combined_calls,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "sequential_latency_s": round(latency_s + pacing_s, 1),
+            "estimated_wall_time_s": round(wall_s, 1),
+        },
+        "deployments": per_deployment,
+        "documents": [asdict(d) for d in docs],
+    }
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h {m:02d}m {s:02d}s" if h else f"{m}m {s:02d}s"
+
+
+def write_plan_report(plan: dict[str, Any], *, out_md_path: Path, out_json_path: Path) -> None:
+    """Write the plan as JSON (machine-readable) and Markdown (human-readable)."""
+
+    # Deferred to avoid a circular import (summarize_folder imports this module).
+    from agent_tools.llm.summarize_folder import _atomic_write_text
+
+    t = plan["totals"]
+    a = plan["assumptions"]
+    lines = [
+        "# Synthesis Plan (no model calls made)",
+        "",
+        f"Generated on: {plan['generated_on']}",
+        f"Model: {plan['model']}",
+        "",
+        "## Totals",
+        f"- Documents: {t['documents']}",
+        f"- Chunks: {t['chunks']}",
+        f"- Calls: {t['calls']} (map {t['map_calls']}, reduce {t['reduce_calls']}, combined {t['combined_calls']})",
+        f"- Input tokens (est.): {t['input_tokens']:,}",
+        f"- Output tokens (est.): {t['output_tokens']:,}",
+        f"- Sequential latency (est.): {_fmt_duration(t['sequential_latency_s'])}",
+        f"- Wall time at concurrency {a['concurrency']} (est.): {_fmt_duration(t['estimated_wall_time_s'])}",
+        "",
+        "## Per Deployment",
+    ]
+    for name, d in plan["deployments"].items():
+        cost = "unknown (set input/output_cost_per_1m_tokens)" if d["estimated_cost"] is None else f"{d['estimated_cost']:.2f}"
+        lines.append(f"- {name} ({d['deployment_name']}): cost {cost}; wall time {_fmt_duration(d['estimated_wall_time_s'])}")
+    if not plan["deployments"]:
+        lines.append("- None configured in config/models.json")
+
+    lines += ["", "## Documents", "| Source | Kind | Chunks | Calls | In tokens | Out tokens | Warnings |", "|---|---|---|---|---|---|---|"]
+    for d in plan["documents"]:
+        lines.append(
+            f"| {Path(d['source']).name} | {d['kind']} | {d['chunks']} | {d['map_calls'] + d['reduce_calls']} "
+            f"| {d['input_tokens']:,} | {d['output_tokens']:,} | {', '.join(d['warnings']) or '-'} |"
+        )
+    lines += [
+        "",
+        "## Assumptions",
+        *[f"- {k}: {v}" for k, v in a.items()],
+        "",
+    ]
+
+    _atomic_write_text(out_md_path, "\n".join(lines))
+    _atomic_write_text(out_json_path, json.dumps(plan, indent=2) + "\n")
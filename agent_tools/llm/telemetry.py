@@ -0,0 +1,468 @@
+"""Per-call LLM telemetry ledger.
+
+Every ``AzureOpenAIResponsesClient.create_response`` call appends one JSON line
+(deployment and endpoint host, token usage from the API payload, latency, retries, throttling
+waits, prompt-cache status, caller tag and phase). Outer retry loops append
+``retry`` events. The ledger is append-only and lives under the run folder:
+
+    runs/<RUN_ID>/exports/llm/llm_calls.jsonl
+
+The ledger is enabled when ``RUN_ID`` is set in the environment or when
+``configure_ledger(run_id=...)`` is called; otherwise recording is a no-op.
+
+Tag calls with a caller and phase (map / reduce / combined) via::
+
+    with telemetry_context(caller="summarize_file.synthesize_pdf", phase="map"):
+        client.create_response(...)
+
+Adaptive concurrency decisions (see ``concurrency.py``) go to
+``concurrency_decisions.jsonl`` in the same folder.
+
+Summarize a run:
+    python -m agent_tools.llm.telemetry --run-id <RUN_ID>
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+
+from agent_tools.llm.prompts import prefix_fingerprint
+
+LEDGER_FILENAME = "llm_calls.jsonl"
+DECISIONS_FILENAME = "concurrency_decisions.jsonl"
+
+
+@dataclass(frozen=True)
+class CallRecord:
+    ts: float
+    event: str  # "call" | "retry"
+    caller: str
+    phase: str
+    deployment: str = ""
+    endpoint: str = ""  # API host; tells same-named deployments in other resources/regions apart
+    status: str = "ok"  # "ok" | "error" | retry kind (e.g. "rate_limited", "timeout")
+    latency_s: float = 0.0  # successful attempt only (total_s for errors)
+    total_s: float = 0.0  # including transport retries and backoff
+    attempts: int = 1
+    retries: int = 0
+    throttle_wait_s: float = 0.0
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+    cache_hit: Optional[bool] = None
+    prefix_id: Optional[str] = None  # fingerprint of the fixed instructions (see prompts.py)
+    prefix_chars: Optional[int] = None
+    error: Optional[str] = None
+
+
+_caller: contextvars.ContextVar[str] = contextvars.ContextVar("llm_caller", default="")
+_phase: contextvars.ContextVar[str] = contextvars.ContextVar("llm_phase", default="other")
+
+_lock = threading.Lock()
+_ledger_path: Optional[Path] = None
+_configured = False
+
+
+def _repo_root() -> Path:
+    return Path(__file__).resolve().parents[2]
+
+
+def ledger_path_for_run(run_id: str) -> Path:
+    return _repo_root() / "runs" / run_id / "exports" / "llm" / LEDGER_FILENAME
+
+
+def configure_ledger(*, run_id: Optional[str] = None, path: Optional[Path] = None) -> Optional[Path]:
+    """Set (or clear, with no arguments) the ledger path for this process."""
+
+    global _ledger_path, _configured
+    with _lock:
+        _configured = True
+        if path is not None:
+            _ledger_path = Path(path)
+        elif run_id:
+            _ledger_path = ledger_path_for_run(run_id)
+        else:
+            _ledger_path = None
+        return _ledger_path
+
+
+def active_ledger_path() -> Optional[Path]:
+    if _configured:
+        return _ledger_path
+    run_id = (os.getenv("RUN_ID") or "").strip()
+    return ledger_path_for_run(run_id) if run_id else None
+
+
+@contextlib.contextmanager
+def telemetry_context(*, caller: Optional[str] = None, phase: Optional[str] = None) -> Iterator[None]:
+    tokens = []
+    if caller is not None:
+        tokens.append((_caller, _caller.set(caller)))
+    if phase is not None:
+        tokens.append((_phase, _phase.set(phase)))
+    try:
+        yield
+    finally:
+        for var, tok in reversed(tokens):
+            var.reset(tok)
+
+
+def current_tags() -> tuple[str, str]:
+    return _caller.get(), _phase.get()
+
+
+def usage_from_result(result: Any) -> dict[str, Optional[int]]:
+    """Pull token counts out of a Responses API ``usage`` block (missing -> None)."""
+
+    usage = result.get("usage") if isinstance(result, dict) else None
+    if not isinstance(usage, dict):
+        return {"input_tokens": None, "output_tokens": None, "cached_tokens": None, "reasoning_tokens": None}
+
+    in_details = usage.get("input_tokens_details") or usage.get("prompt_tokens_details") or {}
+    out_details = usage.get("output_tokens_details") or usage.get("completion_tokens_details") or {}
+
+    def _int(v: Any) -> Optional[int]:
+        return int(v) if isinstance(v, (int, float)) else None
+
+    return {
+        "input_tokens": _int(usage.get("input_tokens", usage.get("prompt_tokens"))),
+        "output_tokens": _int(usage.get("output_tokens", usage.get("completion_tokens"))),
+        "cached_tokens": _int(in_details.get("cached_tokens")) if isinstance(in_details, dict) else None,
+        "reasoning_tokens": _int(out_details.get("reasoning_tokens")) if isinstance(out_details, dict) else None,
+    }
+
+
+def _append(record: CallRecord) -> None:
+    _append_row(active_ledger_path(), asdict(record))
+
+
+def _append_row(path: Optional[Path], row: dict[str, Any]) -> None:
+    if path is None:
+        return
+    line = json.dumps(row, ensure_ascii=False) + "\n"
+    try:
+        with _lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError:
+        # Telemetry must never break a synthesis run.
+        pass
+
+
+def endpoint_host(url: str) -> str:
+    """Host part of an API URL, as recorded in ``endpoint``."""
+
+    return urlsplit(url or "").netloc
+
+
+def record_call(
+    *,
+    deployment: str,
+    status: str,
+    latency_s: float,
+    total_s: float,
+    attempts: int,
+    throttle_wait_s: float = 0.0,
+    result: Any = None,
+    error: Optional[str] = None,
+    instructions: Optional[str] = None,
+    endpoint: str = "",
+) -> None:
+    caller, phase = current_tags()
+    usage = usage_from_result(result)
+    cached = usage["cached_tokens"]
+    _append(
+        CallRecord(
+            ts=time.time(),
+            event="call",
+            caller=caller,
+            phase=phase,
+            deployment=deployment,
+            endpoint=endpoint,
+            status=status,
+            latency_s=round(float(latency_s), 4),
+            total_s=round(float(total_s), 4),
+            attempts=int(attempts),
+            retries=max(0, int(attempts) - 1),
+            throttle_wait_s=round(float(throttle_wait_s), 3),
+            cache_hit=(cached > 0) if cached is not None else None,
+            prefix_id=prefix_fingerprint(instructions) if instructions else None,
+            prefix_chars=len(instructions) if instructions else None,
+            error=(error or None) and str(error)[:500],
+            **usage,
+        )
+    )
+
+
+def record_retry(
+    *, kind: str, wait_s: float = 0.0, error: Optional[str] = None, deployment: str = "", endpoint: str = ""
+) -> None:
+    """Record an outer-loop retry (e.g. ``call_with_retry`` backing off on a 429)."""
+
+    caller, phase = current_tags()
+    _append(
+        CallRecord(
+            ts=time.time(),
+            event="retry",
+            caller=caller,
+            phase=phase,
+            deployment=deployment,
+            endpoint=endpoint,
+            status=kind,
+            throttle_wait_s=round(float(wait_s), 3) if kind == "rate_limited" else 0.0,
+            error=(error or None) and str(error)[:500],
+        )
+    )
+
+
+def record_concurrency_decision(
+    *,
+    limiter: str,
+    action: str,
+    limit_before: int,
+    limit_after: int,
+    in_flight: int,
+    reason: str,
+    latency_s: float,
+    baseline_s: Optional[float],
+) -> None:
+    ledger = active_ledger_path()
+    caller, phase = current_tags()
+    _append_row(
+        ledger.with_name(DECISIONS_FILENAME) if ledger else None,
+        {
+            "ts": time.time(),
+            "limiter": limiter,
+            "action": action,
+            "limit_before": limit_before,
+            "limit_after": limit_after,
+            "in_flight": in_flight,
+            "reason": reason,
+            "latency_s": round(latency_s, 4),
+            "baseline_s": round(baseline_s, 4) if baseline_s is not None else None,
+            "caller": caller,
+            "phase": phase,
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# Summaries
+# ---------------------------------------------------------------------------
+
+
+def load_ledger(path: Path) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    if not path.exists():
+        return rows
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue  # Tolerate a torn final line from an interrupted run.
+    return rows
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (pct in 0..100)."""
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_ledger(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Aggregate ledger rows per phase (plus an ``all`` bucket)."""
+
+    buckets: dict[str, list[dict[str, Any]]] = {}
+    for r in rows:
+        buckets.setdefault(str(r.get("phase") or "other"), []).append(r)
+    buckets["all"] = list(rows)
+
+    out: dict[str, dict[str, Any]] = {}
+    for phase, items in buckets.items():
+        calls = [r for r in items if r.get("event") == "call"]
+        retries = [r for r in items if r.get("event") == "retry"]
+        ok = [r for r in calls if r.get("status") == "ok"]
+        latencies = [float(r.get("latency_s") or 0.0) for r in ok]
+        out_tokens = sum(int(r.get("output_tokens") or 0) for r in ok)
+        in_tokens = sum(int(r.get("input_tokens") or 0) for r in ok)
+        cached_tokens = sum(int(r.get("cached_tokens") or 0) for r in ok)
+
+        ts = [float(r.get("ts") or 0.0) for r in calls]
+        # Wall span: first call start to last call end.
+        span_s = 0.0
+        if ts:
+            starts = [float(r.get("ts") or 0.0) - float(r.get("total_s") or r.get("latency_s") or 0.0) for r in calls]
+            span_s = max(ts) - min(starts)
+
+        out[phase] = {
+            "calls": len(calls),
+            "errors": len(calls) - len(ok),
+            "transport_retries": sum(int(r.get("retries") or 0) for r in calls),
+            "outer_retries": len(retries),
+            "throttle_wait_s": round(sum(float(r.get("throttle_wait_s") or 0.0) for r in items), 1),
+            "p50_s": percentile(latencies, 50),
+            "p95_s": percentile(latencies, 95),
+            "p99_s": percentile(latencies, 99),
+            "input_tokens": in_tokens,
+            "output_tokens": out_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_ratio": round(cached_tokens / in_tokens, 3) if in_tokens else None,
+            "cache_hit_calls": sum(1 for r in ok if r.get("cache_hit")),
+            "prefixes": len({r.get("prefix_id") for r in calls if r.get("prefix_id")}),
+            "span_s": round(span_s, 1),
+            "calls_per_min": round(len(ok) / span_s * 60.0, 2) if span_s > 0 else None,
+            "output_tokens_per_s": round(out_tokens / span_s, 1) if span_s > 0 else None,
+        }
+    return out
+
+
+def summarize_deployments(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Per-deployment call share, errors, throttling, latency and failovers (for pooled models).
+
+    Rows are grouped by (deployment, endpoint); a deployment name served by
+    several endpoints is reported once per endpoint as ``name @ host``.
+    """
+
+    def key(r: dict[str, Any]) -> tuple[str, str]:
+        return (str(r.get("deployment") or ""), str(r.get("endpoint") or ""))
+
+    calls = [r for r in rows if r.get("event") == "call"]
+    total = len(calls)
+    keys = sorted({key(r) for r in rows if r.get("deployment")})
+    shared = {name for name, _ in keys if sum(1 for n, _ in keys if n == name) > 1}
+    out: dict[str, dict[str, Any]] = {}
+    for k in keys:
+        name, endpoint = k
+        mine = [r for r in calls if key(r) == k]
+        ok = [r for r in mine if r.get("status") == "ok"]
+        latencies = [float(r.get("latency_s") or 0.0) for r in ok]
+        out[f"{name} @ {endpoint}" if name in shared else name] = {
+            "calls": len(mine),
+            "share": round(len(mine) / total, 3) if total else None,
+            "errors": len(mine) - len(ok),
+            "throttle_wait_s": round(sum(float(r.get("throttle_wait_s") or 0.0) for r in mine), 1),
+            "p50_s": percentile(latencies, 50),
+            "p95_s": percentile(latencies, 95),
+            "output_tokens": sum(int(r.get("output_tokens") or 0) for r in ok),
+            "failovers": sum(
+                1 for r in rows if r.get("event") == "retry" and r.get("status") == "failover" and key(r) == k
+            ),
+        }
+    return out
+
+
+def summarize_decisions(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Per-limiter counts of increases/decreases and the limit range reached."""
+
+    out: dict[str, dict[str, Any]] = {}
+    for r in rows:
+        s = out.setdefault(
+            str(r.get("limiter") or ""),
+            {"increase": 0, "decrease": 0, "hold": 0, "min_limit": None, "max_limit": None, "final_limit": None},
+        )
+        action = str(r.get("action") or "")
+        if action in s:
+            s[action] += 1
+        after = int(r.get("limit_after") or 0)
+        s["min_limit"] = after if s["min_limit"] is None else min(s["min_limit"], after)
+        s["max_limit"] = after if s["max_limit"] is None else max(s["max_limit"], after)
+        s["final_limit"] = after
+    return out
+
+
+def _fmt(v: Any) -> str:
+    if v is None:
+        return "-"
+    if isinstance(v, float):
+        return f"{v:.2f}"
+    return str(v)
+
+
+def format_summary(summary: dict[str, dict[str, Any]]) -> str:
+    cols = [
+        "calls",
+        "errors",
+        "transport_retries",
+        "outer_retries",
+        "throttle_wait_s",
+        "p50_s",
+        "p95_s",
+        "p99_s",
+        "input_tokens",
+        "output_tokens",
+        "cached_tokens",
+        "cached_ratio",
+        "cache_hit_calls",
+        "calls_per_min",
+        "output_tokens_per_s",
+    ]
+    order = [p for p in ("map", "reduce", "combined") if p in summary]
+    order += sorted(p for p in summary if p not in order and p != "all") + ["all"]
+    lines = ["| phase | " + " | ".join(cols) + " |", "|---" * (len(cols) + 1) + "|"]
+    for phase in order:
+        s = summary.get(phase)
+        if s is None:
+            continue
+        lines.append(f"| {phase} | " + " | ".join(_fmt(s[c]) for c in cols) + " |")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize the per-call LLM telemetry ledger")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--run-id", help="Read runs/<RUN_ID>/exports/llm/llm_calls.jsonl")
+    group.add_argument("--ledger", help="Explicit ledger path")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a Markdown table")
+    args = parser.parse_args(argv)
+
+    path = Path(args.ledger) if args.ledger else ledger_path_for_run(args.run_id)
+    rows = load_ledger(path)
+    if not rows:
+        print(f"No telemetry records found in {path}")
+        return 1
+
+    summary = summarize_ledger(rows)
+    deployments = summarize_deployments(rows)
+    decisions = summarize_decisions(load_ledger(path.with_name(DECISIONS_FILENAME)))
+    if args.json:
+        print(json.dumps({"phases": summary, "deployments": deployments, "concurrency": decisions}, indent=2))
+        return 0
+
+    print(format_summary(summary))
+    if len(deployments) > 1:
+        cols = ["calls", "share", "errors", "throttle_wait_s", "p50_s", "p95_s", "output_tokens", "failovers"]
+        print("\n| deployment | " + " | ".join(cols) + " |")
+        print("|---" * (len(cols) + 1) + "|")
+        for name, d in deployments.items():
+            print(f"| {name} | " + " | ".join(_fmt(d[c]) for c in cols) + " |")
+    for name, d in decisions.items():
+        print(
+            f"\nConcurrency [{name}]: +{d['increase']} / -{d['decrease']} decisions; "
+            f"limit range {d['min_limit']}..{d['max_limit']}, final {d['final_limit']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
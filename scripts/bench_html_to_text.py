@@ -0,0 +1,205 @@
+"""Benchmark HTML-to-text conversion of mail bodies.
+
+Compares the previous regex pipeline (kept here as ``legacy``) with
+``agent_tools.graph.html_text.html_to_text`` in full and ``trim_quoted``
+mode. The built-in corpus mimics what Graph returns: Outlook reply chains
+(Word HTML with conditional comments and ``divRplyFwdMsg`` headers), Gmail
+replies, newsletters with big ``<style>`` blocks and nested layout tables,
+data-table reports, short notes, and a malformed body full of stray ``<``.
+Pass ``--dir`` to benchmark saved ``.html`` bodies instead.
+
+Usage:
+    python scripts/bench_html_to_text.py
+    python scripts/bench_html_to_text.py --dir tmp/mail_bodies --repeat 5 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from html import unescape
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from agent_tools.graph.html_text import html_to_text  # noqa: E402
+
+
+def legacy_html_to_text(html_str: str) -> str:
+    """The converter ``mail_search`` and ``export_sent_mail`` used before ``html_text``."""
+
+    if not html_str:
+        return ""
+    text = html_str
+    text = re.sub(r"<\s*br\s*/?>", "\n", text, flags=re.IGNORECASE)
+    text = re.sub(r"</\s*p\s*>", "\n\n", text, flags=re.IGNORECASE)
+    text = re.sub(r"</\s*div\s*>", "\n", text, flags=re.IGNORECASE)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = unescape(text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+_WORD_HEAD = (
+    '<html xmlns:o="urn:schemas-microsoft-com:office:office"><head>'
+    '<meta http-equiv="Content-Type" content="text/html; charset=utf-8">'
+    "<style><!-- @font-face {font-family:Calibri;} p.MsoNormal, li.MsoNormal {margin:0in;font-size:11.0pt;"
+    "font-family:\"Calibri\",sans-serif;} span.EmailStyle17 {mso-style-type:personal-compose;} --></style>"
+    "<!--[if gte mso 9]><xml><o:shapedefaults v:ext=\"edit\" spidmax=\"1026\" /></xml><![endif]-->"
+    "</head>"
+)
+
+
+def _outlook_message(i: int, paragraphs: int) -> str:
+    body = "".join(
+        f'<p class="MsoNormal"><span style="font-size:11.0pt">Item {i}.{p}: the revised pricing for the '
+        f"renewal is attached &amp; reflects the Q{p % 4 + 1} volumes we discussed.<o:p></o:p></span></p>"
+        '<p class="MsoNormal"><o:p>&nbsp;</o:p></p>'
+        for p in range(paragraphs)
+    )
+    return body + '<p class="MsoNormal">Thanks,<br>Alex<o:p></o:p></p>'
+
+
+def outlook_reply_chain(depth: int = 12, paragraphs: int = 6) -> str:
+    parts = [_WORD_HEAD, '<body lang="EN-US"><div class="WordSection1">', _outlook_message(0, paragraphs)]
+    for i in range(1, depth):
+        parts.append(
+            '<div style="border:none;border-top:solid #E1E1E1 1.0pt;padding:3.0pt 0in 0in 0in">'
+            f'<p class="MsoNormal"><b>From:</b> Person {i} &lt;p{i}@example.com&gt;<br><b>Sent:</b> Monday, '
+            f"January {i}, 2026 9:{i:02d} AM<br><b>To:</b> Alex<br><b>Subject:</b> RE: Renewal</p></div>"
+        )
+        parts.append(_outlook_message(i, paragraphs))
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def gmail_reply(depth: int = 8) -> str:
+    html = '<div dir="ltr">Works for me, see you Thursday.</div>'
+    for i in range(depth):
+        html = (
+            f'<div dir="ltr">Reply {i}: agreed on the <b>timeline</b>; notes inline.<br><br>'
+            + "".join(f"<div>Line {j} of reply {i} with some detail.</div>" for j in range(8))
+            + "</div>"
+            + '<br><div class="gmail_quote"><div dir="ltr" class="gmail_attr">On Mon, Jan 5, 2026 at 9:00 AM '
+            f"Person {i} &lt;p{i}@example.com&gt; wrote:<br></div>"
+            f'<blockquote class="gmail_quote" style="margin:0px 0px 0px 0.8ex">{html}</blockquote></div>'
+        )
+    return html
+
+
+def newsletter(sections: int = 30) -> str:
+    style = "<style>" + "".join(f".c{i}{{color:#{i:06x};padding:{i % 9}px}}" for i in range(400)) + "</style>"
+    cells = "".join(
+        '<tr><td class="c1"><table width="100%"><tr>'
+        f'<td width="120"><img src="https://cdn.example.com/{s}.png" alt=""></td>'
+        f'<td><h2>Headline {s}</h2><p>Story {s} summary with <a href="https://example.com/{s}">a link</a> '
+        "and a few sentences of teaser copy to make the block realistic.</p></td>"
+        "</tr></table></td></tr>"
+        for s in range(sections)
+    )
+    return (
+        f"<html><head>{style}</head><body>"
+        '<table width="100%" cellpadding="0" cellspacing="0"><tr><td align="center">'
+        f'<table width="600">{cells}</table>'
+        '<table width="600"><tr><td>Unsubscribe | Preferences &copy; 2026</td></tr></table>'
+        "</td></tr></table></body></html>"
+    )
+
+
+def data_table_report(rows: int = 400) -> str:
+    body = "".join(
+        f"<tr><td>Account {r}</td><td>{r * 37 % 1000:,}</td><td>{r % 12 + 1}/2026</td><td>OK</td></tr>"
+        for r in range(rows)
+    )
+    return (
+        "<p>Weekly usage report:</p><table border=1><tr><th>Account</th><th>Units</th>"
+        f"<th>Month</th><th>Status</th></tr>{body}</table><ul><li>Totals final</li><li>Next run Monday</li></ul>"
+    )
+
+
+def short_note() -> str:
+    return "<div>Can you send the deck before 3pm?</div><div><br></div><div>Thanks!</div>"
+
+
+def stray_angle_brackets(n: int = 20000) -> str:
+    # Pasted code/maths ("if a < b") with no closing ">" anywhere after it.
+    return "<p>" + "if a < b then x; " * n
+
+
+CORPUS = {
+    "outlook_reply_chain": outlook_reply_chain,
+    "gmail_reply": gmail_reply,
+    "newsletter": newsletter,
+    "data_table_report": data_table_report,
+    "short_note": short_note,
+    "stray_angle_brackets": stray_angle_brackets,
+}
+
+
+def _time(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench(name: str, html: str, *, repeat: int) -> dict:
+    # Batch tiny bodies so timings are not dominated by timer resolution.
+    copies = max(1, 200_000 // max(1, len(html)))
+    variants = {
+        "legacy": legacy_html_to_text,
+        "html_text": html_to_text,
+        "html_text_trim": lambda s: html_to_text(s, trim_quoted=True),
+    }
+    result = {"body": name, "bytes": len(html.encode("utf-8"))}
+    for label, fn in variants.items():
+        seconds = _time(lambda s: [fn(s) for _ in range(copies)], html, repeat) / copies
+        result[f"{label}_mb_s"] = round(result["bytes"] / seconds / 1e6, 1) if seconds else None
+        result[f"{label}_chars"] = len(fn(html))
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text conversion of mail bodies")
+    parser.add_argument("--dir", type=Path, help="Benchmark *.html files from this directory instead")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per body (best is reported)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a Markdown table")
+    args = parser.parse_args(argv)
+
+    if args.dir:
+        bodies = {p.name: p.read_text(encoding="utf-8", errors="replace") for p in sorted(args.dir.glob("*.html"))}
+        if not bodies:
+            raise RuntimeError(f"No .html files in {args.dir}")
+    else:
+        bodies = {name: make() for name, make in CORPUS.items()}
+
+    results = [bench(name, html, repeat=args.repeat) for name, html in bodies.items()]
+
+    if args.json:
+        print(json.dumps({"results": results}, indent=2))
+        return 0
+
+    print("| body | KB | legacy MB/s | html_text MB/s | trim_quoted MB/s | chars legacy / html_text / trim |")
+    print("|---|---|---|---|---|---|")
+    for r in results:
+        print(
+            f"| {r['body']} | {r['bytes'] / 1024:.1f} | {r['legacy_mb_s']} | {r['html_text_mb_s']} | "
+            f"{r['html_text_trim_mb_s']} | {r['legacy_chars']} / {r['html_text_chars']} / {r['html_text_trim_chars']} |"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
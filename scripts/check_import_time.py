@@ -0,0 +1,143 @@
+"""Import-time budget for the agent_tools CLI entry points.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime``.
+The check fails when:
+- an entry point pulls in a heavy third-party dependency at import time
+  (requests, msal, PyPDF2, Google client libraries, ...), which should be
+  deferred to first use; or
+- its cumulative import time exceeds the budget.
+
+It also reports the median wall time of ``python -m <module> --help``, which
+is what agent loops pay on every invocation.
+
+Usage:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 100 --runs 5 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+ENTRY_POINTS = (
+    "agent_tools.llm.summarize_file",
+    "agent_tools.llm.summarize_folder",
+    "agent_tools.llm.summarize_incremental",
+    "agent_tools.llm.mail_ingest",
+    "agent_tools.llm.telemetry",
+    "agent_tools.llm.smoketest",
+    "agent_tools.llm.synthesis_daemon",
+    "agent_tools.graph.create_draft_from_md",
+    "agent_tools.graph.export_sent_mail",
+    "agent_tools.graph.mail_mirror",
+    "agent_tools.graph.validate",
+)
+
+# Top-level packages that must not be imported just to parse arguments.
+HEAVY_MODULES = (
+    "requests",
+    "urllib3",
+    "msal",
+    "PyPDF2",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "PIL",
+    "pandas",
+    "dotenv",
+)
+
+_PROBE = (
+    "import json, sys\n"
+    "before = set(sys.modules)\n"
+    "import {module}\n"
+    "loaded = {{m.split('.')[0] for m in set(sys.modules) - before}}\n"
+    "print(json.dumps(sorted(loaded & set({heavy!r}))))\n"
+)
+
+
+def _cumulative_us(stderr: str, module: str) -> int:
+    """Cumulative import time of ``module`` from ``-X importtime`` output."""
+
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1].strip())
+    return 0
+
+
+def measure(module: str, *, runs: int) -> dict:
+    probe = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if probe.returncode != 0:
+        return {"module": module, "error": probe.stderr.strip().splitlines()[-1:]}
+
+    walls = []
+    for _ in range(max(1, runs)):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", module, "--help"],
+            cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        walls.append(time.perf_counter() - started)
+
+    return {
+        "module": module,
+        "import_ms": round(_cumulative_us(probe.stderr, module) / 1000.0, 1),
+        "help_wall_ms": round(statistics.median(walls) * 1000.0, 1),
+        "heavy_imports": json.loads(probe.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check CLI import-time budget for agent_tools entry points")
+    parser.add_argument("--budget-ms", type=float, default=120.0, help="Max cumulative import time per entry point")
+    parser.add_argument("--runs", type=int, default=3, help="`--help` runs per entry point (median reported)")
+    parser.add_argument("--module", action="append", help="Only check these modules (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a Markdown table")
+    args = parser.parse_args(argv)
+
+    results = [measure(m, runs=args.runs) for m in (args.module or ENTRY_POINTS)]
+
+    failures = []
+    for r in results:
+        if "error" in r:
+            failures.append(f"{r['module']}: import failed {r['error']}")
+            continue
+        if r["heavy_imports"]:
+            failures.append(f"{r['module']}: imports {', '.join(r['heavy_imports'])} at startup")
+        if r["import_ms"] > args.budget_ms:
+            failures.append(f"{r['module']}: import {r['import_ms']} ms > budget {args.budget_ms} ms")
+
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2))
+    else:
+        print("| module | import_ms | help_wall_ms | heavy_imports |")
+        print("|---|---|---|---|")
+        for r in results:
+            if "error" in r:
+                print(f"| {r['module']} | error | - | - |")
+                continue
+            heavy = ", ".join(r["heavy_imports"]) or "-"
+            print(f"| {r['module']} | {r['import_ms']} | {r['help_wall_ms']} | {heavy} |")
+        for f in failures:
+            print(f"FAIL {f}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Regression check: registered redaction rules vs. the original sanitizer.
+
+``sanitize_text`` used to be two ``re.sub`` calls applied one after another.
+The rule registry in ``agent_tools.llm.redaction`` must produce the same text
+for the default rules, including inputs where one rule's match overlaps the
+next (``Bearer token=...``). Also checks that ``StreamingRedactor`` agrees
+with one-shot redaction when the text arrives in small pieces.
+
+Usage:
+    python scripts/check_redaction.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from agent_tools.llm.document_extraction import sanitize_text  # noqa: E402
+from agent_tools.llm.redaction import StreamingRedactor, default_ruleset  # noqa: E402
+
+CASES = (
+    "Authorization: Bearer token=abc123secret",
+    "Bearer secret: hunter2",
+    "Bearer password=hunter2 and api_key: k-123",
+    "api-key = sk.live_abc~def; Password: p@ss",
+    "Header: Bearer eyJhbGciOi.J9.eyJzdWIi",
+    "TOKEN:abc secret=def credential=ghi pwd: jkl",
+    "no secrets here, just a Bearer of bad news",
+    "",
+)
+
+
+def legacy_sanitize_text(text: str) -> str:
+    """``document_extraction.sanitize_text`` before the rule registry."""
+
+    if not text:
+        return ""
+    text = re.sub(
+        r"(?i)(api[-_]?key|secret|token|password|credential|pwd)\s*[:=]\s*[a-zA-Z0-9_\-\.~]+",
+        r"\1: [REDACTED]",
+        text,
+    )
+    text = re.sub(r"Bearer\s+[a-zA-Z0-9\-\._]+", "Bearer [REDACTED]", text)
+    return text
+
+
+def _streamed(text: str, piece: int) -> str:
+    redactor = StreamingRedactor(default_ruleset(), holdback=64)
+    out = [redactor.feed(text[i : i + piece]) for i in range(0, len(text), piece)]
+    out.append(redactor.flush())
+    return "".join(out)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare redaction rules with the original sanitizer")
+    parser.parse_args(argv)
+
+    failures = []
+    for case in CASES:
+        expected = legacy_sanitize_text(case)
+        got = sanitize_text(case)
+        if got != expected:
+            failures.append(f"sanitize_text({case!r}) = {got!r}, expected {expected!r}")
+        streamed = _streamed(" ".join([case] * 20), 7)
+        if streamed != legacy_sanitize_text(" ".join([case] * 20)):
+            failures.append(f"StreamingRedactor differs on {case!r}")
+
+    for f in failures:
+        print(f"FAIL {f}")
+    print(f"{len(CASES) - len(failures)}/{len(CASES)} cases match" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
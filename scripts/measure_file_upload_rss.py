@@ -0,0 +1,120 @@
+"""Report peak RSS for inline-upload vs chunked-text handling of one file.
+
+Each path runs in a fresh subprocess so peaks do not contaminate each other.
+No model calls are made; request bodies are built and discarded.
+
+Usage:
+    python scripts/measure_file_upload_rss.py --file path/to/large.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from agent_tools.llm.document_extraction import (  # noqa: E402
+    DEFAULT_INLINE_MAX_BYTES,
+    StreamingJSONBody,
+    encode_file_for_api,
+    encode_file_for_api_streamed,
+    extract_pdf_pages_sanitized,
+    peak_rss_bytes,
+    route_file_for_api,
+)
+
+MODES = ("inline_legacy", "inline_streamed", "chunked_text")
+
+
+def _payload(item: dict) -> dict:
+    return {
+        "model": "rss-probe",
+        "input": [{"type": "message", "role": "user", "content": [{"type": "input_text", "text": "Summarize."}, item]}],
+        "stream": False,
+    }
+
+
+def _run_mode(mode: str, file_path: Path) -> dict:
+    baseline = peak_rss_bytes()
+    started = time.perf_counter()
+    body_bytes = 0
+
+    if mode == "inline_legacy":
+        body_bytes = len(json.dumps(_payload(encode_file_for_api(file_path))).encode("utf-8"))
+    elif mode == "inline_streamed":
+        for part in StreamingJSONBody(_payload(encode_file_for_api_streamed(file_path))):
+            body_bytes += len(part)
+    elif mode == "chunked_text":
+        # Imported here so the inline modes do not pay for the synthesis stack.
+        from agent_tools.llm.summarize_file import _pack_pages_into_chunks, _split_text
+
+        if file_path.suffix.lower() == ".pdf":
+            pages, _, _ = extract_pdf_pages_sanitized(file_path)
+            chunks, _ = _pack_pages_into_chunks(
+                pages, target_chunk_chars=30_000, max_chunk_chars=45_000, overlap_pages=1, max_chunks=None
+            )
+            body_bytes = sum(len(c.text.encode("utf-8")) for c in chunks)
+        else:
+            text = file_path.read_text(encoding="utf-8", errors="replace")
+            body_bytes = sum(len(p.encode("utf-8")) for p in _split_text(text, 45_000))
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    return {
+        "mode": mode,
+        "body_bytes": body_bytes,
+        "seconds": round(time.perf_counter() - started, 3),
+        "baseline_rss_bytes": baseline,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure peak RSS for inline vs chunked-text file handling")
+    parser.add_argument("--file", required=True, help="File to measure")
+    parser.add_argument("--inline-max-bytes", type=int, default=DEFAULT_INLINE_MAX_BYTES)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    file_path = Path(args.file)
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, file_path)))
+        return 0
+
+    route = route_file_for_api(file_path, inline_max_bytes=int(args.inline_max_bytes))
+    print(f"File: {file_path} ({route.size_bytes} bytes)")
+    print(f"Route: {route.mode} ({route.reason})")
+
+    for mode in MODES:
+        if mode == "chunked_text" and file_path.suffix.lower() not in {".pdf", ".txt", ".md"}:
+            continue
+        proc = subprocess.run(
+            [sys.executable, __file__, "--file", str(file_path), "--mode", mode],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"- {mode}: failed: {proc.stderr.strip()[-400:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        peak_mb = (r["peak_rss_bytes"] or 0) / (1024 * 1024)
+        base_mb = (r["baseline_rss_bytes"] or 0) / (1024 * 1024)
+        print(
+            f"- {mode}: peak RSS {peak_mb:.1f} MiB (baseline {base_mb:.1f} MiB), "
+            f"body {r['body_bytes']} bytes, {r['seconds']}s"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())